@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for extraction_patterns
+
+Times one synthetic drugs.com-sized page through the old approach (one
+re.findall per pattern, ~17 chained re.sub calls in clean_text) and through
+the merged PatternSet scans, plus the old and bounded <tr>...Brand...</tr>
+pattern on minified table markup.
+
+Usage:
+    python benchmark_extraction_patterns.py [repeats]
+"""
+
+import re
+import sys
+import time
+import extraction_patterns as patterns
+
+LEGACY_TR_PATTERN = r'<tr[^>]*>.*?Brand.*?</tr>'
+BOUNDED_TR_PATTERN = re.compile(patterns.BRAND_TABLE_ROW)
+
+LEGACY_CLEAN_STEPS = [
+    (r'<[^>]+>', ''), (r'&quot;', ''), (r'&amp;', '&'), (r'&lt;', '<'), (r'&gt;', '>'),
+    (r'&nbsp;', ' '), (r'window\.\w+', ''), (r'get\s*\(\s*\)', ''), (r'function\s*\([^)]*\)', ''),
+    (r'var\s+\w+', ''), (r'console\.\w+', ''), (r'&quot;get&quot;', ''), (r'get\s*\(\s*\)', ''),
+    (r'window\.sup_platform', ''), (r'\s+', ' '),
+]
+
+PATTERN_SETS = [
+    patterns.DOSAGE_FORM_PATTERNS,
+    patterns.ALL_HOW_TO_TAKE_PATTERNS,
+    patterns.FOOD_INSTRUCTION_PATTERNS,
+    patterns.WHEN_TO_TAKE_PATTERNS,
+    patterns.BRAND_SECTION_PATTERNS,
+]
+
+
+def build_page():
+    """Roughly 200 KB of monograph-like HTML"""
+    paragraph = (
+        "<p>Metformin is used to improve blood sugar control. Take metformin with meals, "
+        "usually twice daily. Swallow the tablet whole with water. Available as: oral tablet, "
+        "extended release tablet, oral solution. Do not crush or chew. &nbsp;Brand names: "
+        "Glucophage, Fortamet, Riomet.</p>\n"
+        "<script>window.sup_platform = function (a) { var x = get(); console.log(x); }</script>\n"
+    )
+    table = ''.join(f'<tr class="r{i}"><td>Row {i}</td><td>value</td></tr>' for i in range(400))
+    return paragraph * 400 + f'<table>{table}</table>\n'
+
+
+def legacy_scan(page):
+    """One re.findall per pattern, as the extractors used to do"""
+    results = []
+    for pattern_set in PATTERN_SETS:
+        for pattern in pattern_set.patterns:
+            for match in re.findall(pattern, page, pattern_set.flags):
+                results.append(match[0] if isinstance(match, tuple) else match)
+    return results
+
+
+def registry_scan(page):
+    """One combined scan per pattern set"""
+    results = []
+    for pattern_set in PATTERN_SETS:
+        results.extend(pattern_set.findall(page))
+    return results
+
+
+def legacy_clean(text):
+    for pattern, replacement in LEGACY_CLEAN_STEPS:
+        text = re.sub(pattern, replacement, text)
+    return text.strip()
+
+
+def best_of(repeats, func, *args):
+    """Best wall time in milliseconds"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    page = build_page()
+    fragments = re.findall(r'<p>.*?</p>', page)[:200]
+    minified_rows = ''.join(f'<tr><td>{i}</td><td>x</td>' for i in range(3000))
+
+    print(f"📄 Synthetic page: {len(page) / 1024:.0f} KB, best of {repeats} runs\n")
+
+    rows = [
+        ("Pattern scan (findall per pattern)", best_of(repeats, legacy_scan, page)),
+        ("Pattern scan (merged PatternSet)", best_of(repeats, registry_scan, page)),
+        ("clean_text x200 (chained re.sub)", best_of(repeats, lambda: [legacy_clean(f) for f in fragments])),
+        ("clean_text x200 (clean_markup)", best_of(repeats, lambda: [patterns.clean_markup(f) for f in fragments])),
+        ("Unclosed <tr> rows (old pattern)", best_of(repeats, re.findall, LEGACY_TR_PATTERN, minified_rows)),
+        ("Unclosed <tr> rows (bounded)", best_of(repeats, BOUNDED_TR_PATTERN.findall, minified_rows)),
+    ]
+    for label, elapsed in rows:
+        print(f"  {label:<40} {elapsed:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
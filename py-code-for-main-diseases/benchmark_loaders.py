@@ -0,0 +1,187 @@
+"""
+Benchmark for sheet_loader
+
+Times the old ingest code (iterrows / cell-by-cell openpyxl, one read per
+sheet) against the sheet_loader helpers on the largest workbooks in
+../Analysis, and checks both return the same data.
+
+sheet_loader keeps parsed workbooks in memory, so the new code is timed
+twice: cold (cache cleared before every run, i.e. the first load in a
+process) and warm (workbook already parsed).
+
+Usage:
+    python benchmark_loaders.py [repeats]
+"""
+
+import os
+import sys
+import glob
+import time
+import warnings
+import openpyxl
+import pandas as pd
+import sheet_loader
+
+ANALYSIS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Analysis')
+MAIN_DISEASES_FILE = os.path.join(ANALYSIS_FOLDER, 'main_diseases_analysis_final.xlsx')
+ASSOCIATION_EXCLUDED = ['MEDICATION NAME', 'INFORMATION', 'PURPOSE:', 'SOURCE:', 'ENHANCEMENT:']
+
+
+def largest_medication_files(count=3):
+    """Biggest medication_data_*.xlsx reports"""
+    files = glob.glob(os.path.join(ANALYSIS_FOLDER, 'medication_data_*.xlsx'))
+    return sorted(files, key=os.path.getsize, reverse=True)[:count]
+
+
+def legacy_medication_records(path):
+    """Header search and record building with iterrows"""
+    df = pd.read_excel(path)
+    start = None
+    for idx, row in df.iterrows():
+        if str(row.iloc[0]).strip() == "Medication Name":
+            start = idx
+            break
+    if start is not None:
+        df = df.iloc[start:].copy()
+        df.columns = df.iloc[0]
+        df = df.iloc[1:]
+    records = {}
+    for _, row in df.iterrows():
+        name = str(row['Medication Name']).strip()
+        if name != 'nan' and name != '' and not name.startswith(sheet_loader.SECTION_MARKERS) and name != 'Medication Name':
+            records[name] = {
+                'brand_name': str(row['Brand Names']) if pd.notna(row['Brand Names']) else 'Not found',
+                'dosage': str(row['Dosage Forms']) if pd.notna(row['Dosage Forms']) else 'Not found',
+                'how_to_take': str(row['How to Take']) if pd.notna(row['How to Take']) else 'Not found',
+                'when_to_take': str(row['When to Take']) if pd.notna(row['When to Take']) else 'Not found'
+            }
+    return records
+
+
+def vectorized_medication_records(path):
+    return sheet_loader.medication_records(sheet_loader.load_medication_table(path))
+
+
+def legacy_cell_loader(path):
+    """WebMDDosageScraper.load_medication_data before sheet_loader"""
+    ws = openpyxl.load_workbook(path).active
+    header_row = None
+    for row in range(1, 20):
+        if ws.cell(row=row, column=1).value == "Medication Name":
+            header_row = row
+            break
+    headers = [ws.cell(row=header_row, column=col).value or f"Unnamed: {col-1}" for col in range(1, ws.max_column + 1)]
+    data = []
+    for row in range(header_row + 1, ws.max_row + 1):
+        name = ws.cell(row=row, column=1).value
+        if not name or str(name).strip().startswith(sheet_loader.SECTION_MARKERS):
+            continue
+        data.append({headers[col - 1]: ws.cell(row=row, column=col).value for col in range(1, len(headers) + 1)})
+    return pd.DataFrame(data)
+
+
+def vectorized_table(path):
+    raw = sheet_loader.read_sheet(path)
+    table = sheet_loader.table_below_header(raw, "Medication Name", max_rows=19)
+    names = sheet_loader.text_values(table['Medication Name'])
+    return table[table['Medication Name'].notna() & (names != '') & ~names.str.startswith(sheet_loader.SECTION_MARKERS)]
+
+
+def legacy_disease_associations(path):
+    """ExcelFile + second read of the sheet + iterrows"""
+    xl_file = pd.ExcelFile(path)
+    target = next(name for name in xl_file.sheet_names if 'all unique medications' in name.lower())
+    sheet_df = pd.read_excel(path, sheet_name=target)
+    associations = {}
+    for _, row in sheet_df.iterrows():
+        medication = str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else ''
+        tag = str(row.iloc[5]).strip() if pd.notna(row.iloc[5]) else ''
+        if (medication and medication != 'nan' and medication.upper() not in ASSOCIATION_EXCLUDED and
+                len(medication) > 2 and tag and tag != 'nan'):
+            associations[medication] = tag
+    return associations
+
+
+def vectorized_disease_associations(path):
+    sheets = sheet_loader.read_workbook(path)
+    target = next(name for name in sheets if 'all unique medications' in name.lower())
+    return sheet_loader.disease_tags_from_unique_sheet(sheets[target], ASSOCIATION_EXCLUDED)
+
+
+def legacy_original_medications(path):
+    """First sheet, then one read per sheet until a medication column shows up"""
+    df = pd.read_excel(path)
+    column = next((c for c in df.columns if 'unique medications' in str(c).lower() or 'all unique' in str(c).lower()), None)
+    if column is None:
+        for sheet_name in pd.ExcelFile(path).sheet_names:
+            sheet_df = pd.read_excel(path, sheet_name=sheet_name)
+            column = next((c for c in sheet_df.columns if 'unique medications' in str(c).lower() or 'all unique' in str(c).lower() or 'medication' in str(c).lower()), None)
+            if column is not None:
+                df = sheet_df
+                break
+    medications = []
+    for _, row in df.iterrows():
+        medication = str(row[column]).strip()
+        if medication != 'nan':
+            medications.append(medication)
+    return medications
+
+
+def vectorized_original_medications(path):
+    sheets = {name: sheet_loader.with_first_row_as_header(raw) for name, raw in sheet_loader.read_workbook(path).items()}
+    df = next(iter(sheets.values()))
+    column = next((c for c in df.columns if 'unique medications' in str(c).lower() or 'all unique' in str(c).lower()), None)
+    if column is None:
+        for sheet_df in sheets.values():
+            column = next((c for c in sheet_df.columns if 'unique medications' in str(c).lower() or 'all unique' in str(c).lower() or 'medication' in str(c).lower()), None)
+            if column is not None:
+                df = sheet_df
+                break
+    return sheet_loader.column_values(df, column)
+
+
+def best_of(repeats, func, *args, setup=None):
+    """Best wall time in milliseconds and the last result; setup() runs untimed before each run"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def same(a, b):
+    if isinstance(a, pd.DataFrame):
+        return len(a) == len(b) and list(a.iloc[:, 0]) == list(b.iloc[:, 0])
+    return a == b
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Long sheet titles in the reports make openpyxl warn on every load
+    warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
+    cases = []
+    for path in largest_medication_files():
+        name = os.path.basename(path)
+        name = name if len(name) <= 40 else '…' + name[-39:]
+        cases.append((f"Medication records  {name}", legacy_medication_records, vectorized_medication_records, path))
+        cases.append((f"Dosage table load   {name}", legacy_cell_loader, vectorized_table, path))
+    if os.path.exists(MAIN_DISEASES_FILE):
+        cases.append(("Disease associations", legacy_disease_associations, vectorized_disease_associations, MAIN_DISEASES_FILE))
+        cases.append(("Original medications", legacy_original_medications, vectorized_original_medications, MAIN_DISEASES_FILE))
+
+    print(f"📄 Workbooks from {os.path.abspath(ANALYSIS_FOLDER)}, best of {repeats} runs\n")
+    print(f"  {'Case':<62} {'old ms':>9} {'new cold':>9} {'new warm':>9}  same")
+    for label, legacy, vectorized, path in cases:
+        old_ms, old_result = best_of(repeats, legacy, path)
+        cold_ms, new_result = best_of(repeats, vectorized, path, setup=sheet_loader.forget_workbook)
+        warm_ms, _ = best_of(repeats, vectorized, path)
+        print(f"  {label:<62} {old_ms:9.1f} {cold_ms:9.1f} {warm_ms:9.1f}  {'✅' if same(old_result, new_result) else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Offline replay benchmark
+
+Replays the recorded corpus (python replay_corpus.py record) through the
+extraction and parsing code with no network and a stubbed LLM:
+
+    extract_medication_info        drugs.com monographs
+    extract_what_is_from_html      drugs.com monographs
+    extract_side_effects_from_html drugs.com side effects pages
+    parse_llm_response             recorded structured answers
+    process_content_with_llm       prompt + dispatcher + parse, stub model
+    split_medical_items            Tests / Treatments cells of the diseases CSV
+
+For each function it reports ops/sec (best of N runs) and the tracemalloc
+peak of one pass. Results are kept in replay_corpus/last_benchmark.json and
+the next run prints the change against them.
+
+Usage:
+    python benchmark_replay.py [repeats]
+"""
+
+import os
+import sys
+import json
+import time
+import warnings
+import tracemalloc
+import pandas as pd
+from replay_corpus import ReplayCorpus, CORPUS_DIR
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CSV', 'final_diseases_complete.csv')
+RESULTS_PATH = os.path.join(CORPUS_DIR, 'last_benchmark.json')
+
+STUB_RESPONSE = """WHAT IS:
+A medication used to treat the condition it was prescribed for.
+
+SIDE EFFECTS:
+- Nausea
+- Headache
+- Dizziness
+
+CALL A DOCTOR IF:
+- Symptoms persist or get worse
+
+GO TO ER IF:
+- Trouble breathing or swelling of the face
+"""
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for a GenerativeModel: replays recorded answers in turn"""
+    model_name = 'models/replay-stub'
+
+    def __init__(self, responses=None):
+        self.responses = responses or [STUB_RESPONSE]
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return StubResponse(self.responses[self.calls % len(self.responses)])
+
+
+class NullCache:
+    """LLM cache that never answers, so every prompt reaches the stub"""
+    cache_dir = None
+
+    def get(self, model_name, prompt):
+        return None
+
+    def put(self, model_name, prompt, response_text):
+        pass
+
+
+def structured_responses(responses):
+    """Recorded answers in the WHAT IS / SIDE EFFECTS / CALL A DOCTOR IF / GO TO ER IF format"""
+    return [text for text in responses if 'SIDE EFFECTS' in text.upper() and 'GO TO ER' in text.upper()]
+
+
+def csv_cells():
+    """Tests and Treatments cells of the diseases CSV"""
+    df = pd.read_csv(CSV_PATH)
+    cells = []
+    for column in ('Tests', 'Treatments'):
+        cells.extend(str(value) for value in df[column].dropna())
+    return cells
+
+
+def build_cases(corpus):
+    """(name, func, items) for every function with something to replay"""
+    # The scraper modules read the API key at construction/import time; nothing is sent
+    os.environ.setdefault('GOOGLE_GEMINI_API_KEY', 'offline-replay')
+
+    from medication_scraper import MedicationScraper
+    from production_scraper_LLM import DrugsScraper
+    from llm_dispatcher import LLMDispatcher
+    from tests_treatments_analyzer import split_medical_items
+
+    main_pages = corpus.pages('drugs.com:main')
+    sfx_pages = corpus.pages('drugs.com:sfx')
+    responses = structured_responses(corpus.llm_responses())
+
+    medication_scraper = MedicationScraper()
+    drugs_scraper = DrugsScraper(headless=True)
+    drugs_scraper.model = StubModel(responses)
+    drugs_scraper.dispatcher = LLMDispatcher(requests_per_minute=10 ** 9, max_in_flight=8, max_retries=0, cache=NullCache())
+
+    cases = []
+    if main_pages:
+        cases.append(('extract_medication_info', lambda: [medication_scraper.extract_medication_info(html, name) for name, url, html in main_pages], len(main_pages)))
+        cases.append(('extract_what_is_from_html', lambda: [drugs_scraper.extract_what_is_from_html(html, name) for name, url, html in main_pages], len(main_pages)))
+    if sfx_pages:
+        cases.append(('extract_side_effects_from_html', lambda: [drugs_scraper.extract_side_effects_from_html(html, name) for name, url, html in sfx_pages], len(sfx_pages)))
+
+    parse_inputs = responses or [STUB_RESPONSE]
+    cases.append(('parse_llm_response', lambda: [drugs_scraper.parse_llm_response(text) for text in parse_inputs], len(parse_inputs)))
+
+    # Side effects pages when recorded, else the stub answer as page content
+    llm_inputs = [(name, text) for name, text in
+                  ((name, drugs_scraper.extract_side_effects_from_html(html, name)) for name, url, html in sfx_pages) if text]
+    llm_inputs = llm_inputs or [('replay medication', STUB_RESPONSE * 5)]
+    cases.append(('process_content_with_llm (stub)', lambda: [drugs_scraper.process_content_with_llm(name, text, 'Replay description') for name, text in llm_inputs], len(llm_inputs)))
+
+    cells = csv_cells()
+    cases.append(('split_medical_items', lambda: [split_medical_items(cell) for cell in cells], len(cells)))
+    return cases
+
+
+def best_of(repeats, func):
+    """Best wall time in seconds"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(func):
+    """tracemalloc high-water mark of one pass, in bytes"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_previous():
+    try:
+        with open(RESULTS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
+
+    corpus = ReplayCorpus()
+    counts = corpus.counts()
+    if not corpus.index['pages']:
+        print(f"⚠️ No recorded pages in {CORPUS_DIR} (run: python replay_corpus.py record); benchmarking CSV and stub inputs only")
+    else:
+        print(f"📼 Corpus: {', '.join(f'{number} {kind}' for kind, number in sorted(counts.items()))}")
+
+    # Extractors print progress lines; keep the table readable
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        cases = build_cases(corpus)
+        results = {}
+        for name, func, items in cases:
+            func()  # warm-up
+            seconds = best_of(repeats, func)
+            results[name] = {
+                'items': items,
+                'ops_per_sec': round(items / seconds, 1) if seconds else 0.0,
+                'peak_kib': round(peak_memory(func) / 1024, 1),
+            }
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    previous = load_previous()
+    print(f"\n  {'Function':<34} {'items':>6} {'ops/sec':>10} {'peak KiB':>10}  vs last run")
+    for name, result in results.items():
+        before = previous.get(name)
+        change = ''
+        if before and before.get('ops_per_sec') and before.get('items') == result['items']:
+            change = f"{(result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100:+.1f}% ops/sec"
+        print(f"  {name:<34} {result['items']:>6} {result['ops_per_sec']:>10.1f} {result['peak_kib']:>10.1f}  {change}")
+
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    with open(RESULTS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Brand name matching
+
+BrandMatcher is an Aho-Corasick automaton over lowercased brand names: one
+linear pass over a page reports every known brand it mentions, however many
+brands are in the database.
+
+BrandIndex is the reverse index used for the "which category / which generic
+is this brand" lookups, so they are dict hits instead of scans over every
+category list.
+"""
+
+from collections import deque
+
+
+class BrandMatcher:
+    def __init__(self, brands):
+        # Trie as parallel lists: goto[state] = {char: state}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.brands = {}
+
+        for brand in brands:
+            key = brand.strip().lower()
+            if not key or key in self.brands:
+                continue
+            self.brands[key] = brand.strip()
+            self.add(key)
+        self.build_failure_links()
+
+    def add(self, key):
+        """Insert one lowercased brand into the trie"""
+        state = 0
+        for char in key:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(key)
+
+    def build_failure_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix state"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state].extend(self.output[self.fail[next_state]])
+
+    def iter_matches(self, text, whole_words=True):
+        """Yield (start, end, brand) for every brand occurrence in text"""
+        text_lower = text.lower()
+        state = 0
+        for i, char in enumerate(text_lower):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for key in self.output[state]:
+                start, end = i - len(key) + 1, i + 1
+                if whole_words and not self.is_whole_word(text_lower, start, end):
+                    continue
+                yield start, end, self.brands[key]
+
+    def is_whole_word(self, text, start, end):
+        """Check the match is not part of a longer word"""
+        before = text[start - 1] if start > 0 else ' '
+        after = text[end] if end < len(text) else ' '
+        return not (before.isalnum() or after.isalnum())
+
+    def find_all(self, text, whole_words=True):
+        """Distinct brands mentioned in text, in order of first appearance"""
+        found = []
+        seen = set()
+        for _, _, brand in self.iter_matches(text, whole_words):
+            if brand not in seen:
+                seen.add(brand)
+                found.append(brand)
+        return found
+
+
+class BrandIndex:
+    def __init__(self, brands_by_category, brands_by_generic=None):
+        # The first category listing a brand wins, as in the old category scans
+        self.category_by_brand = {}
+        for category, brands in brands_by_category.items():
+            for brand in brands:
+                self.category_by_brand.setdefault(brand.lower(), category)
+
+        # Enhanced database values are "Brand A | Brand B" strings
+        self.generics_by_brand = {}
+        for generic, brands in (brands_by_generic or {}).items():
+            for brand in str(brands).split('|'):
+                brand = brand.strip().lower()
+                if brand:
+                    self.generics_by_brand.setdefault(brand, []).append(generic)
+
+        self.matcher = BrandMatcher([brand for brands in brands_by_category.values() for brand in brands])
+
+    def category_of(self, brand):
+        """Category of a known brand, or None"""
+        return self.category_by_brand.get(str(brand).strip().lower())
+
+    def generics_of(self, brand):
+        """Generic names a brand is sold for, or an empty list"""
+        return self.generics_by_brand.get(str(brand).strip().lower(), [])
+
+    def is_known(self, brand):
+        """True for brands in the comprehensive or enhanced brand databases"""
+        key = str(brand).strip().lower()
+        return key in self.category_by_brand or key in self.generics_by_brand
+
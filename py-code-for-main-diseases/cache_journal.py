@@ -0,0 +1,196 @@
+"""
+Append-only cache journal
+
+Replaces "json.dump the whole cache after every medication". Each new or
+changed entry is appended to a JSONL file as one {"k": key, "v": value}
+line; the last line for a key wins. Writes are flushed immediately and
+fsync'd in batches, and the file is compacted (rewritten with one line per
+key, then atomically renamed) once superseded lines outnumber live ones.
+
+On load a torn final line from a crash is cut off, unreadable lines are
+skipped, and an old single-object .json cache is imported once.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+
+
+class CacheJournal:
+    def __init__(self, path, sync_every=20, sync_interval=5.0, min_compact_lines=100):
+        self.path = path
+        self.legacy_path = os.path.splitext(path)[0] + '.json'
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.min_compact_lines = min_compact_lines
+        self.entries = {}
+        self.line_count = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
+        self._file = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def load(self):
+        """Replay the journal and return {key: value}"""
+        with self._lock:
+            self.entries = {}
+            self.line_count = 0
+            if os.path.exists(self.path):
+                self._replay()
+            elif os.path.exists(self.legacy_path) and self.legacy_path != self.path:
+                self._import_legacy()
+            if self.line_count > self.min_compact_lines and self.line_count > 2 * len(self.entries):
+                self._compact()
+            return dict(self.entries)
+
+    def _replay(self):
+        """Read every complete line; truncate a torn tail left by a crash"""
+        good_offset = 0
+        skipped = 0
+        with open(self.path, 'rb') as f:
+            for raw_line in f:
+                if not raw_line.endswith(b'\n'):
+                    # Partial write at the end of the file
+                    break
+                good_offset += len(raw_line)
+                try:
+                    record = json.loads(raw_line)
+                    self.entries[record['k']] = record['v']
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                self.line_count += 1
+
+        if good_offset < os.path.getsize(self.path):
+            with open(self.path, 'rb+') as f:
+                f.truncate(good_offset)
+            print(f"⚠️ Recovered {self.path}: dropped an incomplete last entry")
+        if skipped:
+            print(f"⚠️ Skipped {skipped} unreadable entries in {self.path}")
+
+    def _import_legacy(self):
+        """Convert an old whole-file JSON cache into the journal"""
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not import {self.legacy_path}: {e}")
+            return
+        if isinstance(legacy, dict):
+            self.entries.update(legacy)
+            self._compact()
+            print(f"ℹ️ Imported {len(legacy)} entries from {self.legacy_path} into {self.path}")
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _append(self, key, value):
+        line = json.dumps({'k': key, 'v': value}, ensure_ascii=False)
+        f = self._open()
+        f.write(line + '\n')
+        f.flush()
+        self.entries[key] = value
+        self.line_count += 1
+        self.unsynced += 1
+
+    def _maybe_sync(self):
+        if self.unsynced and (self.unsynced >= self.sync_every or time.time() - self.last_sync >= self.sync_interval):
+            self._sync()
+
+    def _sync(self):
+        if self._file is not None and self.unsynced:
+            os.fsync(self._file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.time()
+
+    def put(self, key, value):
+        """Append one entry"""
+        with self._lock:
+            self._append(key, value)
+            self._maybe_sync()
+            self._maybe_compact()
+
+    def save(self, data):
+        """Append the entries of data that are new or changed since the last save"""
+        with self._lock:
+            for key, value in list(data.items()):
+                if key in self.entries:
+                    current = self.entries[key]
+                    if current is value or current == value:
+                        continue
+                self._append(key, value)
+            self._maybe_sync()
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.line_count > self.min_compact_lines and self.line_count > 2 * len(self.entries):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the journal with one line per live key and swap it in atomically"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = f'{self.path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, value in self.entries.items():
+                f.write(json.dumps({'k': key, 'v': value}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Make the rename itself durable where the platform allows it
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(directory, os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self.line_count = len(self.entries)
+        self.unsynced = 0
+        self.last_sync = time.time()
+
+    def replace(self, data):
+        """Make data the whole journal content (e.g. after re-keying) and compact"""
+        with self._lock:
+            self.entries = dict(data)
+            self._compact()
+
+    def compact(self):
+        """Force a compaction"""
+        with self._lock:
+            self._compact()
+
+    def sync(self):
+        """fsync pending appends"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """fsync pending appends and close the file"""
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def delete(self):
+        """Remove the journal (and any legacy JSON file); returns the paths removed"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            removed = []
+            for path in (self.path, self.legacy_path):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed.append(path)
+            self.entries = {}
+            self.line_count = 0
+            self.unsynced = 0
+            return removed
@@ -0,0 +1,69 @@
+"""
+One-round-trip anchor snapshots
+
+Reading link.text and link.get_attribute('href') costs a WebDriver HTTP
+round trip per call, so scanning a results page link by link costs about a
+thousand requests. snapshot_anchors() reads every <a> on the page with a
+single execute_script; matching and ranking then happen in Python, and only
+the chosen link is turned back into a WebElement for clicking.
+
+Each anchor is a dict:
+    index       position in document.querySelectorAll('a')
+    href        resolved URL ('' when missing)
+    attr        raw href attribute, as CSS [href*=...] selectors see it
+    text        visible text (what WebElement.text returns; '' when hidden)
+    label       textContent, visible or not (what XPath text() sees)
+    visible     rendered with a non-zero box
+    containers  result-list classes the link sits inside
+"""
+
+from instrumentation import span
+
+# Result-list wrappers the old per-selector searches looked inside
+RESULT_CONTAINERS = ['search-results', 'drug-results', 'drug-link', 'result-item']
+
+ANCHOR_SNAPSHOT_JS = """
+var containers = arguments[0];
+var anchors = document.querySelectorAll('a');
+var result = [];
+for (var i = 0; i < anchors.length; i++) {
+    var a = anchors[i];
+    var style = window.getComputedStyle(a);
+    var visible = a.getClientRects().length > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    var inside = [];
+    for (var j = 0; j < containers.length; j++) {
+        if (a.closest('.' + containers[j])) { inside.push(containers[j]); }
+    }
+    result.push({
+        index: i,
+        href: a.href || '',
+        attr: a.getAttribute('href') || '',
+        text: visible ? (a.innerText || '').trim() : '',
+        label: (a.textContent || '').trim(),
+        visible: visible,
+        containers: inside
+    });
+}
+return result;
+"""
+
+ANCHOR_ELEMENT_JS = """
+var anchors = document.querySelectorAll('a');
+var a = anchors[arguments[0]];
+if (a && (a.getAttribute('href') || '') === arguments[1]) { return a; }
+for (var i = 0; i < anchors.length; i++) {
+    if ((anchors[i].getAttribute('href') || '') === arguments[1]) { return anchors[i]; }
+}
+return null;
+"""
+
+
+def snapshot_anchors(driver):
+    """Every anchor on the current page as a list of dicts, in document order"""
+    with span('parse.anchor_snapshot'):
+        return driver.execute_script(ANCHOR_SNAPSHOT_JS, RESULT_CONTAINERS) or []
+
+
+def anchor_element(driver, anchor):
+    """WebElement for a snapshot anchor (re-found by href if the page shifted), or None"""
+    return driver.execute_script(ANCHOR_ELEMENT_JS, anchor['index'], anchor['attr'])
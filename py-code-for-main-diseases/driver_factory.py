@@ -0,0 +1,177 @@
+"""
+Shared Chrome driver factory
+
+Every Selenium scraper gets its browser from create_chrome_driver(). Besides
+the common anti-automation options, the factory uses CDP
+Network.setBlockedURLs to block images, fonts, media, ads and trackers. The
+scrapers only read text, so pages load faster and Chrome uses less memory.
+Each site has its own extra blocklist.
+
+Chrome ignores --disable-images / --disable-css / --disable-javascript, so
+blocking has to happen at the network layer.
+
+Network activity is read from Chrome's performance log whenever page_waits
+sees a page finish loading (record_page_network). It is counted per site in
+the run report, so bytes/documents gives the per-page figure:
+    network.<site>.documents / .requests / .bytes / .blocked
+
+Bytes never downloaded cannot be measured from inside the blocked session.
+To see the saving for a page, load it once with and once without blocking:
+    python driver_factory.py <url> [site]
+"""
+
+import sys
+import json
+import time
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from instrumentation import count
+from driver_health import DriverHealth
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Blocked on every site: assets the scrapers never read, ad networks and trackers
+COMMON_BLOCKLIST = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*googletagservices.com*',
+    '*adservice.google.*', '*amazon-adsystem.com*', '*adnxs.com*', '*criteo.*',
+    '*taboola.com*', '*outbrain.com*', '*pubmatic.com*', '*rubiconproject.com*',
+    '*openx.net*', '*casalemedia.com*', '*moatads.com*', '*scorecardresearch.com*',
+    '*quantserve.com*', '*hotjar.com*', '*facebook.net*', '*connect.facebook.*',
+    '*twitter.com/i/*', '*bing.com/bat*', '*newrelic.com*', '*nr-data.net*',
+    '*chartbeat.*', '*permutive.*', '*imrworldwide.com*', '*krxd.net*',
+]
+
+# Extra patterns per site (first-party ad and video code)
+SITE_BLOCKLISTS = {
+    'drugs.com': ['*drugs.com/ads/*', '*cdn.ddc-ads.*', '*jwplayer*', '*jwpcdn.com*'],
+    'webmd': ['*webmd.com/ads*', '*wbmdstatic.com/*/ads*', '*medscape.com/*/ads*', '*jwplayer*', '*brightcove*'],
+    'medlineplus': ['*youtube.com*', '*ytimg.com*'],
+}
+
+
+def blocklist_for(site):
+    return COMMON_BLOCKLIST + SITE_BLOCKLISTS.get(site, [])
+
+
+def create_chrome_driver(site, headless=False, extra_arguments=(), user_data_dir=None, block=True):
+    """Chrome with the shared options, per-site request blocking and network logging"""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    if block:
+        # Honoured by Chrome (unlike --disable-images); covers images the blocklist misses
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    for argument in extra_arguments:
+        chrome_options.add_argument(argument)
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+
+    # Performance log carries the CDP Network events used for the savings counters
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.network_site = site
+    driver.health = DriverHealth()
+
+    if block:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocklist_for(site)})
+        except Exception as e:
+            print(f"⚠️ Request blocking not enabled for {site}: {e}")
+    return driver
+
+
+def network_events(driver):
+    """CDP Network events logged since the last call (the log is drained on read)"""
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method', '').startswith('Network.'):
+            events.append(message)
+    return events
+
+
+def summarize_events(events):
+    """{documents, requests sent, bytes received, requests blocked} from a batch of Network events"""
+    summary = {'documents': 0, 'requests': 0, 'bytes': 0, 'blocked': 0}
+    for event in events:
+        params = event.get('params', {})
+        if event['method'] == 'Network.requestWillBeSent':
+            summary['requests'] += 1
+            if params.get('type') == 'Document':
+                summary['documents'] += 1
+        elif event['method'] == 'Network.loadingFinished':
+            summary['bytes'] += int(params.get('encodedDataLength', 0))
+        elif event['method'] == 'Network.loadingFailed' and params.get('blockedReason'):
+            summary['blocked'] += 1
+    # Blocked requests are announced too but never reach the network
+    summary['requests'] -= summary['blocked']
+    return summary
+
+
+def record_page_network(driver):
+    """Add the traffic of the page just loaded to the network.<site>.* counters"""
+    site = getattr(driver, 'network_site', None)
+    if not site:
+        return None
+    summary = summarize_events(network_events(driver))
+    if summary['requests'] or summary['blocked']:
+        for name, value in summary.items():
+            count(f'network.{site}.{name}', value)
+    return summary
+
+
+def measure_page(url, site, block):
+    """Load one URL in a fresh browser; returns the traffic summary and load time"""
+    driver = create_chrome_driver(site, headless=True, block=block)
+    try:
+        network_events(driver)
+        start = time.perf_counter()
+        driver.get(url)
+        elapsed = time.perf_counter() - start
+        time.sleep(2)  # let late ad and tracker requests show up in the log
+        summary = summarize_events(network_events(driver))
+        summary['load_s'] = round(elapsed, 2)
+        return summary
+    finally:
+        driver.quit()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python driver_factory.py <url> [drugs.com|webmd|medlineplus]")
+        return
+    url = sys.argv[1]
+    site = sys.argv[2] if len(sys.argv) > 2 else 'drugs.com'
+
+    unblocked = measure_page(url, site, block=False)
+    blocked = measure_page(url, site, block=True)
+    print(f"🌐 {url}")
+    for label, summary in (('no blocking', unblocked), ('blocking', blocked)):
+        print(f"   {label:<12} {summary['requests']:>4} requests  {summary['bytes'] / 1024:>8.0f} KiB  "
+              f"{summary['blocked']:>4} blocked  load {summary['load_s']:.2f}s")
+    print(f"   saved        {unblocked['requests'] - blocked['requests']:>4} requests  "
+          f"{(unblocked['bytes'] - blocked['bytes']) / 1024:>8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
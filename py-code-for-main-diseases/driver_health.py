@@ -0,0 +1,194 @@
+"""
+Health-based browser recycling
+
+Browsers used to be restarted on a fixed schedule (every 10 drugs, and on
+any error). Now each driver carries a DriverHealth. It tracks page-load
+latency (page_waits records every navigation), the recent error rate and
+the memory of the Chrome process tree. The browser is replaced only when
+one of these goes bad:
+
+    latency   median of the last 10 loads > 2.5x the median of the first 10
+    errors    half or more of the last 10 operations failed
+    memory    Chrome (browser + renderers) above 1.5 GB
+    pages     400 page loads, as a backstop
+
+When a browser starts to degrade (75% of any limit), a StandbyDriver is
+launched in a background thread. By the time recycling is due, the swap
+only exchanges references; the old browser is shut down in the background.
+
+Memory is read with psutil when it is installed, otherwise that check is
+skipped.
+"""
+
+import threading
+import statistics
+from collections import deque
+from instrumentation import count, span
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+WINDOW = 10
+LATENCY_FACTOR = 2.5
+MAX_ERROR_RATE = 0.5
+MAX_RSS_MB = 1500
+MAX_PAGES = 400
+WARN_FRACTION = 0.75
+
+
+def browser_rss_mb(driver):
+    """Resident memory of chromedriver's Chrome process tree in MB, or None"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class DriverHealth:
+    def __init__(self, window=WINDOW, latency_factor=LATENCY_FACTOR, max_error_rate=MAX_ERROR_RATE,
+                 max_rss_mb=MAX_RSS_MB, max_pages=MAX_PAGES):
+        self.window = window
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+
+        self.baseline = []                      # first `window` load times
+        self.recent = deque(maxlen=window)      # latest load times
+        self.outcomes = deque(maxlen=window)    # True = success, False = error
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def record_page(self, seconds):
+        """One completed page load"""
+        with self._lock:
+            self.pages += 1
+            if len(self.baseline) < self.window:
+                self.baseline.append(seconds)
+            self.recent.append(seconds)
+            self.outcomes.append(True)
+
+    def record_error(self):
+        """One failed browser operation"""
+        with self._lock:
+            self.outcomes.append(False)
+
+    def measures(self, driver=None):
+        """(name, value, limit) for every health signal"""
+        with self._lock:
+            measures = [('pages', self.pages, self.max_pages)]
+            if len(self.baseline) == self.window and len(self.recent) == self.window:
+                baseline = statistics.median(self.baseline)
+                measures.append(('latency', statistics.median(self.recent), baseline * self.latency_factor))
+            if len(self.outcomes) >= self.window // 2:
+                errors = sum(1 for ok in self.outcomes if not ok)
+                measures.append(('errors', errors / len(self.outcomes), self.max_error_rate))
+        if driver is not None:
+            rss = browser_rss_mb(driver)
+            if rss is not None:
+                measures.append(('memory', rss, self.max_rss_mb))
+        return measures
+
+    def status(self, driver=None):
+        """('ok' | 'degraded' | 'recycle', reason)"""
+        worst = ('ok', None)
+        for name, value, limit in self.measures(driver):
+            if value >= limit:
+                return 'recycle', f"{name} {value:.2f} >= {limit:.2f}"
+            if value >= limit * WARN_FRACTION:
+                worst = ('degraded', f"{name} {value:.2f} approaching {limit:.2f}")
+        return worst
+
+
+def health_of(driver):
+    """The DriverHealth attached by the driver factory (None for other drivers)"""
+    return getattr(driver, 'health', None)
+
+
+def retire_driver(driver):
+    """Quit a browser without making the caller wait for Chrome to shut down"""
+    if driver is None:
+        return
+
+    def quit_driver():
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    threading.Thread(target=quit_driver, name='driver-retire', daemon=True).start()
+
+
+class StandbyDriver:
+    """One browser launched in the background, ready to replace the current one"""
+
+    def __init__(self, launch):
+        self.launch = launch
+        self.driver = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def run_launch(self):
+        try:
+            with span('driver.launch'):
+                driver = self.launch()
+        except Exception as e:
+            print(f"⚠️ Standby browser failed to start: {e}")
+            driver = None
+        self.driver = driver
+
+    def prepare(self):
+        """Start launching a standby browser unless one is ready or on its way"""
+        with self._lock:
+            if self.driver is not None or (self.thread and self.thread.is_alive()):
+                return
+            self.thread = threading.Thread(target=self.run_launch, name='driver-standby', daemon=True)
+            self.thread.start()
+
+    def take(self):
+        """The standby browser (waiting for it if it is still starting), or a fresh one"""
+        with span('driver.swap_wait'):
+            with self._lock:
+                thread = self.thread
+            if thread is not None:
+                thread.join()
+            with self._lock:
+                driver, self.driver, self.thread = self.driver, None, None
+        if driver is None:
+            with span('driver.launch'):
+                driver = self.launch()
+        count('driver.swap')
+        return driver
+
+    def close(self):
+        """Shut down the standby browser, if any"""
+        with self._lock:
+            thread = self.thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            driver, self.driver, self.thread = self.driver, None, None
+        retire_driver(driver)
+
+
+def recycle_if_unhealthy(driver, standby):
+    """Warm the standby when the driver degrades and swap it in when recycling is due; returns the driver to use"""
+    health = health_of(driver)
+    if health is None:
+        return driver
+    status, reason = health.status(driver)
+    if status == 'degraded':
+        standby.prepare()
+    elif status == 'recycle':
+        print(f"♻️  Recycling browser ({reason})")
+        count(f"driver.recycle.{reason.split()[0]}")
+        new_driver = standby.take()
+        retire_driver(driver)
+        return new_driver
+    return driver
@@ -0,0 +1,170 @@
+"""
+Medication name normalization
+
+drug_key() is the one normalization every stage uses to compare names:
+"Aspirin", "aspirin ", "ASPIRIN 81 mg tablets" and "Aspirin®" share the key
+"aspirin". search_name() is the lighter clean-up the scrapers type into a
+site's search box.
+
+DrugIndex maps keys to a canonical display name (the first spelling seen),
+its aliases and its brand names, so dedup and cache lookups are dict hits.
+A brand resolves to its generic's key only when it belongs to exactly one
+generic (combination brands stay separate).
+
+Persisted data (caches, result store, pipeline state) is always keyed by
+the plain drug_key(), which does not depend on which brands a process has
+registered. Brands are resolved only when looking up (stored_key).
+"""
+
+import re
+import threading
+import unicodedata
+
+TRADEMARKS = re.compile(r'[®™©]')
+PARENTHETICAL = re.compile(r'\s*\([^)]*\)')
+# (?!\w) rather than \b: "%" is not a word character, so \b after it never matches before a space
+STRENGTH = re.compile(r'\s*\d+(?:[.,]\d+)?\s*(?:mg|mcg|µg|g|ml|iu|units?|%)(?!\w).*$')
+DOSAGE_FORM_SUFFIX = re.compile(
+    r'(?:\s+(?:oral|tablets?|capsules?|injections?|injectable|creams?|ointments?|gels?|liquids?|'
+    r'suspensions?|solutions?|syrups?|drops|patch(?:es)?|inhalers?|sprays?|er|xr|xl|sr|dr))+$'
+)
+ORAL_PREFIX = re.compile(r'^oral\s+')
+SEPARATORS = re.compile(r'[\s_]+')
+
+# Scraper search clean-up (kept as the scrapers had it)
+SEARCH_FORM_SUFFIX = re.compile(r'\s+(tablet|capsule|injection|cream|ointment|gel|liquid|suspension|er|xr|xl)s?$')
+SEARCH_STRENGTH = re.compile(r'\s+\d+\s*(mg|mcg|g|ml|iu).*$')
+SEARCH_ORAL = re.compile(r'\s+oral.*$')
+
+
+def drug_key(name):
+    """Canonical lookup key for a medication name ('' for blanks)
+
+    >>> drug_key('ASPIRIN 81 mg tablets')
+    'aspirin'
+    >>> drug_key('Hydrocortisone 1% cream')
+    'hydrocortisone'
+    >>> drug_key('Vitamin B12')
+    'vitamin b12'
+    """
+    if name is None:
+        return ''
+    key = unicodedata.normalize('NFKC', str(name))
+    key = TRADEMARKS.sub('', key).lower()
+    key = PARENTHETICAL.sub(' ', key)
+    key = SEPARATORS.sub(' ', key).strip()
+    if key == 'nan':
+        return ''
+
+    stripped = STRENGTH.sub('', key).strip()
+    stripped = ORAL_PREFIX.sub('', stripped)
+    stripped = DOSAGE_FORM_SUFFIX.sub('', stripped).strip()
+    # Never strip a name down to nothing ("Gel", "Oral solution")
+    return stripped or key
+
+
+def search_name(name):
+    """Name to type into a site search: lowercased, without strength, form or route"""
+    clean_name = SEARCH_FORM_SUFFIX.sub('', str(name).lower())
+    clean_name = SEARCH_STRENGTH.sub('', clean_name)
+    clean_name = SEARCH_ORAL.sub('', clean_name)
+    return clean_name.strip()
+
+
+def split_brands(brands):
+    """'Brand A | Brand B' (or a list) -> ['Brand A', 'Brand B'] without 'Not found' placeholders"""
+    if not brands:
+        return []
+    items = brands if isinstance(brands, (list, tuple, set)) else str(brands).split('|')
+    result = []
+    for brand in items:
+        brand = str(brand).strip()
+        if brand and brand.lower() not in ('not found', 'nan', 'none'):
+            result.append(brand)
+    return result
+
+
+class DrugIndex:
+    def __init__(self):
+        self.canonical_names = {}   # key -> display name
+        self.aliases = {}           # key -> set of spellings seen
+        self.brands = {}            # key -> set of brand names
+        self.generics_by_brand = {} # brand key -> set of generic keys
+        self._lock = threading.Lock()
+
+    def add(self, name, brands=None):
+        """Register a medication (and its brands); returns its canonical name"""
+        key = self.key_of(name)
+        if not key:
+            return None
+        with self._lock:
+            canonical = self.canonical_names.setdefault(key, str(name).strip())
+            self.aliases.setdefault(key, set()).add(str(name).strip())
+            for brand in split_brands(brands):
+                self.brands.setdefault(key, set()).add(brand)
+                self.generics_by_brand.setdefault(drug_key(brand), set()).add(key)
+        return canonical
+
+    def add_brands(self, brands_by_generic):
+        """Register {generic: 'Brand A | Brand B'} as in the enhanced brand database"""
+        for generic, brands in brands_by_generic.items():
+            self.add(generic, brands)
+
+    def key_of(self, name):
+        """Key of a medication, resolving a single-generic brand name to its generic"""
+        key = drug_key(name)
+        if key in self.canonical_names:
+            return key
+        generics = self.generics_by_brand.get(key)
+        if generics and len(generics) == 1:
+            return next(iter(generics))
+        return key
+
+    def stored_key(self, mapping, name):
+        """Key under which mapping (dict or set keyed by drug_key) holds name: its own key, else its generic's; None if absent"""
+        key = drug_key(name)
+        if key in mapping:
+            return key
+        resolved = self.key_of(name)
+        return resolved if resolved in mapping else None
+
+    def canonical(self, name):
+        """Display name registered for a medication, or the stripped input"""
+        return self.canonical_names.get(self.key_of(name), str(name).strip())
+
+    def brands_of(self, name):
+        """Known brand names of a medication"""
+        return sorted(self.brands.get(self.key_of(name), ()))
+
+    def __contains__(self, name):
+        return self.key_of(name) in self.canonical_names
+
+    def dedupe(self, names):
+        """Names with one entry per key, first spelling wins, in input order"""
+        seen = set()
+        unique = []
+        for name in names:
+            key = self.key_of(name)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(name)
+        return unique
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_drug_index():
+    """Process-wide index, seeded with the medication names in the result store (brands come from curated lists only)"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = DrugIndex()
+            try:
+                from result_store import get_result_store
+                for name in get_result_store().get_medications():
+                    _shared_index.add(name)
+            except Exception as e:
+                print(f"⚠️ Drug index starts empty, result store unavailable: {e}")
+    return _shared_index
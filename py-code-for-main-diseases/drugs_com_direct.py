@@ -0,0 +1,173 @@
+"""
+Direct drugs.com page fetcher
+
+Most drugs.com monographs live at predictable URLs:
+    https://www.drugs.com/<slug>.html
+    https://www.drugs.com/sfx/<slug>-side-effects.html
+
+Fetching them over a pooled HTTP session skips the browser search round trip.
+Callers fall back to the Selenium search flow when no candidate URL matches.
+Responses (including 404/410 misses) go through the shared page cache.
+"""
+
+import re
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from page_cache import get_page_cache
+from drug_names import drug_key
+from instrumentation import count, span
+
+DRUGS_COM_BASE = "https://www.drugs.com"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+# Salt and form words that drugs.com usually leaves out of the monograph slug
+SLUG_STOP_WORDS = [
+    'hydrochloride', 'hcl', 'sodium', 'potassium', 'calcium', 'magnesium',
+    'sulfate', 'sulphate', 'phosphate', 'acetate', 'citrate', 'maleate',
+    'succinate', 'tartrate', 'mesylate', 'besylate', 'fumarate', 'bromide',
+    'tablets', 'tablet', 'capsules', 'capsule', 'oral', 'injection', 'solution'
+]
+
+# Joining words of combination names ("amlodipine and benazepril")
+TITLE_FILLER_WORDS = ['and', 'with', 'for']
+
+
+def drug_slug(name):
+    """Convert a medication name to a drugs.com style slug"""
+    slug = str(name).lower().strip()
+    slug = re.sub(r'[()]', ' ', slug)
+    slug = re.sub(r'[^a-z0-9\s-]', ' ', slug)
+    slug = re.sub(r'\s+', '-', slug.strip())
+    return re.sub(r'-+', '-', slug).strip('-')
+
+
+def candidate_slugs(name):
+    """Return slugs to try for a medication, most specific first"""
+    candidates = []
+
+    full_slug = drug_slug(name)
+    if full_slug:
+        candidates.append(full_slug)
+
+    # Without salts/forms (e.g. "metformin hydrochloride" -> "metformin")
+    words = [w for w in full_slug.split('-') if w and w not in SLUG_STOP_WORDS]
+    if words:
+        stripped = '-'.join(words)
+        if stripped not in candidates:
+            candidates.append(stripped)
+        if words[0] not in candidates and len(words[0]) > 3:
+            candidates.append(words[0])
+
+    return candidates
+
+
+class DrugsComDirectFetcher:
+    def __init__(self, timeout=10, pool_size=10, page_cache=None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.page_cache = page_cache or get_page_cache()
+        # One pooled session per thread so parallel workers never share a connection
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Pooled keep-alive session for the current thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=1)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+        return session
+
+    def fetch(self, url):
+        """Fetch a URL and return its HTML, or None on any failure"""
+        # Check cache first (404/410 misses are cached too so reruns skip them)
+        cached = self.page_cache.lookup(url)
+        if cached:
+            status, body = cached
+            return body if status == 200 else None
+
+        try:
+            with span('fetch.drugs_com'):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            count('fetch.drugs_com.failure')
+            return None
+
+        # drugs.com redirects unknown monographs to search
+        if response.status_code != 200:
+            self.page_cache.put_miss(url, response.status_code)
+            return None
+        if '/search' in response.url or 'searchterm=' in response.url:
+            self.page_cache.put_miss(url, 404)
+            return None
+
+        self.page_cache.put(url, response.text)
+        return response.text
+
+    def page_matches(self, html, name):
+        """Check that the page title mentions every significant word of the medication name"""
+        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
+        if not title_match:
+            return False
+        title = title_match.group(1).lower()
+        # Strength and dosage form are dropped first; a combination needs all its ingredients
+        words = [
+            w for w in drug_slug(drug_key(name)).split('-')
+            if w not in SLUG_STOP_WORDS and w not in TITLE_FILLER_WORDS and len(w) > 2 and not w.isdigit()
+        ]
+        return bool(words) and all(word in title for word in words)
+
+    def record(self, found):
+        """Count a hit or a miss (called from several worker threads)"""
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def alias_for(self, kind, name):
+        """Page cache alias for a medication page found by any scraper"""
+        return f"drugs.com:{kind}:{name}"
+
+    def remember_page(self, kind, name, url, html):
+        """Store a page the browser found so later runs can skip the search"""
+        if url and html:
+            self.page_cache.put_page(self.alias_for(kind, name), url, html)
+
+    def fetch_first_match(self, name, url_template, kind):
+        """Try a previously found page, then each candidate slug with the given URL template"""
+        url, html = self.page_cache.get_by_alias(self.alias_for(kind, name))
+        if html:
+            self.record(True)
+            return url, html
+
+        for slug in candidate_slugs(name):
+            url = url_template.format(base=DRUGS_COM_BASE, slug=slug)
+            html = self.fetch(url)
+            if html and self.page_matches(html, name):
+                self.record(True)
+                self.page_cache.put_alias(self.alias_for(kind, name), url)
+                return url, html
+        self.record(False)
+        return None, None
+
+    def fetch_drug_page(self, name):
+        """Fetch the main drugs.com monograph for a medication"""
+        return self.fetch_first_match(name, "{base}/{slug}.html", 'main')
+
+    def fetch_side_effects_page(self, name):
+        """Fetch the drugs.com side effects page for a medication"""
+        return self.fetch_first_match(name, "{base}/sfx/{slug}-side-effects.html", 'sfx')
@@ -0,0 +1,155 @@
+"""
+Streaming Excel export
+
+Rebuilds a workbook with openpyxl's read-only and write-only modes: source
+rows are parsed and streamed to disk one at a time instead of being kept as
+a full in-memory cell graph and serialized by wb.save. Each distinct cell
+style is copied into the new workbook once and then reused. Values, cell styles, column widths, row
+heights, merged ranges, freeze panes and tab colors are copied from the
+source workbook; cell_values overrides individual cells on the way out.
+
+The output is written to a temporary file and renamed over the target, so
+an interrupted export never leaves a truncated workbook behind.
+"""
+
+import os
+from copy import copy
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.read_only import ReadOnlyCell
+from openpyxl.worksheet._reader import WorkSheetParser
+from instrumentation import timed
+
+
+class StyleCopier:
+    """Copies each distinct source style into the target workbook once"""
+
+    def __init__(self, source_ws, target_ws):
+        self.source_ws = source_ws
+        self.target_ws = target_ws
+        self.styles = {}    # source style id -> target StyleArray
+
+    def cell(self, row_idx, col_idx, value, style_id):
+        """Write-only cell with the value and the style of the source cell"""
+        cell = WriteOnlyCell(self.target_ws, value=value)
+        if style_id:
+            style = self.styles.get(style_id)
+            if style is None:
+                source_cell = ReadOnlyCell(self.source_ws, row_idx, col_idx, None, style_id=style_id)
+                cell.font = copy(source_cell.font)
+                cell.fill = copy(source_cell.fill)
+                cell.border = copy(source_cell.border)
+                cell.alignment = copy(source_cell.alignment)
+                cell.number_format = source_cell.number_format
+                cell.protection = copy(source_cell.protection)
+                style = self.styles[style_id] = copy(cell._style)
+            else:
+                cell._style = copy(style)
+        return cell
+
+
+def copy_sheet_layout(parser, target_ws):
+    """Copy column widths, freeze panes and tab color (parsed ahead of the first row)"""
+    for letter, attrs in parser.column_dimensions.items():
+        width = float(attrs['width']) if attrs.get('width') else None
+        hidden = attrs.get('hidden') in ('1', 'true')
+        if width or hidden:
+            dimension = target_ws.column_dimensions[letter]
+            dimension.width = width
+            dimension.hidden = hidden
+            dimension.min = int(attrs['min'])
+            dimension.max = int(attrs['max'])
+    views = getattr(parser, 'views', None)
+    pane = views.sheetView[0].pane if views is not None and views.sheetView else None
+    if pane is not None and pane.state == 'frozen' and pane.topLeftCell:
+        target_ws.freeze_panes = pane.topLeftCell
+    properties = getattr(parser, 'sheet_properties', None)
+    if properties is not None and properties.tabColor is not None:
+        target_ws.sheet_properties.tabColor = copy(properties.tabColor)
+
+
+def stream_sheet(source_ws, target_ws, overrides=None):
+    """Stream every row of a read-only source_ws into target_ws, applying {(row, col): value} overrides"""
+    overrides = overrides or {}
+    override_rows = {}
+    for (row_idx, col_idx), value in overrides.items():
+        override_rows.setdefault(row_idx, {})[col_idx] = value
+
+    styles = StyleCopier(source_ws, target_ws)
+    workbook = source_ws.parent
+    next_row = 1
+    laid_out = False
+
+    with source_ws._get_source() as source:
+        parser = WorkSheetParser(source, source_ws._shared_strings, data_only=workbook.data_only,
+                                 epoch=workbook.epoch, date_formats=workbook._date_formats,
+                                 timedelta_formats=workbook._timedelta_formats)
+
+        def write_row(row_idx, source_cells):
+            # Rows missing from the source XML are written empty
+            for _ in range(next_row, row_idx):
+                target_ws.append([])
+            dimension = parser.row_dimensions.get(str(row_idx))
+            if dimension and dimension.get('ht'):
+                target_ws.row_dimensions[row_idx].height = float(dimension['ht'])
+            row_overrides = override_rows.pop(row_idx, {})
+            by_column = {cell['column']: cell for cell in source_cells}
+            width = max(list(by_column) + list(row_overrides) + [0])
+            cells = []
+            for col_idx in range(1, width + 1):
+                source_cell = by_column.get(col_idx)
+                value = row_overrides.get(col_idx, source_cell['value'] if source_cell else None)
+                style_id = source_cell['style_id'] if source_cell else 0
+                if value is None and not style_id:
+                    cells.append(None)
+                else:
+                    cells.append(styles.cell(row_idx, col_idx, value, style_id))
+            target_ws.append(cells)
+            return row_idx + 1
+
+        for row_idx, source_cells in parser.parse():
+            if not laid_out:
+                # <cols>, <sheetViews> and <sheetPr> precede <sheetData>
+                copy_sheet_layout(parser, target_ws)
+                laid_out = True
+            next_row = write_row(row_idx, source_cells)
+
+        if not laid_out:
+            copy_sheet_layout(parser, target_ws)
+        # Overrides below the last source row
+        for row_idx in sorted(override_rows):
+            next_row = write_row(row_idx, [])
+
+        # <mergeCells> follows <sheetData>; write-only sheets emit merges on close
+        merged = getattr(parser, 'merged_cells', None)
+        if merged is not None:
+            for merged_range in merged.mergeCell:
+                target_ws.merged_cells.add(merged_range.ref)
+
+
+@timed('excel.export')
+def export_workbook(source_path, output_path=None, cell_values=None):
+    """
+    Stream source_path to output_path (default: in place) with cell overrides.
+    cell_values is {sheet title: {(row, col): value}}.
+    """
+    output_path = output_path or source_path
+    cell_values = cell_values or {}
+
+    # Read-only source: rows are parsed as they are written, never held as a cell graph
+    source_wb = load_workbook(source_path, read_only=True)
+    target_wb = Workbook(write_only=True)
+
+    for source_ws in source_wb.worksheets:
+        target_ws = target_wb.create_sheet(title=source_ws.title)
+        stream_sheet(source_ws, target_ws, cell_values.get(source_ws.title))
+
+    tmp_path = f'{output_path}.tmp{os.getpid()}.xlsx'
+    try:
+        target_wb.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        source_wb.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
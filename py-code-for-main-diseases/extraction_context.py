@@ -0,0 +1,78 @@
+"""
+Per-page extraction context
+
+Built once per downloaded page and handed to every extractor, so the page is
+lowercased once, section keywords are located once, and the DOM (lxml, with
+html.parser as fallback) is only built if an extractor actually asks for it.
+"""
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+class ExtractionContext:
+    def __init__(self, page_source):
+        self.html = page_source or ''
+        self.html_lower = self.html.lower()
+        self.offsets = {}
+        self._soup = None
+        self._text = None
+        self._text_lower = None
+
+    @classmethod
+    def of(cls, page):
+        """Return page unchanged if it is already a context, otherwise wrap it"""
+        if isinstance(page, cls):
+            return page
+        return cls(page)
+
+    def __bool__(self):
+        return bool(self.html)
+
+    @property
+    def soup(self):
+        """Parsed DOM, built on first use"""
+        if self._soup is None:
+            try:
+                self._soup = BeautifulSoup(self.html, HTML_PARSER)
+            except Exception:
+                self._soup = BeautifulSoup(self.html, 'html.parser')
+        return self._soup
+
+    @property
+    def text(self):
+        """Visible page text, one block per line"""
+        if self._text is None:
+            self._text = self.soup.get_text('\n')
+        return self._text
+
+    @property
+    def text_lower(self):
+        """Lowercased visible page text"""
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+
+    def contains(self, keyword):
+        """Case-insensitive check on the raw HTML (keyword must be lowercase)"""
+        return self.find(keyword) != -1
+
+    def find(self, keyword):
+        """Offset of the first occurrence of a lowercase keyword in the HTML, or -1"""
+        offset = self.offsets.get(keyword)
+        if offset is None:
+            offset = self.html_lower.find(keyword)
+            self.offsets[keyword] = offset
+        return offset
+
+    def section(self, keyword, length):
+        """Raw HTML starting at a section keyword, or None if the keyword is absent"""
+        start = self.find(keyword)
+        if start == -1:
+            return None
+        return self.html[start:start + length]
@@ -0,0 +1,400 @@
+"""
+Precompiled extraction patterns
+
+Every regex the medication extractors run is compiled once at import. Pattern
+lists that used to be looped with one re.findall per pattern are merged into a
+single alternation of named groups (PatternSet), so each text is scanned once
+and the matches are handed back grouped by the pattern that produced them.
+
+Where two patterns of a set would match the same characters, the earlier
+pattern wins (regex alternation is leftmost-first); every list below is
+ordered most specific first, so this only drops duplicate hits that the
+extractors deduplicated anyway.
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+
+def lowercase_pattern(pattern):
+    """Lowercase the literals of a regex, leaving escapes such as \\S or \\D alone"""
+    return re.sub(r'\\.|[A-Z]', lambda m: m.group(0) if len(m.group(0)) > 1 else m.group(0).lower(), pattern)
+
+
+def leading_chars(items):
+    """(chars, can_be_empty) for a parsed regex sequence; chars is None when any character could start a match"""
+    chars = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            chars.add(chr(av))
+            return chars, False
+        if op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.LITERAL:
+                    chars.add(chr(item_av))
+                elif item_op is sre_constants.RANGE and item_av[1] - item_av[0] < 256:
+                    chars.update(chr(c) for c in range(item_av[0], item_av[1] + 1))
+                elif item_op is sre_constants.CATEGORY and item_av is sre_constants.CATEGORY_DIGIT:
+                    chars.update('0123456789')
+                else:
+                    return None, False
+            return chars, False
+
+        if op is sre_constants.SUBPATTERN:
+            sub_chars, can_be_empty = leading_chars(av[-1])
+        elif op is sre_constants.BRANCH:
+            sub_chars, can_be_empty = set(), False
+            for branch in av[1]:
+                branch_chars, branch_empty = leading_chars(branch)
+                if branch_chars is None:
+                    return None, False
+                sub_chars |= branch_chars
+                can_be_empty = can_be_empty or branch_empty
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            sub_chars, can_be_empty = leading_chars(av[2])
+            can_be_empty = can_be_empty or av[0] == 0
+        elif op is sre_constants.AT:
+            continue
+        else:
+            return None, False
+
+        if sub_chars is None:
+            return None, False
+        chars |= sub_chars
+        if not can_be_empty:
+            return chars, False
+    return chars, True
+
+
+class PatternSet:
+    def __init__(self, patterns, flags=0):
+        self.patterns = list(patterns)
+        self.flags = flags
+        # Case-insensitive sets are matched case-sensitively against the
+        # lowercased text, which the re engine scans much faster
+        self.lowercase = bool(flags & re.IGNORECASE)
+
+        # Wrap each pattern in a named group and remember where its own
+        # first capture group lands in the combined regex
+        parts = []
+        self.alternatives = {}
+        group_index = 1
+        for i, pattern in enumerate(self.patterns):
+            inner_groups = re.compile(pattern, flags).groups
+            name = f'p{i}'
+            parts.append(f'(?P<{name}>{lowercase_pattern(pattern) if self.lowercase else pattern})')
+            self.alternatives[name] = (i, group_index + 1 if inner_groups else None)
+            group_index += 1 + inner_groups
+
+        alternation = '|'.join(parts)
+        scan_flags = flags & ~re.IGNORECASE if self.lowercase else flags
+
+        # Only try the alternation where one of the patterns could start
+        chars, can_be_empty = leading_chars(sre_parse.parse(alternation, scan_flags))
+        if chars and not can_be_empty:
+            lead = '[' + ''.join(re.escape(c) for c in sorted(chars)) + ']'
+            alternation = f'(?={lead})(?:{alternation})'
+
+        self.combined = re.compile(alternation, scan_flags)
+        # For text whose lowercase form changes length (rare Unicode cases)
+        self.fallback = re.compile('|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(self.patterns)), flags)
+
+    def matches_by_pattern(self, text):
+        """Scan once; return one list of matches per pattern, in pattern order.
+
+        Like re.findall, a match is the pattern's first capture group when it
+        has one, otherwise the whole match.
+        """
+        regex, scanned = self.combined, text
+        if self.lowercase:
+            scanned = text.lower()
+            if len(scanned) != len(text):
+                regex, scanned = self.fallback, text
+
+        buckets = [[] for _ in self.patterns]
+        for match in regex.finditer(scanned):
+            i, inner_group = self.alternatives[match.lastgroup]
+            # Slice the original text so captured values keep their case
+            start, end = match.span(inner_group or 0)
+            buckets[i].append(text[start:end] if start != -1 else '')
+        return buckets
+
+    def findall(self, text):
+        """All matches, ordered by pattern and then by position"""
+        return [value for bucket in self.matches_by_pattern(text) for value in bucket]
+
+    def first_matches(self, text):
+        """First match of each pattern that matched (like one re.search per pattern)"""
+        return [bucket[0] for bucket in self.matches_by_pattern(text) if bucket]
+
+
+# Brand names -------------------------------------------------------------
+
+# Row/list patterns are bounded by the next <tr>/<ul> tag; the old
+# '<tr[^>]*>.*?Brand.*?</tr>' rescanned to the end of the line from every
+# <tr>, which goes quadratic on minified table markup.
+BRAND_TABLE_ROW = r'<tr[^>]*>(?:(?!</?tr\b).)*?Brand(?:(?!</?tr\b).)*?</tr>'
+BRAND_LIST = r'<ul[^>]*>(?:(?!</?ul\b).)*?Brand(?:(?!</?ul\b).)*?</ul>'
+
+BRAND_EXTRACTION_PATTERNS = [re.compile(p) for p in [
+    r'Brand name[s]?:\s*([^,\n\r]+)',
+    r'Brand:\s*([^,\n\r]+)',
+    r'<strong>Brand name[s]?:</strong>\s*([^<]+)',
+    r'<td[^>]*>Brand name[s]?:</td>\s*<td[^>]*>([^<]+)</td>',
+    r'<span[^>]*>Brand name[s]?:</span>\s*([^<]+)',
+    r'<div[^>]*>Brand name[s]?:</div>\s*([^<]+)',
+    r'Also known as:\s*([^,\n\r]+)',
+    r'Alternative names?:\s*([^,\n\r]+)',
+    r'Common brands?:\s*([^,\n\r]+)',
+    r'Brand names?:\s*([^,\n\r]+)',
+    r'Available as:\s*([^,\n\r]+)',
+    r'Marketed as:\s*([^,\n\r]+)',
+    r'Sold as:\s*([^,\n\r]+)',
+    r'Known as:\s*([^,\n\r]+)',
+    r'Proprietary name[s]?:\s*([^,\n\r]+)',
+    r'Trade name[s]?:\s*([^,\n\r]+)',
+    r'<h[1-6][^>]*>([^<]*?(?:brand|Brand)[^<]*)</h[1-6]>',
+    r'<div[^>]*class="[^"]*brand[^"]*"[^>]*>([^<]+)</div>',
+    r'<span[^>]*class="[^"]*brand[^"]*"[^>]*>([^<]+)</span>',
+    BRAND_TABLE_ROW,
+    r'<td[^>]*>Brand</td>\s*<td[^>]*>([^<]+)</td>',
+    r'<li[^>]*>([^<]*?(?:brand|Brand)[^<]*)</li>',
+    BRAND_LIST,
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:tablet|capsule|pill|injection|cream|ointment)',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:mg|mcg|g|ml|IU)',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:oral|topical|inhalation)',
+]]
+
+BRAND_NAMES_SECTION = re.compile(r'Brand Names.*?(?=<h[1-6]|</div>|$)', re.IGNORECASE | re.DOTALL)
+
+BRAND_SECTION_PATTERNS = PatternSet([
+    r'Brand name[s]?:\s*([^<\n]+?)(?:\n|$|<)',
+    r'Brand name[s]?:\s*([^<\n]+?)(?:\s*[,;]|\s*$|\s*\.|\s*<)',
+], re.IGNORECASE | re.MULTILINE)
+
+# Bulleted "• Brand (Manufacturer, Country)" entries inside the Brand Names section
+BULLETED_BRAND_PATTERNS = PatternSet([
+    r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)\s*\([^)]*\)',
+    r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)(?:\s*$|\s*<)',
+    r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)(?:\s*\(|\s*<)',
+], re.MULTILINE)
+
+INVALID_BRAND_PATTERNS = re.compile('|'.join(f'(?:{p})' for p in [
+    r'^names?:\s*$',
+    r'^\.\.\.\s*\+\d+\s*more$',
+    r'^[a-z]+\s+[a-z]+$',
+    r'^\d+',
+    r'^[^A-Z]',
+    r'[()]',
+    r'^\s*$',
+    r'^[^a-zA-Z]*$',
+    r'^[a-z]+$',
+    r'^[A-Z][a-z]*\s+[a-z]+$',
+    r'^[A-Z][a-z]*-[a-z]+-[a-z]+$',
+    r'^[A-Z]{2,}-[A-Z]{2,}$',
+]), re.IGNORECASE)
+
+BRAND_NAME_SHAPE = re.compile(r'^[A-Z][a-zA-Z\s\-&]+$')
+BRAND_WORD_SHAPE = re.compile(r'^[A-Za-z\-]+$')
+
+# Dosage forms ------------------------------------------------------------
+
+DOSAGE_FORM_PATTERNS = PatternSet([
+    # Oral forms
+    r'(?:oral\s+)?(?:tablet|pill|capsule|liquid|suspension|syrup|solution|powder|granule)',
+    r'(?:chewable|disintegrating|extended\s+release|effervescent|compounding)',
+    r'(?:oral\s+)?(?:tablet|pill|capsule)(?:\s+extended\s+release)?',
+    r'(?:oral\s+)?(?:liquid|suspension|syrup|solution)',
+    r'(?:oral\s+)?(?:powder|granule|effervescent)',
+    r'(?:oral\s+)?(?:drops|spray|lozenge|gum)',
+
+    # Injection forms
+    r'(?:injection|injectable|subcutaneous|intramuscular|intravenous)',
+    r'(?:intravenous\s+solution|subcutaneous\s+injection|intramuscular\s+injection)',
+    r'(?:prefilled\s+syringe|auto\s+injector|pen\s+injector)',
+
+    # Inhalation forms
+    r'(?:inhalation|inhaler|aerosol|nebulizer|powder\s+inhaler|metered\s+dose\s+inhaler)',
+    r'(?:dry\s+powder\s+inhaler|soft\s+mist\s+inhaler)',
+
+    # Topical forms
+    r'(?:topical|cream|ointment|gel|patch|lotion|foam|spray|shampoo)',
+    r'(?:transdermal|dermal|cutaneous)',
+
+    # Other forms
+    r'(?:rectal\s+suppository|ophthalmic|otic|intranasal|nasal\s+spray)',
+    r'(?:vaginal|buccal|sublingual|intrauterine)',
+    r'(?:ophthalmic\s+drops|ophthalmic\s+ointment|ophthalmic\s+gel)',
+    r'(?:otic\s+drops|otic\s+suspension)',
+
+    # Generic patterns
+    r'(?:tablet|capsule|pill|liquid|suspension|syrup|solution|powder|granule)',
+    r'(?:injection|inhalation|topical|rectal|ophthalmic|otic|nasal)',
+    r'(?:drops|spray|lozenge|gum|suppository|implant|device)'
+], re.IGNORECASE)
+
+DOSAGE_AVAILABILITY_PATTERNS = PatternSet([
+    r'Available as:\s*([^,\n\r]+)',
+    r'Form[s]?:\s*([^,\n\r]+)',
+    r'Presentation[s]?:\s*([^,\n\r]+)',
+    r'How supplied:\s*([^,\n\r]+)',
+    r'Product forms?:\s*([^,\n\r]+)'
+], re.IGNORECASE)
+
+# How to take -------------------------------------------------------------
+
+HOW_TO_TAKE_PATTERNS = PatternSet([
+    r'(?:take|use)\s+(?:with|without)\s+(?:food|meals)',
+    r'(?:take|use)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+    r'(?:with|without)\s+(?:food|meals)',
+    r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+    r'(?:take|use)\s+(?:with|without)\s+(?:water)',
+    r'(?:with|without)\s+(?:water)',
+    r'(?:with\s+)?(?:a\s+)?(?:full\s+)?(?:glass\s+of\s+water)',
+    r'swallow\s+(?:the\s+)?(?:tablet|capsule)\s+(?:whole|with\s+water)',
+    r'swallow\s+(?:whole|with\s+water|with\s+food)',
+    r'(?:take|use)\s+(?:orally|by\s+mouth)',
+    r'(?:oral|injection|inhalation|topical)\s+(?:administration|use)',
+    r'how\s+to\s+(?:take|use):\s*([^,\n]+)',
+    r'instructions:\s*([^,\n]+)',
+    r'directions:\s*([^,\n]+)'
+], re.IGNORECASE)
+
+INJECTION_CONTEXT = re.compile(r'(?:take|use|administer|given)\s+(?:by\s+)?injection')
+
+ALL_HOW_TO_TAKE_PATTERNS = PatternSet([
+    # Food-related instructions
+    r'(?:take|use|administer)\s+(?:with|without)\s+(?:food|meals)',
+    r'(?:take|use|administer)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+    r'(?:with|without)\s+(?:food|meals)',
+    r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+
+    # Water and liquid instructions
+    r'(?:take|use)\s+(?:with|without)\s+(?:water|liquid)',
+    r'(?:with|without)\s+(?:water|liquid)',
+    r'(?:with\s+)?(?:a\s+)?(?:full\s+)?(?:glass\s+of\s+water)',
+
+    # Swallowing instructions
+    r'swallow\s+(?:the\s+)?(?:tablet|capsule|pill)\s+(?:whole|with\s+water|with\s+food)',
+    r'swallow\s+(?:whole|with\s+water|with\s+food)',
+    r'(?:chew|crush|break)\s+(?:the\s+)?(?:tablet)',
+
+    # Administration route instructions
+    r'(?:take|use)\s+(?:orally|by\s+mouth|sublingually|buccally)',
+    r'(?:oral|injection|inhalation|topical|sublingual|buccal)\s+(?:administration|use)',
+
+    # Specific instruction patterns
+    r'how\s+to\s+(?:take|use):\s*([^,\n\r]+)',
+    r'instructions:\s*([^,\n\r]+)',
+    r'directions:\s*([^,\n\r]+)',
+    r'administration:\s*([^,\n\r]+)',
+
+    # Dosage form specific instructions
+    r'(?:tablet|capsule|pill)\s+(?:should\s+be\s+)?(?:swallowed|chewed|crushed)',
+    r'(?:liquid|suspension|syrup)\s+(?:should\s+be\s+)?(?:shaken|measured)',
+    r'(?:inhaler|aerosol)\s+(?:should\s+be\s+)?(?:primed|shaken)',
+    r'(?:cream|ointment|gel)\s+(?:should\s+be\s+)?(?:applied|rubbed)',
+
+    # Timing instructions
+    r'(?:take|use)\s+(?:at\s+)?(?:the\s+same\s+time|regular\s+intervals)',
+    r'(?:take|use)\s+(?:before|after|during)\s+(?:meals|food)',
+    r'(?:take|use)\s+(?:in\s+the\s+)?(?:morning|evening|bedtime)'
+], re.IGNORECASE)
+
+INSTRUCTION_SECTION_PATTERNS = PatternSet([
+    r'Available as:\s*([^,\n\r]+)',
+    r'Form[s]?:\s*([^,\n\r]+)',
+    r'Administration:\s*([^,\n\r]+)',
+    r'Instructions:\s*([^,\n\r]+)'
+], re.IGNORECASE)
+
+FOOD_INSTRUCTION_PATTERNS = PatternSet([
+    r'(?:take|use|administer)\s+(?:with|without)\s+(?:food|meals)',
+    r'(?:take|use|administer)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+    r'(?:with|without)\s+(?:food|meals)',
+    r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
+    r'(?:take|use)\s+(?:before|after|during)\s+(?:meals|food)'
+], re.IGNORECASE)
+
+# When to take ------------------------------------------------------------
+
+WHEN_TO_TAKE_PATTERNS = PatternSet([
+    # Frequency patterns
+    r'(?:take|use|administer|give)\s+(?:every\s+)?(\d+\s+(?:hours?|days?|weeks?|months?))',
+    r'(?:take|use|administer|give)\s+(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:daily|per\s+day|a\s+day)',
+    r'(?:take|use|administer|give)\s+(\d+)\s+times?\s+(?:daily|per\s+day|a\s+day)',
+    r'(?:take|use|administer|give)\s+(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:every\s+\d+\s+(?:hours?|days?))',
+
+    # Time of day patterns
+    r'(?:take|use|administer|give)\s+(?:in\s+)?(?:the\s+)?(?:morning|afternoon|evening|night|bedtime|at\s+bedtime)',
+    r'(?:take|use|administer|give)\s+(?:with\s+)?(?:breakfast|lunch|dinner|meals|food)',
+    r'(?:take|use|administer|give)\s+(?:before\s+)?(?:bed|sleep|going\s+to\s+bed)',
+    r'(?:take|use|administer|give)\s+(?:on\s+an?\s+)?(?:empty\s+stomach|full\s+stomach)',
+    r'(?:take|use|administer|give)\s+(?:at\s+)?(?:(\d{1,2}):(\d{2})\s*(?:AM|PM|am|pm)?)',
+    r'(?:take|use|administer|give)\s+(?:at\s+)?(?:(\d{1,2})\s*(?:AM|PM|am|pm))',
+
+    # As needed patterns
+    r'(?:take|use|administer|give)\s+(?:as\s+)?(?:needed|required|necessary|prn)',
+    r'(?:take|use|administer|give)\s+(?:when\s+)?(?:needed|required|necessary)',
+    r'(?:take|use|administer|give)\s+(?:for\s+)?(?:pain|symptoms|discomfort)',
+
+    # Specific timing patterns
+    r'(?:take|use|administer|give)\s+(?:at\s+)?(?:the\s+)?(?:same\s+time\s+every\s+day)',
+    r'(?:take|use|administer|give)\s+(?:at\s+)?(?:regular\s+intervals)',
+    r'(?:take|use|administer|give)\s+(?:continuously|around\s+the\s+clock)',
+
+    # Duration patterns
+    r'(?:take|use|administer|give)\s+(?:for\s+)?(\d+\s+(?:days?|weeks?|months?|years?))',
+    r'(?:take|use|administer|give)\s+(?:until\s+)?(?:symptoms\s+improve|pain\s+relief)',
+
+    # Simple frequency patterns (standalone)
+    r'(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:daily|per\s+day|a\s+day)',
+    r'(\d+)\s+times?\s+(?:daily|per\s+day|a\s+day)',
+    r'(?:every\s+\d+\s+(?:hours?|days?|weeks?|months?))',
+    r'(?:morning|afternoon|evening|night|bedtime)',
+    r'(?:daily|regularly|continuously)',
+
+    # With/without food patterns
+    r'(?:with\s+food|without\s+food|on\s+an?\s+empty\s+stomach|on\s+a\s+full\s+stomach)',
+
+    # Before/after patterns
+    r'(?:before|after)\s+(?:meals|eating|food|breakfast|lunch|dinner)',
+    r'(?:before|after)\s+(?:bedtime|sleep|going\s+to\s+bed)',
+
+    # Specific conditions
+    r'(?:when\s+)?(?:pain\s+occurs|symptoms\s+appear|needed\s+for\s+pain)',
+    r'(?:as\s+directed\s+by\s+your\s+doctor|as\s+prescribed)',
+
+    # Time-specific patterns
+    r'(?:at\s+)?(?:(\d{1,2}):(\d{2})\s*(?:AM|PM|am|pm)?)',
+    r'(?:at\s+)?(?:(\d{1,2})\s*(?:AM|PM|am|pm))',
+    r'(?:every\s+(\d+)\s+to\s+(\d+)\s+hours?)',
+    r'(?:every\s+(\d+)\s+to\s+(\d+)\s+days?)'
+], re.IGNORECASE)
+
+# Text cleanup ------------------------------------------------------------
+
+HTML_TAG = re.compile(r'<[^>]+>')
+
+HTML_ENTITIES = {'&quot;': '', '&amp;': '&', '&lt;': '<', '&gt;': '>', '&nbsp;': ' '}
+HTML_ENTITY = re.compile('|'.join(re.escape(entity) for entity in HTML_ENTITIES))
+
+# Leftover JavaScript fragments from drugs.com pages
+SCRIPT_NOISE = re.compile(
+    r'window\.\w+|get\s*\(\s*\)|function\s*\([^)]*\)|var\s+\w+|console\.\w+'
+)
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def clean_markup(text):
+    """Strip tags, decode the common entities and drop script noise in four passes"""
+    text = HTML_TAG.sub('', text)
+    text = HTML_ENTITY.sub(lambda m: HTML_ENTITIES[m.group(0)], text)
+    text = SCRIPT_NOISE.sub('', text)
+    return WHITESPACE.sub(' ', text).strip()
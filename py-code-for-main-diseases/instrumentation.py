@@ -0,0 +1,210 @@
+"""
+Run instrumentation
+
+Spans (context managers or the @timed decorator) record how long each
+fetch, parse, LLM, cache and Excel step takes; counters record cache
+hits/misses, retries and processed items. At the end of a run a report
+with count, total, p50/p95/max latency and items/minute per stage, cache
+hit rates and counters is written to run_reports/<run>_<timestamp>.json
+and .csv.
+
+Stage names are dotted: fetch.*, parse.*, llm.*, excel.*, item.*.
+Counters named <cache>.hit / <cache>.miss are turned into hit rates.
+
+Usage:
+    from instrumentation import span, count, timed, start_run
+
+    start_run('medication_scraper')       # report written at exit
+    with span('fetch.drugs_com'):
+        ...
+    count('llm.retry')
+"""
+
+import os
+import csv
+import json
+import math
+import time
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_reports')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Metrics:
+    def __init__(self, run_name='run'):
+        self.run_name = run_name
+        self.started_at = time.time()
+        self.samples = {}    # stage -> [seconds]
+        self.counters = {}   # counter -> int
+        self.report_paths = None
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add one latency sample to a stage"""
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def count(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block as one sample of stage `name`; failures also count `<name>.error`"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count(f'{name}.error')
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of span()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stage_rows(self):
+        """Per-stage latency summary, slowest total first"""
+        elapsed_minutes = max(time.time() - self.started_at, 1e-9) / 60
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        rows = []
+        for name, values in samples.items():
+            total = sum(values)
+            rows.append({
+                'stage': name,
+                'count': len(values),
+                'total_s': round(total, 3),
+                'mean_ms': round(total / len(values) * 1000, 1),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(values, 0.95) * 1000, 1),
+                'max_ms': round(values[-1] * 1000, 1),
+                'items_per_minute': round(len(values) / elapsed_minutes, 2),
+                'errors': self.counters.get(f'{name}.error', 0),
+            })
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def hit_rates(self):
+        """{cache: {hits, misses, hit_rate}} from <cache>.hit / <cache>.miss counters"""
+        with self._lock:
+            counters = dict(self.counters)
+        caches = {name.rsplit('.', 1)[0] for name in counters if name.endswith(('.hit', '.miss'))}
+        rates = {}
+        for cache in sorted(caches):
+            hits = counters.get(f'{cache}.hit', 0)
+            misses = counters.get(f'{cache}.miss', 0)
+            rates[cache] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses) * 100, 1) if hits + misses else 0.0}
+        return rates
+
+    def report(self):
+        """Everything recorded so far as one dict"""
+        with self._lock:
+            counters = dict(sorted(self.counters.items()))
+        return {
+            'run': self.run_name,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'wall_time_s': round(time.time() - self.started_at, 3),
+            'stages': self.stage_rows(),
+            'cache_hit_rates': self.hit_rates(),
+            'counters': counters,
+        }
+
+    def write_report(self, directory=REPORT_DIR):
+        """Write the JSON report and a CSV of the stage table; returns (json path, csv path)"""
+        report = self.report()
+        if not report['stages'] and not report['counters']:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{self.run_name}_{datetime.fromtimestamp(self.started_at).strftime('%Y%m%d_%H%M%S')}")
+
+        with open(f'{base}.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        fields = ['stage', 'count', 'total_s', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'items_per_minute', 'errors']
+        with open(f'{base}.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(report['stages'])
+
+        self.report_paths = (f'{base}.json', f'{base}.csv')
+        return self.report_paths
+
+    def print_summary(self, limit=8):
+        """Short table of the slowest stages"""
+        rows = self.stage_rows()[:limit]
+        if not rows:
+            return
+        print(f"\n⏱️  Slowest stages ({self.run_name}, {time.time() - self.started_at:.0f}s wall):")
+        for row in rows:
+            print(f"   {row['stage']:<28} {row['count']:>6}x  total {row['total_s']:>8.1f}s  p50 {row['p50_ms']:>8.0f}ms  p95 {row['p95_ms']:>8.0f}ms  max {row['max_ms']:>8.0f}ms")
+        for cache, rate in self.hit_rates().items():
+            print(f"   {cache:<28} {rate['hit_rate']:>5.1f}% hit rate ({rate['hits']} hits, {rate['misses']} misses)")
+
+
+_metrics = Metrics()
+_report_registered = False
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Process-wide metrics shared by every module"""
+    return _metrics
+
+
+def span(name):
+    return _metrics.span(name)
+
+
+def timed(name):
+    return _metrics.timed(name)
+
+
+def count(name, amount=1):
+    _metrics.count(name, amount)
+
+
+def finish_run():
+    """Print the summary and write the report (runs once, at exit)"""
+    if _metrics.report_paths:
+        return _metrics.report_paths
+    _metrics.print_summary()
+    try:
+        paths = _metrics.write_report()
+    except OSError as e:
+        print(f"⚠️ Could not write timing report: {e}")
+        return None
+    if paths:
+        print(f"📈 Timing report: {paths[0]}")
+    return paths
+
+
+def start_run(name):
+    """Name the run, restart the clock and write the report when the process exits"""
+    global _report_registered
+    with _metrics_lock:
+        _metrics.run_name = name
+        _metrics.started_at = time.time()
+        if not _report_registered:
+            atexit.register(finish_run)
+            _report_registered = True
+    return _metrics
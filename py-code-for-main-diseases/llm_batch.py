@@ -0,0 +1,108 @@
+"""
+Batched multi-medication LLM prompts
+
+Packs the pruned page text of several medications into one prompt that asks
+for a JSON object keyed by item id, then splits the answer back per
+medication. Callers fall back to single-item prompts when a batch answer
+cannot be parsed.
+"""
+
+import re
+import json
+from llm_dispatcher import get_llm_dispatcher
+
+
+def prune_page_text(text, keywords=None, max_chars=3000, context_lines=2):
+    """Drop blank/duplicate lines and keep the parts of a page around the keywords"""
+    lines = []
+    seen = set()
+    for line in str(text).split('\n'):
+        line = re.sub(r'\s+', ' ', line).strip()
+        if not line or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+
+    if keywords:
+        keep = set()
+        for i, line in enumerate(lines):
+            line_lower = line.lower()
+            if any(keyword in line_lower for keyword in keywords):
+                keep.update(range(i, min(i + context_lines + 1, len(lines))))
+        # Pages without any keyword are sent as-is (truncated)
+        if keep:
+            lines = [lines[i] for i in sorted(keep)]
+
+    return '\n'.join(lines)[:max_chars]
+
+
+def build_batch_prompt(instructions, items):
+    """Build one prompt covering several (item_id, name, content) items"""
+    sections = []
+    for item_id, name, content in items:
+        sections.append(f"=== ITEM {item_id}: {name} ===\n{content}\n=== END ITEM {item_id} ===")
+
+    ids = ', '.join(f'"{item_id}"' for item_id, _, _ in items)
+    return f"""{instructions}
+
+You will receive {len(items)} separate webpages, one per medication, each between ITEM markers.
+Apply the instructions to each item independently.
+
+Respond with ONLY a JSON object (no markdown, no commentary) whose keys are the item ids ({ids})
+and whose values are the answer string for that item.
+
+{chr(10).join(sections)}
+"""
+
+
+def parse_batch_response(response_text, item_ids):
+    """Return {item_id: answer} if every item was answered, otherwise None"""
+    if not response_text:
+        return None
+
+    text = response_text.strip()
+    # Strip ```json fences the model sometimes adds anyway
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    answers = {}
+    for item_id in item_ids:
+        value = data.get(str(item_id))
+        if not isinstance(value, str) or not value.strip():
+            return None
+        answers[item_id] = value.strip()
+    return answers
+
+
+def run_batch_prompt(model, instructions, pages):
+    """Send one prompt for {name: page_text}; returns {name: answer} or None"""
+    items = []
+    names_by_id = {}
+    for i, (name, content) in enumerate(pages.items(), 1):
+        item_id = str(i)
+        names_by_id[item_id] = name
+        items.append((item_id, name, content))
+
+    try:
+        # Cached, rate limited and retried by the shared dispatcher
+        response_text = get_llm_dispatcher().generate(model, build_batch_prompt(instructions, items))
+    except Exception as e:
+        print(f"⚠️ Batch LLM request failed: {e}")
+        return None
+
+    answers = parse_batch_response(response_text, list(names_by_id))
+    if answers is None:
+        return None
+    return {names_by_id[item_id]: answer for item_id, answer in answers.items()}
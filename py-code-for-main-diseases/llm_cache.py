@@ -0,0 +1,127 @@
+"""
+Persistent LLM response cache
+
+Responses are keyed by model name plus a hash of the normalized prompt
+(whitespace collapsed), so a byte-identical or re-indented prompt from a
+previous run is answered from disk without an API call.
+
+Layout:
+    llm_cache/<2 hex chars>/<sha256>.json   {model, prompt_hash, response, created_at}
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from instrumentation import count, span
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'llm_cache')
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so indentation changes do not bust the cache"""
+    return re.sub(r'\s+', ' ', str(prompt)).strip()
+
+
+def model_name_of(model):
+    """Name of a google.generativeai model (e.g. 'models/gemini-1.5-flash')"""
+    return getattr(model, 'model_name', None) or type(model).__name__
+
+
+class LLMCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, model_name, prompt):
+        """Hash of model name plus normalized prompt"""
+        payload = model_name + '\n' + normalize_prompt(prompt)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        """File holding a cache entry"""
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, model_name, prompt):
+        """Return the cached response text, or None"""
+        path = self.path_for(self.key_for(model_name, prompt))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with self._lock:
+                self.hits += 1
+            count('llm_cache.hit')
+            return entry['response']
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            count('llm_cache.miss')
+            return None
+
+    def put(self, model_name, prompt, response_text):
+        """Store the raw response text for a prompt"""
+        key = self.key_for(model_name, prompt)
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'model': model_name,
+            'prompt_hash': key,
+            'response': response_text,
+            'created_at': time.time()
+        }
+        tmp_path = f'{path}.tmp{os.getpid()}.{threading.get_ident()}'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write LLM cache entry: {e}")
+
+    def stats(self):
+        """Hit/miss counters for reporting"""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': rate}
+
+    def summary(self):
+        """One-line summary of the counters"""
+        stats = self.stats()
+        return f"LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1f}% hit rate)"
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache instance shared by all LLM call sites"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache()
+    return _shared_cache
+
+
+def cached_generate(model, prompt, cache=None):
+    """model.generate_content(prompt).text, answered from the cache when possible"""
+    cache = cache or get_llm_cache()
+    model_name = model_name_of(model)
+
+    # Check cache first
+    text = cache.get(model_name, prompt)
+    if text is not None:
+        return text
+
+    with span('llm.call'):
+        response = model.generate_content(prompt)
+    text = response.text
+
+    # Only successful, non-empty answers are worth replaying
+    if text:
+        cache.put(model_name, prompt, text)
+    return text
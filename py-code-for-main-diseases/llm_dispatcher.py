@@ -0,0 +1,168 @@
+"""
+Async LLM dispatcher
+
+Runs Gemini requests on a background asyncio loop so scrapers can submit a
+prompt and keep fetching the next drug while earlier calls finish.
+
+- Token bucket rate limiter (requests per minute)
+- Configurable max in-flight requests
+- Retry with jittered exponential backoff on rate limits, timeouts, connection
+  and server errors; anything else (bad request, auth, safety block) fails at once
+- Answers from the LLM response cache skip the rate limiter entirely
+
+Configuration (environment variables, optional):
+    LLM_REQUESTS_PER_MINUTE   default 30
+    LLM_MAX_IN_FLIGHT         default 4
+    LLM_MAX_RETRIES           default 4
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from llm_cache import get_llm_cache, model_name_of
+from instrumentation import count, span
+
+# Rate limits, timeouts, connection drops and 5xx are worth another try
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = (TimeoutError, ConnectionError, asyncio.TimeoutError)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    TRANSIENT_ERRORS += (
+        google_exceptions.TooManyRequests,      # includes ResourceExhausted
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,       # includes DeadlineExceeded
+    )
+except ImportError:
+    google_exceptions = None
+
+
+def is_transient(error):
+    """True for errors a retry can fix (rate limit, timeout, connection, server error)"""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    return isinstance(code, int) and code in TRANSIENT_STATUS_CODES
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LLMDispatcher:
+    def __init__(self, requests_per_minute=30, max_in_flight=4, max_retries=4, base_delay=2.0, cache=None):
+        self.requests_per_minute = requests_per_minute
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.cache = cache or get_llm_cache()
+
+        self.requests_sent = 0
+        self.retries = 0
+        self.failures = 0
+
+        # Dedicated event loop thread; callers stay synchronous
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-dispatcher", daemon=True)
+        self.thread.start()
+
+        self.bucket = TokenBucket(requests_per_minute / 60.0, max(1, min(max_in_flight, requests_per_minute)))
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+
+    def call_model(self, model, prompt):
+        """Blocking Gemini call; runs in a worker thread"""
+        with span('llm.call'):
+            text = model.generate_content(prompt).text
+        if text:
+            self.cache.put(model_name_of(model), prompt, text)
+        return text
+
+    async def run_job(self, model, prompt):
+        """Answer from cache, or call the model under the rate limit with retries"""
+        # Check cache first
+        cached = self.cache.get(model_name_of(model), prompt)
+        if cached is not None:
+            return cached
+
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                try:
+                    self.requests_sent += 1
+                    return await asyncio.to_thread(self.call_model, model, prompt)
+                except Exception as e:
+                    if attempt == self.max_retries or not is_transient(e):
+                        self.failures += 1
+                        count('llm.failure')
+                        raise
+                    self.retries += 1
+                    count('llm.retry')
+                    # Full jitter keeps parallel retries from hitting the API together
+                    delay = self.base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    print(f"    ⚠️ LLM request failed ({e}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                    await asyncio.sleep(delay)
+
+    async def run_and_parse(self, model, prompt, parse, fallback):
+        """run_job plus parsing; errors go to fallback when one is given"""
+        try:
+            text = await self.run_job(model, prompt)
+            return parse(text) if parse else text
+        except Exception as e:
+            if fallback is None:
+                raise
+            return fallback(e)
+
+    def submit(self, model, prompt, parse=None, fallback=None):
+        """Queue a prompt; returns a concurrent.futures.Future with the (parsed) answer"""
+        return asyncio.run_coroutine_threadsafe(self.run_and_parse(model, prompt, parse, fallback), self.loop)
+
+    def generate(self, model, prompt):
+        """Blocking helper: rate-limited, retried model.generate_content(prompt).text"""
+        return self.submit(model, prompt).result()
+
+    def summary(self):
+        """One-line summary of dispatcher activity"""
+        return f"LLM dispatcher: {self.requests_sent} requests, {self.retries} retries, {self.failures} failures"
+
+    def shutdown(self):
+        """Stop the background loop"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+_shared_dispatcher = None
+_shared_dispatcher_lock = threading.Lock()
+
+
+def get_llm_dispatcher():
+    """Process-wide dispatcher so all call sites share one rate limit"""
+    global _shared_dispatcher
+    with _shared_dispatcher_lock:
+        if _shared_dispatcher is None:
+            _shared_dispatcher = LLMDispatcher(
+                requests_per_minute=float(os.getenv('LLM_REQUESTS_PER_MINUTE', '30')),
+                max_in_flight=int(os.getenv('LLM_MAX_IN_FLIGHT', '4')),
+                max_retries=int(os.getenv('LLM_MAX_RETRIES', '4'))
+            )
+    return _shared_dispatcher
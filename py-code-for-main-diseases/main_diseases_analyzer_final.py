@@ -11,6 +11,12 @@ from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import google.generativeai as genai
 from google.generativeai import GenerativeModel
+from llm_cache import get_llm_cache
+from llm_dispatcher import get_llm_dispatcher
+from result_store import get_result_store
+from drug_names import get_drug_index
+from instrumentation import span, start_run
+from concurrent.futures import Future
 
 # Load environment variables
 load_dotenv('/Users/juanlu/Documents/Wye/scrapper/.env')
@@ -195,19 +201,21 @@ def get_comprehensive_medications_for_disease(disease_name, mayo_medications):
     
     return unique_medications
 
-def enhance_medications_with_llm(medications_text, disease_name):
-    """Enhance existing medications with LLM to add simple generic drug names only"""
+def submit_medication_enhancement(medications_text, disease_name):
+    """Queue the LLM enhancement for a disease; returns a Future with the enhanced text"""
     
     if not model:
-        return medications_text  # Return original if no LLM available
+        # Return original if no LLM available
+        future = Future()
+        future.set_result(medications_text)
+        return future
     
-    try:
-        # Parse existing medications
-        existing_meds = [med.strip() for med in medications_text.split(';') if med.strip()] if medications_text else []
-        
-        print(f"   🤖 Enhancing {len(existing_meds)} existing medications for {disease_name}")
-        
-        prompt = f"""
+    # Parse existing medications
+    existing_meds = [med.strip() for med in medications_text.split(';') if med.strip()] if medications_text else []
+    
+    print(f"   🤖 Enhancing {len(existing_meds)} existing medications for {disease_name}")
+    
+    prompt = f"""
 You are a pharmaceutical expert. I need you to provide a comprehensive list of GENERIC DRUG NAMES (active ingredients) for treating "{disease_name}".
 
 EXISTING MEDICATIONS (keep all):
@@ -241,62 +249,75 @@ Format as semicolon-separated list of SIMPLE GENERIC DRUG NAMES only.
 GENERIC DRUG NAMES:
 """
 
-        result = model.generate_content(prompt)
-        response = result.text.strip()
-        
-        # Extract medications from response
-        if ":" in response:
-            response = response.split(":", 1)[1].strip()
-        
-        # Clean and split
-        raw_medications = [med.strip() for med in response.split(';') if med.strip()]
-        
-        # Clean each medication name to be simple
-        cleaned_medications = []
-        for med in raw_medications:
-            # Remove formatting symbols
-            med = re.sub(r'\*+', '', med)  # Remove asterisks
-            med = re.sub(r'\(.*?\)', '', med)  # Remove parentheses and content
-            med = re.sub(r'\[.*?\]', '', med)  # Remove brackets and content
-            med = re.sub(r'["""]', '', med)  # Remove quotes
-            med = re.sub(r'[-–—].*', '', med)  # Remove dashes and everything after
-            med = re.sub(r'\s+', ' ', med).strip()  # Clean whitespace
-            
-            # Convert to lowercase for consistency
-            med = med.lower()
-            
-            # Filter out non-drug terms and ensure it's a simple drug name
-            if (len(med) > 2 and 
-                (med.isalpha() or (len(med.split()) == 1 and med.replace('-', '').isalpha())) and
-                not med.startswith(('note', 'generic', 'drug', 'medication', 'treatment')) and
-                not med.endswith(('therapy', 'treatment', 'drugs', 'medications')) and
-                med not in ['etc', 'others', 'various', 'including', 'such', 'as', 'and', 'or']):
-                cleaned_medications.append(med)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_medications = []
-        for med in cleaned_medications:
-            if med not in seen:
-                seen.add(med)
-                unique_medications.append(med)
-        
-        enhanced_text = '; '.join(unique_medications)
-        print(f"   ✅ Enhanced from {len(existing_meds)} to {len(unique_medications)} simple generic drugs")
-        
-        # Add delay to be respectful to API
-        time.sleep(1.5)
-        
-        return enhanced_text
-        
-    except Exception as e:
+    def enhancement_failed(e):
         print(f"   ❌ LLM enhancement failed for {disease_name}: {e}")
         return medications_text  # Return original on error
+    
+    # Rate limiting and retries are handled by the dispatcher (no fixed sleep needed)
+    return get_llm_dispatcher().submit(
+        model,
+        prompt,
+        parse=lambda response: parse_enhanced_medications(response, existing_meds),
+        fallback=enhancement_failed
+    )
 
-def create_main_diseases_analysis_v3():
+def parse_enhanced_medications(response, existing_meds):
+    """Turn the LLM answer into a semicolon-separated list of simple generic names"""
+    response = response.strip()
+    
+    # Extract medications from response
+    if ":" in response:
+        response = response.split(":", 1)[1].strip()
+    
+    # Clean and split
+    raw_medications = [med.strip() for med in response.split(';') if med.strip()]
+    
+    # Clean each medication name to be simple
+    cleaned_medications = []
+    for med in raw_medications:
+        # Remove formatting symbols
+        med = re.sub(r'\*+', '', med)  # Remove asterisks
+        med = re.sub(r'\(.*?\)', '', med)  # Remove parentheses and content
+        med = re.sub(r'\[.*?\]', '', med)  # Remove brackets and content
+        med = re.sub(r'["""]', '', med)  # Remove quotes
+        med = re.sub(r'[-–—].*', '', med)  # Remove dashes and everything after
+        med = re.sub(r'\s+', ' ', med).strip()  # Clean whitespace
+        
+        # Convert to lowercase for consistency
+        med = med.lower()
+        
+        # Filter out non-drug terms and ensure it's a simple drug name
+        if (len(med) > 2 and 
+            (med.isalpha() or (len(med.split()) == 1 and med.replace('-', '').isalpha())) and
+            not med.startswith(('note', 'generic', 'drug', 'medication', 'treatment')) and
+            not med.endswith(('therapy', 'treatment', 'drugs', 'medications')) and
+            med not in ['etc', 'others', 'various', 'including', 'such', 'as', 'and', 'or']):
+            cleaned_medications.append(med)
+    
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_medications = []
+    for med in cleaned_medications:
+        if med not in seen:
+            seen.add(med)
+            unique_medications.append(med)
+    
+    enhanced_text = '; '.join(unique_medications)
+    print(f"   ✅ Enhanced from {len(existing_meds)} to {len(unique_medications)} simple generic drugs")
+    
+    return enhanced_text
+
+def enhance_medications_with_llm(medications_text, disease_name):
+    """Enhance existing medications with LLM to add simple generic drug names only"""
+    return submit_medication_enhancement(medications_text, disease_name).result()
+
+def create_main_diseases_analysis_v3(changed_diseases=None):
     """
     Create an Excel file with comprehensive analysis of main diseases from final_diseases_complete.csv
     Each disease gets its own sheet with structured data and enhanced medication information
+    
+    With changed_diseases (a set of Disease_Name_English values), only those diseases are
+    re-enhanced; the others reuse the medication lists stored by the previous run.
     """
     
     # Target diseases to extract (use exact names from CSV)
@@ -357,6 +378,12 @@ def create_main_diseases_analysis_v3():
             continue
         processed_diseases.add(disease_name)
         
+        # Record the source row in the result store
+        try:
+            get_result_store().put_disease(disease_name, {key: (None if pd.isna(value) else str(value)) for key, value in disease_row.items()})
+        except Exception as e:
+            print(f"⚠️ Could not store {disease_name}: {e}")
+        
         # Create sheet name (remove special characters)
         sheet_name = disease_name.replace('(', '').replace(')', '').replace('/', '-')[:31]
         ws = wb.create_sheet(title=sheet_name)
@@ -383,12 +410,14 @@ def create_main_diseases_analysis_v3():
     update_summary_sheet(summary_ws, created_sheets)
     
     # Create the unique medications sheet with enhanced medications
-    create_unique_medications_sheet_enhanced(wb, df, target_diseases)
+    create_unique_medications_sheet_enhanced(wb, df, target_diseases, changed_diseases)
     
     # Save the workbook
     output_path = '../Analysis/main_diseases_analysis_final.xlsx'
-    wb.save(output_path)
+    with span('excel.save'):
+        wb.save(output_path)
     print(f"\nAnalysis saved to: {output_path}")
+    print(f"🤖 {get_llm_cache().summary()}")
     
     return output_path
 
@@ -654,7 +683,7 @@ def setup_disease_sheet_v3(ws, disease_row, disease_name):
     ws.column_dimensions['E'].width = 15
     ws.column_dimensions['F'].width = 15
 
-def create_unique_medications_sheet_enhanced(wb, df, target_diseases):
+def create_unique_medications_sheet_enhanced(wb, df, target_diseases, changed_diseases=None):
     """
     Create enhanced sheet with all unique medications from main diseases, with LLM enhancements
     """
@@ -705,6 +734,9 @@ def create_unique_medications_sheet_enhanced(wb, df, target_diseases):
     all_medications = set()
     medication_to_diseases = {}
     
+    # First pass: queue one LLM enhancement per disease so the requests run concurrently
+    enhancement_jobs = []
+    
     for disease in target_diseases:
         # Find matching rows for each disease
         if disease == 'Heart disease':
@@ -725,19 +757,43 @@ def create_unique_medications_sheet_enhanced(wb, df, target_diseases):
             disease_name = disease_row['Disease_Name_English']
             original_medications = disease_row['Medications_Drugs'] if pd.notna(disease_row['Medications_Drugs']) else ''
             
+            # Unchanged diseases keep the enhanced list stored by the previous run
+            if changed_diseases is not None and disease_name not in changed_diseases:
+                stored_medications = get_result_store().get_disease_medications(disease_name)
+                if stored_medications:
+                    print(f"   ♻️  Reusing {len(stored_medications)} stored medications for {disease_name}")
+                    stored_job = Future()
+                    stored_job.set_result('; '.join(stored_medications))
+                    enhancement_jobs.append((disease_name, stored_job))
+                    continue
+            
             # Get enhanced medications for this disease
-            enhanced_medications = enhance_medications_with_llm(original_medications, disease_name)
+            enhancement_jobs.append((disease_name, submit_medication_enhancement(original_medications, disease_name)))
+    
+    # Second pass: collect the answers in disease order
+    drug_index = get_drug_index()
+    for disease_name, enhancement_job in enhancement_jobs:
+        enhanced_medications = enhancement_job.result()
+        print(f"   ✅ Enhancement ready for {disease_name}")
+        
+        if enhanced_medications:
+            # Split medications and add to set
+            med_list = [med.strip() for med in enhanced_medications.split(';') if med.strip()]
+            # Collapse spellings of one drug ("Aspirin", "aspirin ") onto its canonical name
+            med_list = drug_index.dedupe(drug_index.add(med) for med in med_list)
+            all_medications.update(med_list)
             
-            if enhanced_medications:
-                # Split medications and add to set
-                med_list = [med.strip() for med in enhanced_medications.split(';') if med.strip()]
-                all_medications.update(med_list)
-                
-                # Track disease associations for each medication
-                for medication in med_list:
-                    if medication not in medication_to_diseases:
-                        medication_to_diseases[medication] = []
-                    medication_to_diseases[medication].append(disease_name)
+            # Track disease associations for each medication
+            for medication in med_list:
+                if medication not in medication_to_diseases:
+                    medication_to_diseases[medication] = []
+                medication_to_diseases[medication].append(disease_name)
+            
+            # Record the associations so the scrapers can query them directly
+            try:
+                get_result_store().put_disease_medications(disease_name, med_list)
+            except Exception as e:
+                print(f"   ⚠️ Could not store medications for {disease_name}: {e}")
     
     # Sort medications alphabetically
     sorted_medications = sorted(list(all_medications))
@@ -970,6 +1026,7 @@ def create_unique_medications_sheet(wb, df, target_diseases):
     print(f"✓ Created 'All Unique Medications' sheet with {len(sorted_medications)} unique medications")
 
 if __name__ == "__main__":
+    start_run('disease_analysis')
     print("Creating Main Diseases Analysis with Comprehensive Medications...")
     print("🤖 This will enhance existing medications with comprehensive AI-powered coverage")
     output_file = create_main_diseases_analysis_v3()
@@ -3,61 +3,57 @@ import os
 import glob
 from datetime import datetime
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, WebDriverException
 import re
-from bs4 import BeautifulSoup
-import json
 import sys
-from tqdm import tqdm
+import threading
+import queue
 import colorama
-from colorama import Fore, Back, Style
+from colorama import Fore, Style
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
+from drugs_com_direct import DrugsComDirectFetcher
+from extraction_context import ExtractionContext
+import extraction_patterns as patterns
+from brand_matcher import BrandIndex
+from result_store import get_result_store
+from cache_journal import CacheJournal
+from drug_names import drug_key, get_drug_index, search_name
+from dom_snapshot import snapshot_anchors, anchor_element
+from page_waits import wait_for_ready, wait_for_navigation
+from driver_factory import create_chrome_driver
+from driver_health import StandbyDriver, health_of, recycle_if_unhealthy, retire_driver
+import sheet_loader
+from instrumentation import count, span, timed, start_run
 
 colorama.init(autoreset=True)
 
 class MedicationScraper:
-    def __init__(self):
+    def __init__(self, workers=1):
+        # Each worker thread owns its own Chrome instance
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.workers = max(1, int(workers))
         self.driver = None
         self.existing_data = {}
-        self.cache_file = "scraping_cache.json"
+        self.cache_file = "scraping_cache.jsonl"
+        self.cache_journal = CacheJournal(self.cache_file)
+        self.result_store = get_result_store()
         self.batch_size = 10
+        # Fetch drugs.com/<slug>.html over HTTP before falling back to the browser search
+        self.use_direct_fetch = True
+        self.direct_fetcher = DrugsComDirectFetcher()
         self.enhanced_brand_database = self.load_enhanced_brand_database()
         
-        self.brand_extraction_patterns = [
-                    r'Brand name[s]?:\s*([^,\n\r]+)',
-        r'Brand:\s*([^,\n\r]+)',
-        r'<strong>Brand name[s]?:</strong>\s*([^<]+)',
-        r'<td[^>]*>Brand name[s]?:</td>\s*<td[^>]*>([^<]+)</td>',
-        r'<span[^>]*>Brand name[s]?:</span>\s*([^<]+)',
-        r'<div[^>]*>Brand name[s]?:</div>\s*([^<]+)',
-        r'Also known as:\s*([^,\n\r]+)',
-        r'Alternative names?:\s*([^,\n\r]+)',
-        r'Common brands?:\s*([^,\n\r]+)',
-        r'Brand names?:\s*([^,\n\r]+)',
-        r'Available as:\s*([^,\n\r]+)',
-        r'Marketed as:\s*([^,\n\r]+)',
-        r'Sold as:\s*([^,\n\r]+)',
-        r'Known as:\s*([^,\n\r]+)',
-        r'Proprietary name[s]?:\s*([^,\n\r]+)',
-        r'Trade name[s]?:\s*([^,\n\r]+)',
-        r'<h[1-6][^>]*>([^<]*?(?:brand|Brand)[^<]*)</h[1-6]>',
-        r'<div[^>]*class="[^"]*brand[^"]*"[^>]*>([^<]+)</div>',
-        r'<span[^>]*class="[^"]*brand[^"]*"[^>]*>([^<]+)</span>',
-        r'<tr[^>]*>.*?Brand.*?</tr>',
-        r'<td[^>]*>Brand</td>\s*<td[^>]*>([^<]+)</td>',
-        r'<li[^>]*>([^<]*?(?:brand|Brand)[^<]*)</li>',
-        r'<ul[^>]*>.*?Brand.*?</ul>',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:tablet|capsule|pill|injection|cream|ointment)',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:mg|mcg|g|ml|IU)',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:oral|topical|inhalation)',
-        ]
+        # One normalization for dedup, cache keys and store lookups; brands resolve to their generic
+        self.drug_index = get_drug_index()
+        self.drug_index.add_brands(self.enhanced_brand_database)
+        
+        # Compiled once in extraction_patterns
+        self.brand_extraction_patterns = patterns.BRAND_EXTRACTION_PATTERNS
         
         # Comprehensive brand database
         self.comprehensive_brands = {
@@ -114,6 +110,9 @@ class MedicationScraper:
         self.all_brands = []
         for category, brands in self.comprehensive_brands.items():
             self.all_brands.extend(brands)
+        
+        # Brand -> category/generic lookups and one-pass page matching
+        self.brand_index = BrandIndex(self.comprehensive_brands, self.enhanced_brand_database)
     
     def print_header(self, title, subtitle=""):
         """Print a styled header with modern visual design"""
@@ -219,32 +218,46 @@ class MedicationScraper:
         print(f"{quality_color}{quality_emoji} Overall Data Quality: {quality_score:.1f}%{Style.RESET_ALL}")
         print(f"{Fore.MAGENTA}{'═'*70}{Style.RESET_ALL}")
     
+    @property
+    def driver(self):
+        """Chrome driver owned by the current worker thread"""
+        return getattr(self._local, 'driver', None)
+    
+    @driver.setter
+    def driver(self, value):
+        self._local.driver = value
+    
+    @property
+    def standby(self):
+        """Replacement browser for the current worker thread, launched in the background"""
+        standby = getattr(self._local, 'standby', None)
+        if standby is None:
+            standby = self._local.standby = StandbyDriver(self.new_driver)
+        return standby
+    
     def setup_driver(self):
-        chrome_options = Options()
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument('--disable-popup-blocking')
-        chrome_options.add_argument('--disable-notifications')
-        chrome_options.add_argument('--disable-images')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-plugins')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--disable-features=VizDisplayCompositor')
-        chrome_options.add_argument('--timeout=15000')
-        chrome_options.add_argument('--page-load-strategy=eager')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--remote-debugging-port=9222')
-        chrome_options.add_argument('--disable-css')
-        chrome_options.add_argument('--disable-javascript')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.set_page_load_timeout(15)
-        self.driver.set_script_timeout(15)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        self.driver = self.new_driver()
+    
+    def new_driver(self):
+        # Images, fonts, ads and trackers are blocked by the factory (Chrome ignores --disable-images/css/javascript)
+        extra_arguments = [
+            '--disable-popup-blocking',
+            '--disable-notifications',
+            '--disable-extensions',
+            '--disable-plugins',
+            '--disable-gpu',
+            '--disable-web-security',
+            '--disable-features=VizDisplayCompositor',
+            '--window-size=1920,1080',
+        ]
+        if self.workers == 1:
+            # A fixed debugging port would clash between parallel browsers
+            extra_arguments.append('--remote-debugging-port=9222')
+        
+        driver = create_chrome_driver('drugs.com', extra_arguments=extra_arguments)
+        driver.set_page_load_timeout(15)
+        driver.set_script_timeout(15)
+        return driver
     
     def is_driver_working(self):
         try:
@@ -259,22 +272,71 @@ class MedicationScraper:
         return True
         
     def restart_driver(self):
+        # Swap in the standby browser; the old one shuts down in the background
+        old_driver, self.driver = self.driver, None
+        retire_driver(old_driver)
+        self.driver = self.standby.take()
+    
+    def recycle_driver_if_unhealthy(self):
+        """Replace the browser only when its health calls for it; False if no browser could be started"""
+        if not self.driver:
+            return True
+        try:
+            self.driver = recycle_if_unhealthy(self.driver, self.standby)
+            return True
+        except Exception as e:
+            self.print_warning(f"Error recycling driver: {e}")
+            return self.recover_driver()
+    
+    def note_driver_error(self):
+        """Count a failed browser operation towards the driver's error rate"""
+        health = health_of(self.driver)
+        if health:
+            health.record_error()
+    
+    def recover_driver(self):
+        """Restart the driver, retrying a couple of times before giving up"""
+        try:
+            self.restart_driver()
+            return True
+        except Exception as e:
+            self.print_warning(f"Error restarting driver: {e}")
+            self.print_info("Attempting automatic restart...")
+        
         try:
             if self.driver:
                 self.driver.quit()
         except:
             pass
         time.sleep(3)
-        self.setup_driver()
+        try:
+            self.setup_driver()
+            return True
+        except Exception as e2:
+            self.print_error(f"Critical error setting up driver: {e2}")
+            self.print_info("Trying one more time...")
+        
+        time.sleep(5)
+        try:
+            self.setup_driver()
+            return True
+        except Exception as e3:
+            self.print_error(f"Final error setting up driver: {e3}")
+            return False
     
     def load_cache(self):
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        try:
+            entries = self.cache_journal.load()
+            cache = {}
+            for name, value in entries.items():
+                cache.setdefault(drug_key(name), value)
+            # Entries keyed by name are rewritten under their drug key once, so saves do not add them again
+            if cache.keys() != entries.keys():
+                self.cache_journal.replace(cache)
+            return cache
+        except Exception as e:
+            self.print_warning(f"Could not load cache: {e}")
+            return {}
     
     def load_enhanced_brand_database(self):
         """Load comprehensive brand database with all brand names for 189+ medications"""
@@ -490,39 +552,45 @@ class MedicationScraper:
         }
     
     def save_cache(self, cache_data):
-        with open(self.cache_file, 'w') as f:
-            json.dump(cache_data, f)
+        # Only new or changed medications are appended to the journal
+        self.cache_journal.save(cache_data)
     
     def load_existing_data(self):
         self.print_section("LOADING EXISTING DATA")
         
         pattern = "medication_*.xlsx"
         files = glob.glob(pattern)
+        files.sort(key=os.path.getmtime, reverse=True)
+        latest_file = files[0] if files else None
+        
+        # The result store is the system of record; the Excel file is only the export target
+        try:
+            if self.result_store.medication_count():
+                existing_data = self.result_store.get_medications()
+                self.print_success(f"Loaded {len(existing_data)} existing medications from {self.result_store.db_path}")
+                return existing_data, latest_file
+        except Exception as e:
+            self.print_warning(f"Result store unavailable, falling back to Excel: {e}")
         
         if not files:
             self.print_warning("No existing medication files found")
             self.print_info("A new Excel file will be created")
             return {}, None
         
-        files.sort(key=os.path.getmtime, reverse=True)
-        latest_file = files[0]
         self.print_success(f"Most recent file found: {latest_file}")
         
         try:
-            df = pd.read_excel(latest_file)
-            existing_data = {}
-            
-            for _, row in df.iterrows():
-                medication_name = str(row['Medication Name']).strip()
-                if pd.notna(medication_name) and medication_name != 'nan':
-                    existing_data[medication_name] = {
-                        'brand_name': str(row['Brand Names']) if pd.notna(row['Brand Names']) else 'Not found',
-                        'dosage': str(row['Dosage Forms']) if pd.notna(row['Dosage Forms']) else 'Not found',
-                        'how_to_take': str(row['How to Take']) if pd.notna(row['How to Take']) else 'Not found',
-                        'when_to_take': str(row['When to Take']) if pd.notna(row['When to Take']) else 'Not found'
-                    }
+            existing_data = sheet_loader.medication_records(sheet_loader.load_medication_table(latest_file))
             
             self.print_success(f"Loaded {len(existing_data)} existing medications")
+            
+            # Import once so later runs read from the result store
+            try:
+                self.result_store.upsert_medications(existing_data, source=os.path.basename(latest_file))
+                self.print_info(f"Imported {len(existing_data)} medications into {self.result_store.db_path}")
+            except Exception as e:
+                self.print_warning(f"Could not import into result store: {e}")
+            
             return existing_data, latest_file
             
         except Exception as e:
@@ -533,21 +601,29 @@ class MedicationScraper:
         """Get disease associations for medications from the main diseases Excel"""
         self.print_section("LOADING DISEASE ASSOCIATIONS")
         
+        # Associations recorded by the analyzer
         try:
-            # Read the main diseases analysis file
-            xl_file = pd.ExcelFile('../Analysis/main_diseases_analysis_final.xlsx')
+            stored_associations = self.result_store.get_disease_associations()
+            if stored_associations:
+                self.print_success(f"Loaded {len(stored_associations)} disease associations from result store")
+                return stored_associations
+        except Exception as e:
+            self.print_warning(f"Result store unavailable, reading Excel: {e}")
+        
+        try:
+            # Every sheet of the main diseases analysis file, parsed once per process
+            sheets = sheet_loader.read_workbook('../Analysis/main_diseases_analysis_final.xlsx')
             medication_to_diseases = {}
             
             # Look for the "All Unique Medications" sheet
             target_sheet = None
-            for sheet_name in xl_file.sheet_names:
+            for sheet_name in sheets:
                 if 'all unique medications' in sheet_name.lower():
                     target_sheet = sheet_name
                     break
             
             if target_sheet:
                 self.print_info(f"Found medications sheet: {target_sheet}")
-                sheet_df = pd.read_excel('../Analysis/main_diseases_analysis_final.xlsx', sheet_name=target_sheet)
                 
                 # The columns are unnamed, so we use indices:
                 # Column 0: Medication Name
@@ -555,18 +631,11 @@ class MedicationScraper:
                 
                 self.print_success(f"Reading from columns: 0 (medication) and 5 (disease tag)")
                 
-                for _, row in sheet_df.iterrows():
-                    medication = str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else ''
-                    disease_tag = str(row.iloc[5]).strip() if pd.notna(row.iloc[5]) else ''
-                    
-                    # Skip header rows and invalid entries
-                    if (medication and 
-                        medication != 'nan' and 
-                        medication.upper() not in ['MEDICATION NAME', 'INFORMATION', 'PURPOSE:', 'SOURCE:', 'ENHANCEMENT:'] and
-                        len(medication) > 2 and
-                        disease_tag and
-                        disease_tag != 'nan'):
-                        medication_to_diseases[medication] = disease_tag
+                # Skip header rows and invalid entries
+                medication_to_diseases = sheet_loader.disease_tags_from_unique_sheet(
+                    sheets[target_sheet],
+                    ['MEDICATION NAME', 'INFORMATION', 'PURPOSE:', 'SOURCE:', 'ENHANCEMENT:']
+                )
                 
                 self.print_success(f"Loaded {len(medication_to_diseases)} disease associations from {target_sheet}")
                 return medication_to_diseases
@@ -585,28 +654,23 @@ class MedicationScraper:
                 # Clean disease name for sheet matching
                 clean_disease = disease.replace('(', '').replace(')', '').replace('/', '-')[:31]
                 
-                if clean_disease in xl_file.sheet_names:
+                if clean_disease in sheets:
                     self.print_info(f"Processing disease sheet: {clean_disease}")
-                    disease_df = pd.read_excel('../Analysis/main_diseases_analysis_final.xlsx', sheet_name=clean_disease)
                     
-                    # Look for medication names in the first column
-                    for _, row in disease_df.iterrows():
-                        medication = str(row.iloc[0]).strip() if len(row) > 0 else ''
-                        
-                        # Check if this looks like a medication name (not a header or empty)
-                        if (medication and 
-                            medication != 'nan' and 
-                            medication.upper() not in ['MEDICATION NAME', 'DISEASE INFORMATION', 'DIAGNOSIS', 'TREATMENTS', 'DIAGNOSTIC TESTS', 'MEDICATIONS & DRUGS'] and
-                            len(medication) > 2 and
-                            not medication.startswith('Total medications')):
-                            
-                            if medication not in medication_to_diseases:
-                                medication_to_diseases[medication] = disease
-                            else:
-                                # If medication already exists, append disease
-                                existing = medication_to_diseases[medication]
-                                if disease not in existing:
-                                    medication_to_diseases[medication] = f"{existing}; {disease}"
+                    # Medication names in the first column (not headers or empty)
+                    medications = sheet_loader.medications_from_disease_sheet(
+                        sheets[clean_disease],
+                        ['MEDICATION NAME', 'DISEASE INFORMATION', 'DIAGNOSIS', 'TREATMENTS', 'DIAGNOSTIC TESTS', 'MEDICATIONS & DRUGS']
+                    )
+                    
+                    for medication in medications:
+                        if medication not in medication_to_diseases:
+                            medication_to_diseases[medication] = disease
+                        else:
+                            # If medication already exists, append disease
+                            existing = medication_to_diseases[medication]
+                            if disease not in existing:
+                                medication_to_diseases[medication] = f"{existing}; {disease}"
             
             self.print_success(f"Loaded {len(medication_to_diseases)} disease associations from individual sheets")
             return medication_to_diseases
@@ -619,7 +683,12 @@ class MedicationScraper:
         self.print_section("READING MEDICATIONS FROM ORIGINAL EXCEL")
         
         try:
-            df = pd.read_excel('../Analysis/main_diseases_analysis_final.xlsx')
+            # All sheets from the parsed workbook; each frame looks like pd.read_excel(path, sheet_name=...)
+            sheets = {
+                name: sheet_loader.with_first_row_as_header(raw)
+                for name, raw in sheet_loader.read_workbook('../Analysis/main_diseases_analysis_final.xlsx').items()
+            }
+            df = next(iter(sheets.values()))
             
             self.print_info(f"Available columns: {list(df.columns)}")
             
@@ -633,11 +702,9 @@ class MedicationScraper:
             
             if medication_column is None:
                 self.print_info("Searching in all Excel sheets...")
-                xl_file = pd.ExcelFile('../Analysis/main_diseases_analysis_final.xlsx')
                 
-                for sheet_name in xl_file.sheet_names:
+                for sheet_name, sheet_df in sheets.items():
                     self.print_info(f"Checking sheet: {sheet_name}")
-                    sheet_df = pd.read_excel('../Analysis/main_diseases_analysis_final.xlsx', sheet_name=sheet_name)
                     
                     for col in sheet_df.columns:
                         col_str = str(col).lower()
@@ -655,11 +722,7 @@ class MedicationScraper:
             
             self.print_info(f"Selected column: {medication_column}")
             
-            medications = []
-            for _, row in df.iterrows():
-                medication = str(row[medication_column]).strip()
-                if pd.notna(medication) and medication != 'nan':
-                    medications.append(medication)
+            medications = sheet_loader.column_values(df, medication_column)
             
             self.print_success(f"Total medications in original Excel: {len(medications)}")
             return medications
@@ -688,12 +751,24 @@ class MedicationScraper:
             if is_valid and len(medication.strip()) > 2:
                 valid_original_medications.append(medication)
         
+        # "Aspirin", "aspirin " and "Aspirin 81 mg" are one medication
+        valid_original_medications = self.drug_index.dedupe(valid_original_medications)
         self.print_success(f"Valid medications from original: {len(valid_original_medications)}")
         
-        missing_medications = []
-        for medication in valid_original_medications:
-            if medication not in self.existing_data:
-                missing_medications.append(medication)
+        existing_keys = {self.drug_index.key_of(name) for name in self.existing_data}
+        
+        # Indexed lookup by drug key; in-memory check if the store is unavailable
+        try:
+            missing_medications = [
+                medication for medication in self.result_store.missing_medications(valid_original_medications)
+                if self.drug_index.key_of(medication) not in existing_keys
+            ]
+        except Exception as e:
+            self.print_warning(f"Result store unavailable: {e}")
+            missing_medications = []
+            for medication in valid_original_medications:
+                if self.drug_index.key_of(medication) not in existing_keys:
+                    missing_medications.append(medication)
         
         self.print_info(f"Missing medications: {len(missing_medications)}")
         self.print_success(f"Already existing medications: {len(valid_original_medications) - len(missing_medications)}")
@@ -707,64 +782,71 @@ class MedicationScraper:
         
         return missing_medications
     
+    def link_selector_rank(self, anchor):
+        """Position of the first search-result selector an anchor matches, or None"""
+        attr = anchor['attr']
+        checks = [
+            '/drugs/' in attr,
+            '/drug/' in attr,
+            '/medication/' in attr,
+            '/drugs.com/' in attr,
+            'search-results' in anchor['containers'],
+            'drug-results' in anchor['containers'],
+            'drugs.com' in attr,
+            'drug-link' in anchor['containers'],
+            'result-item' in anchor['containers'],
+        ]
+        for rank, matched in enumerate(checks):
+            if matched:
+                return rank
+        return None
+    
     def find_medication_link(self, medication_name):
         try:
-            time.sleep(2)
+            wait_for_ready(self.driver, 5)
             
-            clean_name = medication_name.lower().strip()
+            clean_name = search_name(medication_name)
             clean_name_no_spaces = clean_name.replace(' ', '')
             
-            selectors = [
-                "a[href*='/drugs/']",
-                "a[href*='/drug/']", 
-                "a[href*='/medication/']",
-                "a[href*='/drugs.com/']",
-                ".search-results a",
-                ".drug-results a",
-                "a[href*='drugs.com']",
-                ".drug-link a",
-                ".result-item a",
-                "a[href*='/drugs/']"
-            ]
+            exclude_terms = ['side effects', 'español', 'spanish', 'interactions', 'pregnancy', 'breastfeeding', 'overdose']
             
-            for selector in selectors:
-                try:
-                    links = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    for link in links:
-                        try:
-                            link_text = link.text.lower().strip()
-                            href = link.get_attribute('href').lower()
-                            
-                            if (clean_name in link_text or 
-                                clean_name in href or
-                                clean_name_no_spaces in href or
-                                any(word in link_text for word in clean_name.split() if len(word) > 2)):
-                                
-                                exclude_terms = ['side effects', 'español', 'spanish', 'interactions', 'pregnancy', 'breastfeeding', 'overdose']
-                                if not any(exclude in link_text for exclude in exclude_terms):
-                                    print(f"✅ Found link: {link_text} -> {href}")
-                                    return link
-                        except Exception as e:
-                            continue
-                except Exception as e:
-                    continue
+            # One execute_script for the whole page instead of text/href calls per link
+            anchors = snapshot_anchors(self.driver)
             
-            page_text = self.driver.page_source.lower()
-            if clean_name in page_text:
-                all_links = self.driver.find_elements(By.TAG_NAME, "a")
-                for link in all_links:
-                    try:
-                        href = link.get_attribute('href')
-                        link_text = link.text.lower().strip()
-                        
-                        if href and (clean_name in href.lower() or clean_name in link_text):
-                            exclude_terms = ['side effects', 'español', 'spanish', 'interactions', 'pregnancy', 'breastfeeding', 'overdose']
-                            if not any(exclude in href.lower() for exclude in exclude_terms):
-                                print(f"✅ Found link via text search: {link_text} -> {href}")
-                                return link
-                    except:
-                        continue
+            # Same priority as the old selector loop: best selector first, then document order
+            candidates = []
+            for anchor in anchors:
+                rank = self.link_selector_rank(anchor)
+                if rank is None:
+                    continue
+                link_text = anchor['text'].lower()
+                href = anchor['href'].lower()
+                
+                if (clean_name in link_text or 
+                    clean_name in href or
+                    clean_name_no_spaces in href or
+                    any(word in link_text for word in clean_name.split() if len(word) > 2)):
+                    
+                    if not any(exclude in link_text for exclude in exclude_terms):
+                        candidates.append((rank, anchor['index'], anchor))
+            
+            for rank, index, anchor in sorted(candidates, key=lambda c: c[:2]):
+                link = anchor_element(self.driver, anchor)
+                if link:
+                    print(f"✅ Found link: {anchor['text'].lower()} -> {anchor['href'].lower()}")
+                    return link
+            
+            # Any link naming the medication in its URL or text
+            for anchor in anchors:
+                href = anchor['href']
+                link_text = anchor['text'].lower()
+                
+                if href and (clean_name in href.lower() or clean_name in link_text):
+                    if not any(exclude in href.lower() for exclude in exclude_terms):
+                        link = anchor_element(self.driver, anchor)
+                        if link:
+                            print(f"✅ Found link via text search: {link_text} -> {href}")
+                            return link
             
             print(f"❌ No suitable link found for {medication_name}")
             return None
@@ -773,9 +855,36 @@ class MedicationScraper:
             print(f"❌ Error searching for link: {e}")
             return None
     
+    @timed('item.medication')
     def process_medication(self, medication_name):
+        # Try the predictable drugs.com URL first
+        if self.use_direct_fetch:
+            url, html = self.direct_fetcher.fetch_drug_page(medication_name)
+            if html:
+                print(f"⚡ Direct page found for {medication_name}: {url}")
+                info = self.extract_medication_info(html, medication_name)
+                
+                print(f"📊 Extracted data for {medication_name}:")
+                print(f"  Brand: {info['brand_name']}")
+                print(f"  Dosage: {info['dosage']}")
+                print(f"  How to Take: {info['how_to_take']}")
+                print(f"  When to Take: {info['when_to_take']}")
+                
+                return info
+            print(f"↪️  No direct page for {medication_name}, falling back to browser search")
+        
+        # The browser is only started once a medication actually needs it
+        if not self.driver:
+            try:
+                self.setup_driver()
+            except Exception as e:
+                print(f"❌ Critical error starting driver: {e}")
+                return None
+        
         max_retries = 3
         for attempt in range(max_retries):
+            if attempt:
+                count('fetch.browser.retry')
             try:
                 print(f"🔍 Processing: {medication_name} (attempt {attempt + 1}/{max_retries})")
                 
@@ -796,7 +905,6 @@ class MedicationScraper:
                 
                 try:
                     self.driver.get("https://www.drugs.com")
-                    time.sleep(2)
                 except Exception as e:
                     print(f"❌ Error loading drugs.com: {e}")
                     if attempt < max_retries - 1:
@@ -843,9 +951,9 @@ class MedicationScraper:
                             print(f"⚠️ Failed to find search box after {max_retries} attempts")
                         return None
                 
+                search_page_url = self.driver.current_url
                 search_box.clear()
                 search_box.send_keys(medication_name)
-                time.sleep(0.5)
                 
                 try:
                     search_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
@@ -878,7 +986,7 @@ class MedicationScraper:
                         search_box.send_keys(Keys.RETURN)
                         print("✅ Search executed with Enter key (fallback)")
                 
-                time.sleep(2)
+                wait_for_navigation(self.driver, search_page_url, 10)
                 
                 medication_link = self.find_medication_link(medication_name)
                 if medication_link:
@@ -888,10 +996,14 @@ class MedicationScraper:
                             self.restart_driver()
                             continue
                         
+                        results_url = self.driver.current_url
                         self.driver.execute_script("arguments[0].click();", medication_link)
-                        time.sleep(3)
+                        wait_for_navigation(self.driver, results_url, 10)
                         
-                        info = self.extract_medication_info(self.driver.page_source, medication_name)
+                        page_source = self.driver.page_source
+                        # Keep the page so reruns read it from the page cache
+                        self.direct_fetcher.remember_page('main', medication_name, self.driver.current_url, page_source)
+                        info = self.extract_medication_info(page_source, medication_name)
                         
                         print(f"📊 Extracted data for {medication_name}:")
                         print(f"  Brand: {info['brand_name']}")
@@ -921,6 +1033,7 @@ class MedicationScraper:
                     
             except Exception as e:
                 print(f"❌ Error processing {medication_name}: {e}")
+                self.note_driver_error()
                 if attempt < max_retries - 1:
                     print(f"🔄 Retrying... (attempt {attempt + 2}/{max_retries})")
                     time.sleep(2)
@@ -932,6 +1045,7 @@ class MedicationScraper:
         print(f"⚠️ Failed to process {medication_name} after {max_retries} attempts")
         return None
     
+    @timed('parse.drugs_com')
     def extract_medication_info(self, page_source, medication_name=None):
         # Safety check for page_source
         if not page_source or page_source is None:
@@ -943,12 +1057,13 @@ class MedicationScraper:
             }
         
         try:
-            soup = BeautifulSoup(page_source, 'html.parser')
+            # Lowercase the page and locate sections once for all extractors
+            context = ExtractionContext.of(page_source)
             
-            brand_name = self.extract_brand_name(page_source, medication_name)
-            dosage = self.extract_dosage(page_source)
-            how_to_take = self.extract_how_to_take(page_source)
-            when_to_take = self.extract_when_to_take(page_source)
+            brand_name = self.extract_brand_name(context, medication_name)
+            dosage = self.extract_dosage(context)
+            how_to_take = self.extract_how_to_take(context)
+            when_to_take = self.extract_when_to_take(context)
             
             return {
                 'brand_name': brand_name,
@@ -973,7 +1088,9 @@ class MedicationScraper:
         if not page_source or page_source is None:
             return "Not found"
         
-        page_lower = page_source.lower()
+        context = ExtractionContext.of(page_source)
+        page_source = context.html
+        page_lower = context.html_lower
         
         # Strategy 0: Check enhanced brand database first (most reliable)
         if medication_name and medication_name.lower() in self.enhanced_brand_database:
@@ -988,13 +1105,7 @@ class MedicationScraper:
         
         # Strategy 2: Look for the main "Brand names:" section (fallback)
         # This is the primary source of brand names on drugs.com
-        brand_section_patterns = [
-            r'Brand name[s]?:\s*([^<\n]+?)(?:\n|$|<)',
-            r'Brand name[s]?:\s*([^<\n]+?)(?:\s*[,;]|\s*$|\s*\.|\s*<)',
-        ]
-        
-        for pattern in brand_section_patterns:
-            matches = re.findall(pattern, page_source, re.IGNORECASE | re.MULTILINE)
+        for matches in patterns.BRAND_SECTION_PATTERNS.matches_by_pattern(page_source):
             for match in matches:
                 if match:
                     # Clean and split the brand names
@@ -1011,24 +1122,17 @@ class MedicationScraper:
         brands = []
         
         # Look for the Brand Names section
-        brand_section_match = re.search(r'Brand Names.*?(?=<h[1-6]|</div>|$)', page_source, re.IGNORECASE | re.DOTALL)
+        brand_section_match = patterns.BRAND_NAMES_SECTION.search(page_source)
         if brand_section_match:
             section_content = brand_section_match.group(0)
             
             # Extract brand names from bulleted list format
             # Pattern: • Brand Name (Manufacturer, Country) or • Brand Name
-            brand_patterns = [
-                r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)\s*\([^)]*\)',  # Brand Name (Manufacturer, Country)
-                r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)(?:\s*$|\s*<)',  # Brand Name at end of line
-                r'•\s*([A-Za-z0-9\s\-\+\[\]\/]+?)(?:\s*\(|\s*<)',  # Brand Name before parenthesis
-            ]
-            
-            for pattern in brand_patterns:
-                matches = re.findall(pattern, section_content, re.MULTILINE)
+            for matches in patterns.BULLETED_BRAND_PATTERNS.matches_by_pattern(section_content):
                 for match in matches:
                     brand_name = match.strip()
                     # Clean up the brand name
-                    brand_name = re.sub(r'\s+', ' ', brand_name)  # Normalize whitespace
+                    brand_name = patterns.WHITESPACE.sub(' ', brand_name)  # Normalize whitespace
                     brand_name = brand_name.strip()
                     
                     if brand_name and self.is_valid_brand_name(brand_name):
@@ -1057,38 +1161,40 @@ class MedicationScraper:
                         all_brands.append(match.strip())
         
         # Strategy 3: Search for known brands in comprehensive database
-        for brand in self.all_brands:
-            if brand.lower() in page_lower:
-                # Check if brand appears in a meaningful context
-                brand_context = re.search(rf'\b{re.escape(brand)}\b', page_source, re.IGNORECASE)
-                if brand_context:
-                    # Get surrounding context to verify it's actually a brand name
-                    context_start = max(0, brand_context.start() - 100)
-                    context_end = min(len(page_source), brand_context.end() + 100)
-                    context = page_source[context_start:context_end].lower()
-                    
-                    # Check if context suggests this is a brand name
-                    brand_indicators = [
-                        'brand', 'trade', 'proprietary', 'marketed', 'sold as', 'known as',
-                        'also known as', 'alternative name', 'common brand', 'available as',
-                        'brand name', 'trade name', 'proprietary name'
-                    ]
-                    
-                    # Check for negative context that suggests it's NOT a brand name
-                    negative_indicators = [
-                        'avoid', 'do not take', 'interaction', 'contraindication', 'warning',
-                        'side effect', 'adverse', 'allergy', 'hypersensitivity', 'caution'
-                    ]
-                    
-                    if any(indicator in context for indicator in brand_indicators):
-                        # Double check it's not in negative context
-                        if not any(neg in context for neg in negative_indicators):
-                            all_brands.append(brand)
-                    # Also check if it appears in parentheses after the generic name
-                    elif re.search(rf'\([^)]*{re.escape(brand)}[^)]*\)', page_source, re.IGNORECASE):
-                        # Make sure it's not in a warning or interaction context
-                        if not any(neg in context for neg in negative_indicators):
-                            all_brands.append(brand)
+        # (one automaton pass over the page instead of one scan per brand)
+        seen_brands = set()
+        for match_start, match_end, brand in self.brand_index.matcher.iter_matches(page_source):
+            if brand in seen_brands:
+                continue
+            seen_brands.add(brand)
+            
+            # Get surrounding context to verify it's actually a brand name
+            context_start = max(0, match_start - 100)
+            context_end = min(len(page_source), match_end + 100)
+            context = page_source[context_start:context_end].lower()
+            
+            # Check if context suggests this is a brand name
+            brand_indicators = [
+                'brand', 'trade', 'proprietary', 'marketed', 'sold as', 'known as',
+                'also known as', 'alternative name', 'common brand', 'available as',
+                'brand name', 'trade name', 'proprietary name'
+            ]
+            
+            # Check for negative context that suggests it's NOT a brand name
+            negative_indicators = [
+                'avoid', 'do not take', 'interaction', 'contraindication', 'warning',
+                'side effect', 'adverse', 'allergy', 'hypersensitivity', 'caution'
+            ]
+            
+            if any(indicator in context for indicator in brand_indicators):
+                # Double check it's not in negative context
+                if not any(neg in context for neg in negative_indicators):
+                    all_brands.append(brand)
+            # Also check if it appears in parentheses after the generic name
+            elif re.search(rf'\([^)]*{re.escape(brand)}[^)]*\)', page_source, re.IGNORECASE):
+                # Make sure it's not in a warning or interaction context
+                if not any(neg in context for neg in negative_indicators):
+                    all_brands.append(brand)
         
         # Strategy 4: Look for other brand name sections
         other_brand_patterns = [
@@ -1150,7 +1256,7 @@ class MedicationScraper:
                 unique_brands.append(cleaned_brand)
         
         # Filter out inappropriate brand names based on medication type
-        filtered_brands = self.filter_inappropriate_brands(unique_brands, page_source)
+        filtered_brands = self.filter_inappropriate_brands(unique_brands, context)
         
         # Return all brands found, or "Not found" if none
         if filtered_brands:
@@ -1167,7 +1273,7 @@ class MedicationScraper:
             return brands
         
         # Get medication type from page content
-        page_lower = page_source.lower()
+        page_lower = ExtractionContext.of(page_source).html_lower
         
         # Define medication categories and their appropriate brands
         medication_categories = {
@@ -1245,27 +1351,11 @@ class MedicationScraper:
             return False
         
         # Check for patterns that are clearly not brand names
-        invalid_patterns = [
-            r'^names?:\s*$',  # Just "names:" or "name:"
-            r'^\.\.\.\s*\+\d+\s*more$',  # "... +23 more"
-            r'^[a-z]+\s+[a-z]+$',  # All lowercase words
-            r'^\d+',  # Starts with number
-            r'^[^A-Z]',  # Doesn't start with capital letter
-            r'[()]',  # Contains parentheses
-            r'^\s*$',  # Just whitespace
-            r'^[^a-zA-Z]*$',  # No letters at all
-            r'^[a-z]+$',  # Single lowercase word
-            r'^[A-Z][a-z]*\s+[a-z]+$',  # Capital word followed by lowercase (like "Some side")
-            r'^[A-Z][a-z]*-[a-z]+-[a-z]+$',  # Hyphenated technical terms
-            r'^[A-Z]{2,}-[A-Z]{2,}$',  # Acronyms with hyphens
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.match(pattern, brand_name, re.IGNORECASE):
-                return False
+        if patterns.INVALID_BRAND_PATTERNS.match(brand_name):
+            return False
         
         # Check if it looks like a proper brand name (starts with capital letter, contains letters)
-        if not re.match(r'^[A-Z][a-zA-Z\s\-&]+$', brand_name):
+        if not patterns.BRAND_NAME_SHAPE.match(brand_name):
             return False
         
         # Must contain at least one letter
@@ -1277,8 +1367,8 @@ class MedicationScraper:
             return False
         
         # Additional validation: must be a known brand or look like a real brand name
-        # Check against our comprehensive brand database
-        if brand_lower not in [b.lower() for b in self.all_brands]:
+        # Check against our comprehensive and enhanced brand databases
+        if not self.brand_index.is_known(brand_lower):
             # If not in our database, apply stricter rules
             # Must be a single word or two words maximum
             words = brand_name.split()
@@ -1290,7 +1380,7 @@ class MedicationScraper:
                 if len(word) < 2 or len(word) > 15:
                     return False
                 # Should not contain numbers or special characters (except hyphens)
-                if not re.match(r'^[A-Za-z\-]+$', word):
+                if not patterns.BRAND_WORD_SHAPE.match(word):
                     return False
         
         return True
@@ -1303,6 +1393,8 @@ class MedicationScraper:
         if not page_source or page_source is None:
             return "Not found"
         
+        context = ExtractionContext.of(page_source)
+        
         # Look for dosage information in specific sections first
         dosage_sections = [
             'dosage',
@@ -1315,23 +1407,17 @@ class MedicationScraper:
             'presentation'
         ]
         
-        page_lower = page_source.lower()
-        
         # Search in dosage-related sections
         for section in dosage_sections:
-            if section in page_lower:
-                # Find the section and extract dosage info
-                section_start = page_lower.find(section)
-                section_end = min(section_start + 3000, len(page_lower))
-                section_text = page_source[section_start:section_end]
-                
+            section_text = context.section(section, 3000)
+            if section_text:
                 # Look for dosage patterns in this section
                 dosage_forms = self.find_all_dosage_forms_in_text(section_text)
                 all_dosage_forms.extend(dosage_forms)
         
         # If not found in sections, search the entire page
         if not all_dosage_forms:
-            all_dosage_forms = self.find_all_dosage_forms_in_text(page_source)
+            all_dosage_forms = self.find_all_dosage_forms_in_text(context.html)
         
         # Remove duplicates and clean up
         unique_dosage_forms = []
@@ -1359,47 +1445,9 @@ class MedicationScraper:
         if not text or text is None:
             return all_forms
         
-        # Enhanced form patterns to catch multiple forms
-        form_patterns = [
-            # Oral forms
-            r'(?:oral\s+)?(?:tablet|pill|capsule|liquid|suspension|syrup|solution|powder|granule)',
-            r'(?:chewable|disintegrating|extended\s+release|effervescent|compounding)',
-            r'(?:oral\s+)?(?:tablet|pill|capsule)(?:\s+extended\s+release)?',
-            r'(?:oral\s+)?(?:liquid|suspension|syrup|solution)',
-            r'(?:oral\s+)?(?:powder|granule|effervescent)',
-            r'(?:oral\s+)?(?:drops|spray|lozenge|gum)',
-            
-            # Injection forms
-            r'(?:injection|injectable|subcutaneous|intramuscular|intravenous)',
-            r'(?:intravenous\s+solution|subcutaneous\s+injection|intramuscular\s+injection)',
-            r'(?:prefilled\s+syringe|auto\s+injector|pen\s+injector)',
-            
-            # Inhalation forms
-            r'(?:inhalation|inhaler|aerosol|nebulizer|powder\s+inhaler|metered\s+dose\s+inhaler)',
-            r'(?:dry\s+powder\s+inhaler|soft\s+mist\s+inhaler)',
-            
-            # Topical forms
-            r'(?:topical|cream|ointment|gel|patch|lotion|foam|spray|shampoo)',
-            r'(?:transdermal|dermal|cutaneous)',
-            
-            # Other forms
-            r'(?:rectal\s+suppository|ophthalmic|otic|intranasal|nasal\s+spray)',
-            r'(?:vaginal|buccal|sublingual|intrauterine)',
-            r'(?:ophthalmic\s+drops|ophthalmic\s+ointment|ophthalmic\s+gel)',
-            r'(?:otic\s+drops|otic\s+suspension)',
-            
-            # Generic patterns
-            r'(?:tablet|capsule|pill|liquid|suspension|syrup|solution|powder|granule)',
-            r'(?:injection|inhalation|topical|rectal|ophthalmic|otic|nasal)',
-            r'(?:drops|spray|lozenge|gum|suppository|implant|device)'
-        ]
-        
-        # Look for specific dosage form mentions
-        for pattern in form_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        # Look for specific dosage form mentions (all form patterns in one scan)
+        for matches in patterns.DOSAGE_FORM_PATTERNS.matches_by_pattern(text):
             for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
                 cleaned = self.clean_text(match)
                 if cleaned and len(cleaned) > 2:
                     # Avoid false positives
@@ -1409,18 +1457,9 @@ class MedicationScraper:
                             all_forms.append(standardized)
         
         # Look for "Available as" or "Form" sections that list multiple forms
-        availability_patterns = [
-            r'Available as:\s*([^,\n\r]+)',
-            r'Form[s]?:\s*([^,\n\r]+)',
-            r'Presentation[s]?:\s*([^,\n\r]+)',
-            r'How supplied:\s*([^,\n\r]+)',
-            r'Product forms?:\s*([^,\n\r]+)'
-        ]
-        
-        for pattern in availability_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for match in patterns.DOSAGE_AVAILABILITY_PATTERNS.first_matches(text):
             if match:
-                forms_text = self.clean_text(match.group(1))
+                forms_text = self.clean_text(match)
                 # Split by common separators and clean each form
                 for separator in [',', ';', 'and', '&', '/', '|']:
                     if separator in forms_text:
@@ -1528,6 +1567,8 @@ class MedicationScraper:
         if not page_source or page_source is None:
             return "Not found"
         
+        context = ExtractionContext.of(page_source)
+        
         how_to_sections = [
             'how to take',
             'how to use',
@@ -1541,23 +1582,18 @@ class MedicationScraper:
             'proper use'
         ]
         
-        page_lower = page_source.lower()
-        
         for section in how_to_sections:
-            if section in page_lower:
-                section_start = page_lower.find(section)
-                section_end = min(section_start + 3000, len(page_lower))
-                section_text = page_source[section_start:section_end]
-                
+            section_text = context.section(section, 3000)
+            if section_text:
                 instructions = self.find_all_how_to_take_in_text(section_text)
                 all_instructions.extend(instructions)
         
-        food_instructions = self.find_food_instructions(page_source)
+        food_instructions = self.find_food_instructions(context.html)
         if food_instructions:
             all_instructions.extend(food_instructions)
         
         if not all_instructions:
-            all_instructions = self.find_all_how_to_take_in_text(page_source)
+            all_instructions = self.find_all_how_to_take_in_text(context.html)
         
         unique_instructions = []
         seen = set()
@@ -1576,41 +1612,21 @@ class MedicationScraper:
         return "Not found"
     
     def find_how_to_take_in_text(self, text):
-        how_patterns = [
-            r'(?:take|use)\s+(?:with|without)\s+(?:food|meals)',
-            r'(?:take|use)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            r'(?:with|without)\s+(?:food|meals)',
-            r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            r'(?:take|use)\s+(?:with|without)\s+(?:water)',
-            r'(?:with|without)\s+(?:water)',
-            r'(?:with\s+)?(?:a\s+)?(?:full\s+)?(?:glass\s+of\s+water)',
-            r'swallow\s+(?:the\s+)?(?:tablet|capsule)\s+(?:whole|with\s+water)',
-            r'swallow\s+(?:whole|with\s+water|with\s+food)',
-            r'(?:take|use)\s+(?:orally|by\s+mouth)',
-            r'(?:oral|injection|inhalation|topical)\s+(?:administration|use)',
-            r'how\s+to\s+(?:take|use):\s*([^,\n]+)',
-            r'instructions:\s*([^,\n]+)',
-            r'directions:\s*([^,\n]+)'
-        ]
-        
-        for pattern in how_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    cleaned = self.clean_text(match)
-                    if cleaned and len(cleaned) > 5:
-                        return self.simplify_how_to_take(cleaned)
+        for matches in patterns.HOW_TO_TAKE_PATTERNS.matches_by_pattern(text):
+            for match in matches:
+                cleaned = self.clean_text(match)
+                if cleaned and len(cleaned) > 5:
+                    return self.simplify_how_to_take(cleaned)
         
-        if 'oral' in text.lower() or 'tablet' in text.lower() or 'capsule' in text.lower() or 'pill' in text.lower():
+        text_lower = text.lower()
+        if 'oral' in text_lower or 'tablet' in text_lower or 'capsule' in text_lower or 'pill' in text_lower:
             return 'Oral'
-        elif 'inhalation' in text.lower() or 'inhaler' in text.lower():
+        elif 'inhalation' in text_lower or 'inhaler' in text_lower:
             return 'Inhalation'
-        elif 'topical' in text.lower():
+        elif 'topical' in text_lower:
             return 'Topical'
-        elif 'injection' in text.lower():
-            injection_context = re.search(r'(?:take|use|administer|given)\s+(?:by\s+)?injection', text.lower())
+        elif 'injection' in text_lower:
+            injection_context = patterns.INJECTION_CONTEXT.search(text_lower)
             if injection_context:
                 return 'Injection'
             else:
@@ -1668,14 +1684,11 @@ class MedicationScraper:
             'dosing instructions'
         ]
         
-        page_lower = page_source.lower()
+        context = ExtractionContext.of(page_source)
         
         for section in when_sections:
-            if section in page_lower:
-                section_start = page_lower.find(section)
-                section_end = min(section_start + 2000, len(page_lower))
-                section_text = page_source[section_start:section_end]
-                
+            section_text = context.section(section, 2000)
+            if section_text:
                 when_to_take = self.find_when_to_take_in_text(section_text)
                 if when_to_take != "Not found":
                     return when_to_take
@@ -1690,82 +1703,21 @@ class MedicationScraper:
         ]
         
         for section in dosage_sections:
-            if section in page_lower:
-                section_start = page_lower.find(section)
-                section_end = min(section_start + 1500, len(page_lower))
-                section_text = page_source[section_start:section_end]
-                
+            section_text = context.section(section, 1500)
+            if section_text:
                 when_to_take = self.find_when_to_take_in_text(section_text)
                 if when_to_take != "Not found":
                     return when_to_take
         
         # Strategy 3: Search the entire page for timing patterns
-        return self.find_when_to_take_in_text(page_source)
+        return self.find_when_to_take_in_text(context.html)
     
     def find_when_to_take_in_text(self, text):
-        when_patterns = [
-            # Frequency patterns
-            r'(?:take|use|administer|give)\s+(?:every\s+)?(\d+\s+(?:hours?|days?|weeks?|months?))',
-            r'(?:take|use|administer|give)\s+(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:daily|per\s+day|a\s+day)',
-            r'(?:take|use|administer|give)\s+(\d+)\s+times?\s+(?:daily|per\s+day|a\s+day)',
-            r'(?:take|use|administer|give)\s+(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:every\s+\d+\s+(?:hours?|days?))',
-            
-            # Time of day patterns
-            r'(?:take|use|administer|give)\s+(?:in\s+)?(?:the\s+)?(?:morning|afternoon|evening|night|bedtime|at\s+bedtime)',
-            r'(?:take|use|administer|give)\s+(?:with\s+)?(?:breakfast|lunch|dinner|meals|food)',
-            r'(?:take|use|administer|give)\s+(?:before\s+)?(?:bed|sleep|going\s+to\s+bed)',
-            r'(?:take|use|administer|give)\s+(?:on\s+an?\s+)?(?:empty\s+stomach|full\s+stomach)',
-            r'(?:take|use|administer|give)\s+(?:at\s+)?(?:(\d{1,2}):(\d{2})\s*(?:AM|PM|am|pm)?)',
-            r'(?:take|use|administer|give)\s+(?:at\s+)?(?:(\d{1,2})\s*(?:AM|PM|am|pm))',
-            
-            # As needed patterns
-            r'(?:take|use|administer|give)\s+(?:as\s+)?(?:needed|required|necessary|prn)',
-            r'(?:take|use|administer|give)\s+(?:when\s+)?(?:needed|required|necessary)',
-            r'(?:take|use|administer|give)\s+(?:for\s+)?(?:pain|symptoms|discomfort)',
-            
-            # Specific timing patterns
-            r'(?:take|use|administer|give)\s+(?:at\s+)?(?:the\s+)?(?:same\s+time\s+every\s+day)',
-            r'(?:take|use|administer|give)\s+(?:at\s+)?(?:regular\s+intervals)',
-            r'(?:take|use|administer|give)\s+(?:continuously|around\s+the\s+clock)',
-            
-            # Duration patterns
-            r'(?:take|use|administer|give)\s+(?:for\s+)?(\d+\s+(?:days?|weeks?|months?|years?))',
-            r'(?:take|use|administer|give)\s+(?:until\s+)?(?:symptoms\s+improve|pain\s+relief)',
-            
-            # Simple frequency patterns (standalone)
-            r'(?:once|twice|three\s+times|four\s+times|five\s+times)\s+(?:daily|per\s+day|a\s+day)',
-            r'(\d+)\s+times?\s+(?:daily|per\s+day|a\s+day)',
-            r'(?:every\s+\d+\s+(?:hours?|days?|weeks?|months?))',
-            r'(?:morning|afternoon|evening|night|bedtime)',
-            r'(?:daily|regularly|continuously)',
-            
-            # With/without food patterns
-            r'(?:with\s+food|without\s+food|on\s+an?\s+empty\s+stomach|on\s+a\s+full\s+stomach)',
-            
-            # Before/after patterns
-            r'(?:before|after)\s+(?:meals|eating|food|breakfast|lunch|dinner)',
-            r'(?:before|after)\s+(?:bedtime|sleep|going\s+to\s+bed)',
-            
-            # Specific conditions
-            r'(?:when\s+)?(?:pain\s+occurs|symptoms\s+appear|needed\s+for\s+pain)',
-            r'(?:as\s+directed\s+by\s+your\s+doctor|as\s+prescribed)',
-            
-            # Time-specific patterns
-            r'(?:at\s+)?(?:(\d{1,2}):(\d{2})\s*(?:AM|PM|am|pm)?)',
-            r'(?:at\s+)?(?:(\d{1,2})\s*(?:AM|PM|am|pm))',
-            r'(?:every\s+(\d+)\s+to\s+(\d+)\s+hours?)',
-            r'(?:every\s+(\d+)\s+to\s+(\d+)\s+days?)'
-        ]
-        
-        for pattern in when_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    cleaned = self.clean_text(match)
-                    if cleaned and len(cleaned) > 3:
-                        return self.standardize_when_to_take(cleaned)
+        for matches in patterns.WHEN_TO_TAKE_PATTERNS.matches_by_pattern(text):
+            for match in matches:
+                cleaned = self.clean_text(match)
+                if cleaned and len(cleaned) > 3:
+                    return self.standardize_when_to_take(cleaned)
         
         return "Not found"
     
@@ -1907,22 +1859,7 @@ class MedicationScraper:
         # Ensure text is a string
         text = str(text)
         
-        text = re.sub(r'<[^>]+>', '', text)
-        text = re.sub(r'&quot;', '', text)
-        text = re.sub(r'&amp;', '&', text)
-        text = re.sub(r'&lt;', '<', text)
-        text = re.sub(r'&gt;', '>', text)
-        text = re.sub(r'&nbsp;', ' ', text)
-        text = re.sub(r'window\.\w+', '', text)
-        text = re.sub(r'get\s*\(\s*\)', '', text)
-        text = re.sub(r'function\s*\([^)]*\)', '', text)
-        text = re.sub(r'var\s+\w+', '', text)
-        text = re.sub(r'console\.\w+', '', text)
-        text = re.sub(r'&quot;get&quot;', '', text)
-        text = re.sub(r'get\s*\(\s*\)', '', text)
-        text = re.sub(r'window\.sup_platform', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
+        text = patterns.clean_markup(text)
         
         if len(text) < 3 or text.lower() in ['get', 'window', 'function', 'var']:
             return ""
@@ -2095,7 +2032,7 @@ class MedicationScraper:
         
         try:
             if existing_file:
-                df = pd.read_excel(existing_file)
+                df = sheet_loader.read_table(existing_file)
                 
                 new_rows = []
                 for medication, data in new_data.items():
@@ -2154,7 +2091,7 @@ class MedicationScraper:
         self.print_section("UPDATING HOW TO TAKE COLUMN")
         
         try:
-            df = pd.read_excel(existing_file)
+            df = sheet_loader.read_table(existing_file)
             self.print_success(f"Total medications: {len(df)}")
             
             self.print_section("CURRENT HOW TO TAKE STATISTICS")
@@ -2224,7 +2161,7 @@ class MedicationScraper:
             if not reprocessed_file:
                 return
             
-            df = pd.read_excel(reprocessed_file)
+            df = sheet_loader.read_table(reprocessed_file)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             excel_filename = f"../Analysis/medication_data_{timestamp}.xlsx"
@@ -2246,6 +2183,10 @@ class MedicationScraper:
     def run(self, limit=None):
         self.print_header("🚀 INTELLIGENT MEDICATION SCRAPING", "Enhanced Brand Name Extraction & Modern Visual Interface")
         
+        run_id = self.result_store.start_run('medication_scraper')
+        run_status = 'failed'
+        run_stats = {}
+        
         try:
             self.existing_data, existing_file = self.load_existing_data()
             original_medications = self.read_original_medications()
@@ -2266,87 +2207,21 @@ class MedicationScraper:
                 self.print_section("UPDATING EXISTING DATA")
                 self.print_success("All medications already processed. Updating 'How to Take' column with improved cleaning...")
                 self.update_how_to_take_only(cache, existing_file)
+                run_status = 'completed'
                 return
             elif not missing_medications:
                 self.print_success("No missing medications. All medications are already in our results.")
+                run_status = 'completed'
                 return
             
-            cache = self.load_cache()
-            self.setup_driver()
-            
-            scraped_data = {}
-            total_missing = len(missing_medications)
-            
-            self.print_info(f"Processing {total_missing} missing medications in batches of {self.batch_size}...")
-            
-            for batch_start in range(0, total_missing, self.batch_size):
-                batch_end = min(batch_start + self.batch_size, total_missing)
-                batch_medications = missing_medications[batch_start:batch_end]
-                
-                self.print_section(f"BATCH {batch_start//self.batch_size + 1}: Processing medications {batch_start + 1}-{batch_end}")
-                
-                for i, medication in enumerate(batch_medications, 1):
-                    global_index = batch_start + i
-                    self.print_progress(global_index, total_missing, f"Processing {medication}")
-                    
-                    if medication in cache:
-                        self.print_success(f"{medication}: Using cached data")
-                        scraped_data[medication] = cache[medication]
-                        continue
-                    
-                    try:
-                        result = self.process_medication(medication)
-                        if result:
-                            scraped_data[medication] = result
-                            cache[medication] = result
-                            self.print_success(f"{medication}: {result['brand_name']} | {result['dosage']} | {result['how_to_take']} | {result['when_to_take']}")
-                        else:
-                            self.print_error(f"{medication}: Could not process")
-                    except Exception as e:
-                        self.print_error(f"Error processing {medication}: {e}")
-                        time.sleep(1)
-                        continue
-                
-                self.print_info(f"Restarting driver after batch {batch_start//self.batch_size + 1}...")
-                
-                try:
-                    self.restart_driver()
-                except Exception as e:
-                    self.print_warning(f"Error restarting driver: {e}")
-                    self.print_info("Attempting automatic restart...")
-                    try:
-                        if self.driver:
-                            self.driver.quit()
-                    except:
-                        pass
-                    time.sleep(3)
-                    try:
-                        self.setup_driver()
-                    except Exception as e2:
-                        self.print_error(f"Critical error setting up driver: {e2}")
-                        self.print_info("Trying one more time...")
-                        time.sleep(5)
-                        try:
-                            self.setup_driver()
-                        except Exception as e3:
-                            self.print_error(f"Final error setting up driver: {e3}")
-                            self.print_error("Stopping script due to driver issues")
-                            break
-                
-                if scraped_data:
-                    cleaned_data = self.clean_and_format_data(scraped_data)
-                    self.save_cache(cache)
-                    self.print_success(f"Progress saved after batch {batch_start//self.batch_size + 1}")
-                
-                self.print_info("Batch completed. Continuing automatically...")
-                time.sleep(1)
-            
-            if self.driver:
-                self.driver.quit()
+            scraped_data = self.run_worker_pool(missing_medications, cache)
             
             if scraped_data:
                 cleaned_data = self.clean_and_format_data(scraped_data)
                 self.save_cache(cache)
+                stored = self.result_store.upsert_medications(cleaned_data, source='drugs.com', run_id=run_id)
+                self.print_success(f"Stored {stored} medications in {self.result_store.db_path}")
+                run_stats['medications_stored'] = stored
                 updated_file = self.update_excel(cleaned_data, existing_file)
                 
                 self.print_header("🎉 SCRAPING COMPLETED!", "Enhanced Multi-Brand Extraction Results")
@@ -2367,16 +2242,12 @@ class MedicationScraper:
                         # Handle multiple brands
                         if '|' in str(data['brand_name']):
                             brands = data['brand_name'].split(' | ')
-                            for brand in brands:
-                                for category, category_brands in self.comprehensive_brands.items():
-                                    if brand in category_brands:
-                                        brand_categories[category] = brand_categories.get(category, 0) + 1
-                                        break
                         else:
-                            for category, brands in self.comprehensive_brands.items():
-                                if data['brand_name'] in brands:
-                                    brand_categories[category] = brand_categories.get(category, 0) + 1
-                                    break
+                            brands = [data['brand_name']]
+                        for brand in brands:
+                            category = self.brand_index.category_of(brand)
+                            if category:
+                                brand_categories[category] = brand_categories.get(category, 0) + 1
                 
                 for category, count in sorted(brand_categories.items(), key=lambda x: x[1], reverse=True):
                     self.print_info(f"{category}: {count} brands")
@@ -2399,12 +2270,115 @@ class MedicationScraper:
             except Exception as e:
                 self.print_error(f"Error creating enhanced Excel: {e}")
             
+            run_status = 'completed'
+            
         except Exception as e:
             self.print_error(f"Error in scraping: {e}")
             import traceback
             self.print_error(f"Full traceback: {traceback.format_exc()}")
             if self.driver:
                 self.driver.quit()
+        finally:
+            self.result_store.finish_run(run_id, run_status, run_stats)
+    
+    def run_worker_pool(self, medications, cache):
+        """Scrape medications with a pool of browser workers pulling from a shared queue"""
+        work_queue = queue.Queue()
+        for medication in medications:
+            work_queue.put(medication)
+        
+        scraped_data = {}
+        progress = {'done': 0, 'since_flush': 0, 'total': len(medications)}
+        worker_count = min(self.workers, len(medications))
+        
+        self.print_info(f"Processing {len(medications)} missing medications with {worker_count} worker(s); browsers are recycled when their health degrades...")
+        if self.use_direct_fetch:
+            self.print_info("Direct drugs.com URLs are tried first; the browser is only used on a miss")
+        
+        threads = []
+        for worker_id in range(1, worker_count + 1):
+            thread = threading.Thread(
+                target=self.worker_loop,
+                args=(worker_id, work_queue, scraped_data, cache, progress),
+                name=f"scraper-worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        
+        for thread in threads:
+            thread.join()
+        
+        if not work_queue.empty():
+            self.print_error(f"{work_queue.qsize()} medications left unprocessed because of driver issues")
+        
+        if self.use_direct_fetch:
+            self.print_info(f"Direct drugs.com pages: {self.direct_fetcher.hits} found, {self.direct_fetcher.misses} needed the browser")
+        
+        if scraped_data:
+            with self._lock:
+                self.save_cache(cache)
+        
+        return scraped_data
+    
+    def worker_loop(self, worker_id, work_queue, scraped_data, cache, progress):
+        """Process medications from the shared queue with this thread's own browser"""
+        try:
+            while True:
+                try:
+                    medication = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                # Check cache first
+                cache_key = drug_key(medication)
+                with self._lock:
+                    cached = cache.get(self.drug_index.stored_key(cache, medication))
+                    if cached:
+                        progress['done'] += 1
+                        scraped_data[medication] = cached
+                        self.print_success(f"{medication}: Using cached data")
+                        continue
+                
+                result = None
+                try:
+                    result = self.process_medication(medication)
+                except Exception as e:
+                    self.print_error(f"Error processing {medication}: {e}")
+                    self.note_driver_error()
+                    time.sleep(1)
+                
+                with self._lock:
+                    progress['done'] += 1
+                    self.print_progress(progress['done'], progress['total'], f"Worker {worker_id}")
+                    print()
+                    
+                    if result:
+                        scraped_data[medication] = result
+                        cache[cache_key] = result
+                        self.print_success(f"{medication}: {result['brand_name']} | {result['dosage']} | {result['how_to_take']} | {result['when_to_take']}")
+                    else:
+                        self.print_error(f"{medication}: Could not process")
+                    
+                    # Flush the shared cache once per batch of completed medications
+                    progress['since_flush'] += 1
+                    if progress['since_flush'] >= self.batch_size:
+                        self.save_cache(cache)
+                        progress['since_flush'] = 0
+                        self.print_success(f"Progress saved ({progress['done']}/{progress['total']} medications)")
+                
+                # Recycle on measured health (latency, errors, memory), not every batch
+                if not work_queue.empty() and not self.recycle_driver_if_unhealthy():
+                    self.print_error(f"Worker {worker_id}: stopping due to driver issues")
+                    break
+        finally:
+            try:
+                if self.driver:
+                    self.driver.quit()
+            except:
+                pass
+            self.driver = None
+            self.standby.close()
     
     def analyze_brand_extraction_results(self, data):
         """Analyze and display detailed brand extraction results"""
@@ -2442,10 +2416,9 @@ class MedicationScraper:
         category_counts = {}
         for d in data.values():
             if d['brand_name'] != 'Not found':
-                for category, brands in self.comprehensive_brands.items():
-                    if d['brand_name'] in brands:
-                        category_counts[category] = category_counts.get(category, 0) + 1
-                        break
+                category = self.brand_index.category_of(d['brand_name'])
+                if category:
+                    category_counts[category] = category_counts.get(category, 0) + 1
         
         for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True):
             percentage = (count / brand_names_found) * 100 if brand_names_found > 0 else 0
@@ -2624,7 +2597,8 @@ class MedicationScraper:
         
 
         
-        wb.save(filename)
+        with span('excel.save'):
+            wb.save(filename)
         return filename
     
     def enhance_existing_data(self):
@@ -2650,43 +2624,36 @@ class MedicationScraper:
         
         self.print_success(f"Processing: {original_file}")
         
-        df = pd.read_excel(f'../Analysis/{original_file}')
+        df = sheet_loader.read_table(f'../Analysis/{original_file}')
         self.print_info(f"Loaded {len(df)} medications")
         
         # Get disease associations
         disease_associations = self.get_disease_associations()
         
         # Simply add Disease Tag column to existing data without modifying anything else
-        enhanced_data = []
+        # The original file has columns: ['MEDICATION COMPREHENSIVE ANALYSIS', 'Unnamed: 1', 'Unnamed: 2', 'Unnamed: 3', 'Unnamed: 4']
+        medications = df.iloc[:, 0]
+        medication_text = medications.astype(str)
+        
+        # Skip non-medication rows (headers, statistics, etc.)
+        rows = df[
+            medications.notna() &
+            ~medication_text.str.startswith(('📊', 'Enhanced')) &
+            (medication_text != 'Medication Name')
+        ]
         
-        for index, row in df.iterrows():
-            # Get all existing data EXACTLY as-is (no modifications)
-            # The original file has columns: ['MEDICATION COMPREHENSIVE ANALYSIS', 'Unnamed: 1', 'Unnamed: 2', 'Unnamed: 3', 'Unnamed: 4']
-            medication = row.iloc[0]  # First column is medication name
-            
-            # Skip non-medication rows (headers, statistics, etc.)
-            if pd.isna(medication) or str(medication).startswith('📊') or str(medication).startswith('Enhanced') or str(medication) == 'Medication Name':
-                continue
-                
-            brand_name = row.iloc[1] if len(row) > 1 else None
-            current_dosage = row.iloc[2] if len(row) > 2 else None
-            current_how_to_take = row.iloc[3] if len(row) > 3 else None
-            when_to_take = row.iloc[4] if len(row) > 4 else None
-            
-            # Get disease tag for this medication (ONLY addition)
-            disease_tag = disease_associations.get(medication, 'Unknown')
-            
-            # Keep all existing data exactly as-is, just add Disease Tag
-            enhanced_data.append({
-                'Medication Name': medication,
-                'Brand Names': brand_name,
-                'Dosage Forms': current_dosage,
-                'How to Take': current_how_to_take,
-                'When to Take': when_to_take,
-                'Disease Tag': disease_tag
-            })
-        
-        enhanced_df = pd.DataFrame(enhanced_data)
+        def column_or_empty(position):
+            return rows.iloc[:, position] if rows.shape[1] > position else pd.Series([None] * len(rows), index=rows.index)
+        
+        # Keep all existing data exactly as-is, just add Disease Tag (ONLY addition)
+        enhanced_df = pd.DataFrame({
+            'Medication Name': rows.iloc[:, 0],
+            'Brand Names': column_or_empty(1),
+            'Dosage Forms': column_or_empty(2),
+            'How to Take': column_or_empty(3),
+            'When to Take': column_or_empty(4),
+            'Disease Tag': rows.iloc[:, 0].map(lambda medication: disease_associations.get(medication, 'Unknown'))
+        }).reset_index(drop=True)
         
         # Keep all data as-is, no filtering needed since we're working with clean data
         clean_df = enhanced_df.copy()
@@ -2753,16 +2720,28 @@ class MedicationScraper:
             cell.fill = header_fill
             cell.alignment = Alignment(horizontal='center', vertical='center')
         
-        # Add data rows (only medication data)
-        for row_idx, (_, row) in enumerate(medication_data.iterrows(), 2):
-            for col_idx, value in enumerate(row, 1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                cell.value = value
-                cell.alignment = Alignment(wrap_text=True, vertical='top')
+        # Add borders
+        thin_border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        for col in range(1, len(headers) + 1):
+            ws.cell(row=1, column=col).border = thin_border
+        
+        # Add data rows (only medication data); style objects are shared, not rebuilt per cell
+        data_alignment = Alignment(wrap_text=True, vertical='top')
+        alternate_fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
+        for row_idx, values in enumerate(medication_data.itertuples(index=False, name=None), 2):
+            for col_idx, value in enumerate(values, 1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                cell.alignment = data_alignment
+                cell.border = thin_border
                 
                 # Alternate row colors
                 if row_idx % 2 == 0:
-                    cell.fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
+                    cell.fill = alternate_fill
         
         # Set column widths
         ws.column_dimensions['A'].width = 25  # Medication Name
@@ -2772,19 +2751,8 @@ class MedicationScraper:
         ws.column_dimensions['E'].width = 25  # When to Take
         ws.column_dimensions['F'].width = 40  # Disease Tag
         
-        # Add borders
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.border = thin_border
-        
-        wb.save(filename)
+        with span('excel.save'):
+            wb.save(filename)
         self.print_success(f"Clean professional Excel created: {filename} with {len(medication_data)} medications")
     
     def find_additional_dosage_forms(self, medication_name, current_dosage):
@@ -2932,70 +2900,19 @@ class MedicationScraper:
         if not text or text is None:
             return all_instructions
         
-        # Enhanced patterns for comprehensive instruction extraction
-        enhanced_patterns = [
-            # Food-related instructions
-            r'(?:take|use|administer)\s+(?:with|without)\s+(?:food|meals)',
-            r'(?:take|use|administer)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            r'(?:with|without)\s+(?:food|meals)',
-            r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            
-            # Water and liquid instructions
-            r'(?:take|use)\s+(?:with|without)\s+(?:water|liquid)',
-            r'(?:with|without)\s+(?:water|liquid)',
-            r'(?:with\s+)?(?:a\s+)?(?:full\s+)?(?:glass\s+of\s+water)',
-            
-            # Swallowing instructions
-            r'swallow\s+(?:the\s+)?(?:tablet|capsule|pill)\s+(?:whole|with\s+water|with\s+food)',
-            r'swallow\s+(?:whole|with\s+water|with\s+food)',
-            r'(?:chew|crush|break)\s+(?:the\s+)?(?:tablet)',
-            
-            # Administration route instructions
-            r'(?:take|use)\s+(?:orally|by\s+mouth|sublingually|buccally)',
-            r'(?:oral|injection|inhalation|topical|sublingual|buccal)\s+(?:administration|use)',
-            
-            # Specific instruction patterns
-            r'how\s+to\s+(?:take|use):\s*([^,\n\r]+)',
-            r'instructions:\s*([^,\n\r]+)',
-            r'directions:\s*([^,\n\r]+)',
-            r'administration:\s*([^,\n\r]+)',
-            
-            # Dosage form specific instructions
-            r'(?:tablet|capsule|pill)\s+(?:should\s+be\s+)?(?:swallowed|chewed|crushed)',
-            r'(?:liquid|suspension|syrup)\s+(?:should\s+be\s+)?(?:shaken|measured)',
-            r'(?:inhaler|aerosol)\s+(?:should\s+be\s+)?(?:primed|shaken)',
-            r'(?:cream|ointment|gel)\s+(?:should\s+be\s+)?(?:applied|rubbed)',
-            
-            # Timing instructions
-            r'(?:take|use)\s+(?:at\s+)?(?:the\s+same\s+time|regular\s+intervals)',
-            r'(?:take|use)\s+(?:before|after|during)\s+(?:meals|food)',
-            r'(?:take|use)\s+(?:in\s+the\s+)?(?:morning|evening|bedtime)'
-        ]
-        
-        for pattern in enhanced_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    cleaned = self.clean_text(match)
-                    if cleaned and len(cleaned) > 5:
-                        standardized = self.simplify_how_to_take(cleaned)
-                        if standardized not in all_instructions:
-                            all_instructions.append(standardized)
+        # Enhanced patterns for comprehensive instruction extraction (one scan)
+        for matches in patterns.ALL_HOW_TO_TAKE_PATTERNS.matches_by_pattern(text):
+            for match in matches:
+                cleaned = self.clean_text(match)
+                if cleaned and len(cleaned) > 5:
+                    standardized = self.simplify_how_to_take(cleaned)
+                    if standardized not in all_instructions:
+                        all_instructions.append(standardized)
         
         # Look for specific instruction sections
-        instruction_sections = [
-            r'Available as:\s*([^,\n\r]+)',
-            r'Form[s]?:\s*([^,\n\r]+)',
-            r'Administration:\s*([^,\n\r]+)',
-            r'Instructions:\s*([^,\n\r]+)'
-        ]
-        
-        for pattern in instruction_sections:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for match in patterns.INSTRUCTION_SECTION_PATTERNS.first_matches(text):
             if match:
-                instruction_text = self.clean_text(match.group(1))
+                instruction_text = self.clean_text(match)
                 if instruction_text and len(instruction_text) > 5:
                     standardized = self.simplify_how_to_take(instruction_text)
                     if standardized not in all_instructions:
@@ -3018,7 +2935,7 @@ class MedicationScraper:
             latest_file = files[0]
             
             self.print_success(f"Processing: {latest_file}")
-            df = pd.read_excel(f'../Analysis/{latest_file}')
+            df = sheet_loader.read_table(f'../Analysis/{latest_file}')
             
             # Filter to only medication rows (skip headers and statistics)
             medication_df = df[
@@ -3053,22 +2970,23 @@ class MedicationScraper:
                 try:
                     # Get the medication page
                     self.driver.get("https://www.drugs.com")
-                    time.sleep(1)
                     
                     # Search for the medication
                     search_box = WebDriverWait(self.driver, 5).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='searchterm']"))
                     )
+                    search_page_url = self.driver.current_url
                     search_box.clear()
                     search_box.send_keys(medication_name)
                     search_box.send_keys(Keys.RETURN)
-                    time.sleep(2)
+                    wait_for_navigation(self.driver, search_page_url, 10)
                     
                     # Find and click the medication link
                     medication_link = self.find_medication_link(medication_name)
                     if medication_link:
+                        results_url = self.driver.current_url
                         self.driver.execute_script("arguments[0].click();", medication_link)
-                        time.sleep(3)
+                        wait_for_navigation(self.driver, results_url, 10)
                         
                         # Extract improved brand names
                         improved_brand = self.extract_brand_name(self.driver.page_source, medication_name)
@@ -3082,17 +3000,17 @@ class MedicationScraper:
                     
                     total_processed += 1
                     
-                    # Restart driver every 10 medications
-                    if total_processed % 10 == 0:
-                        self.print_info("Restarting driver...")
-                        self.restart_driver()
+                    # Replace the browser only when its health calls for it
+                    self.recycle_driver_if_unhealthy()
                     
                 except Exception as e:
                     self.print_error(f"Error processing {medication_name}: {e}")
+                    self.note_driver_error()
                     continue
             
             if self.driver:
                 self.driver.quit()
+            self.standby.close()
             
             # Save the improved data
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -3115,20 +3033,9 @@ class MedicationScraper:
     
     def find_food_instructions(self, text):
         """Find food-related administration instructions"""
-        food_patterns = [
-            r'(?:take|use|administer)\s+(?:with|without)\s+(?:food|meals)',
-            r'(?:take|use|administer)\s+(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            r'(?:with|without)\s+(?:food|meals)',
-            r'(?:on\s+)?(?:empty|full)\s+(?:stomach)',
-            r'(?:take|use)\s+(?:before|after|during)\s+(?:meals|food)'
-        ]
-        
         food_instructions = []
-        for pattern in food_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for matches in patterns.FOOD_INSTRUCTION_PATTERNS.matches_by_pattern(text):
             for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
                 cleaned = self.clean_text(match)
                 if cleaned and len(cleaned) > 5:
                     standardized = self.simplify_how_to_take(cleaned)
@@ -3137,16 +3044,32 @@ class MedicationScraper:
         
         return food_instructions
 
+def get_worker_count(args):
+    """Read --workers N (or --workers=N) from the command line"""
+    for i, arg in enumerate(args):
+        try:
+            if arg.startswith('--workers='):
+                return max(1, int(arg.split('=', 1)[1]))
+            if arg == '--workers' and i + 1 < len(args):
+                return max(1, int(args[i + 1]))
+        except ValueError:
+            print(f"Invalid worker count in '{arg}', using 1")
+            return 1
+    return 1
+
 def main():
-    if len(sys.argv) > 1:
+    workers = get_worker_count(sys.argv[1:])
+    start_run('medication_scraper')
+    
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('--'):
         command = sys.argv[1].lower()
         
         if command == "scrape":
-            scraper = MedicationScraper()
+            scraper = MedicationScraper(workers=workers)
             scraper.run()
         elif command == "test":
             # Test with 10 medications
-            scraper = MedicationScraper()
+            scraper = MedicationScraper(workers=workers)
             scraper.run(limit=10)
         elif command == "reprocess":
             scraper = MedicationScraper()
@@ -3157,11 +3080,14 @@ def main():
             print("  test      - Test with 10 medications to verify brand name extraction")
             print("  reprocess - Reprocess existing data to extract multiple brand names")
             print("  help      - Show this help message")
+            print("")
+            print("Options:")
+            print("  --workers N - Number of parallel browsers for scrape/test (default: 1)")
         else:
             print(f"Unknown command: {command}")
             print("Use 'help' to see available commands")
     else:
-        scraper = MedicationScraper()
+        scraper = MedicationScraper(workers=workers)
         scraper.run()
 
 if __name__ == "__main__":
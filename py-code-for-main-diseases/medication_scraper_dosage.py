@@ -13,24 +13,29 @@ import os
 import time
 import random
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
-import re
+from selenium.common.exceptions import WebDriverException, NoSuchElementException
 from bs4 import BeautifulSoup
-import json
-import sys
 from tqdm import tqdm
 import colorama
 from colorama import Fore, Back, Style
-from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 import google.generativeai as genai
 from dotenv import load_dotenv
+from page_cache import get_page_cache
+from llm_cache import get_llm_cache
+from llm_dispatcher import get_llm_dispatcher
+from llm_batch import prune_page_text, run_batch_prompt
+from result_store import get_result_store
+from cache_journal import CacheJournal
+from drug_names import drug_key, get_drug_index, search_name
+import sheet_loader
+from instrumentation import span, timed, start_run
+from page_waits import wait_for_ready, wait_for_any, wait_for_navigation
+from driver_factory import create_chrome_driver
 import glob
 
 # Initialize colorama
@@ -39,8 +44,11 @@ colorama.init(autoreset=True)
 # Load environment variables
 load_dotenv('/Users/juanlu/Documents/Wye/scrapper/.env')
 
+# Lines worth keeping when page text is pruned for batched prompts
+DOSAGE_KEYWORDS = ['dose', 'dosage', 'mg', 'mcg', 'tablet', 'capsule', 'daily', 'every', 'take', 'adult', 'maximum', 'food']
+
 class WebMDDosageScraper:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, llm_batch_size=5):
         self.headless = headless
         self.driver = None
         self.wait = None
@@ -55,12 +63,32 @@ class WebMDDosageScraper:
         self.model = genai.GenerativeModel("gemini-1.5-flash")
         
         # Cache for processed medications
-        self.cache_file = "dosage_cache.json"
+        self.cache_file = "dosage_cache.jsonl"
+        self.cache_journal = CacheJournal(self.cache_file)
+        
+        # Cache entries are keyed by drug key, so "Aspirin" and "aspirin 81 mg" share one entry
+        self.drug_index = get_drug_index()
+        
+        # Rolling checkpoint: one line per newly processed row, replayed on startup.
+        # Rows are written in groups (every checkpoint_every rows or checkpoint_interval seconds)
+        self.unsaved_rows = set()
+        self.checkpoint_every = 10
+        self.checkpoint_interval = 30
+        self.last_checkpoint = time.time()
+        self.checkpoint = CacheJournal("medication_dosage_checkpoint.jsonl")
         self.cache = self.load_cache()
         
+        # Raw pages shared with the other scrapers
+        self.page_cache = get_page_cache()
+        
         # Results storage
         self.results = {}
         
+        # Medications per LLM request (1 = one request per medication)
+        self.llm_batch_size = max(1, int(llm_batch_size))
+        self.defer_llm = False
+        self.used_browser = False
+        
         self.init_driver()
         
     def print_header(self, title, subtitle=""):
@@ -93,20 +121,24 @@ class WebMDDosageScraper:
         print(f"{Fore.CYAN}ℹ️ {message}{Style.RESET_ALL}")
     
     def load_cache(self):
-        """Load existing cache if available"""
+        """Load existing cache if available (replays the journal), keyed by drug key"""
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            entries = self.cache_journal.load()
+            cache = {}
+            for name, value in entries.items():
+                cache.setdefault(drug_key(name), value)
+            # Entries keyed by name are rewritten under their drug key once, so saves do not add them again
+            if cache.keys() != entries.keys():
+                self.cache_journal.replace(cache)
+            return cache
         except Exception as e:
             self.print_warning(f"Could not load cache: {e}")
         return {}
     
     def save_cache(self):
-        """Save cache to file"""
+        """Append new or changed cache entries to the journal"""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, indent=2, ensure_ascii=False)
+            self.cache_journal.save(self.cache)
         except Exception as e:
             self.print_error(f"Could not save cache: {e}")
     
@@ -123,23 +155,8 @@ class WebMDDosageScraper:
     
     def setup_driver(self, headless=False):
         """Set up Chrome driver with options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Add user agent to avoid detection
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
         try:
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            return driver
+            return create_chrome_driver('webmd', headless, ["--disable-web-security"])
         except Exception as e:
             self.print_error(f"Error setting up Chrome driver: {e}")
             raise e
@@ -149,7 +166,7 @@ class WebMDDosageScraper:
         try:
             self.print_info(f"Navigating to {self.base_url}")
             self.driver.get(self.base_url)
-            time.sleep(3)
+            wait_for_ready(self.driver, 10)
             
             # Wait for page to load
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
@@ -160,6 +177,7 @@ class WebMDDosageScraper:
             self.print_error(f"Failed to navigate to WebMD: {e}")
             return False
     
+    @timed('fetch.webmd')
     def search_medication(self, medication_name):
         """Search for a medication on WebMD"""
         try:
@@ -167,6 +185,12 @@ class WebMDDosageScraper:
             clean_name = self.clean_medication_name(medication_name)
             self.print_info(f"Searching for: {clean_name}")
             
+            # Check page cache first
+            cached_url, cached_page = self.page_cache.get_by_alias(f"webmd:{clean_name}")
+            if cached_page:
+                self.print_info(f"Using cached page: {cached_url}")
+                return self.extract_dosage_info_from_html(cached_page)
+            
             # Navigate to search page first
             if not self.navigate_to_webmd():
                 return None
@@ -184,27 +208,23 @@ class WebMDDosageScraper:
                 '.webmd-input__inner'
             ]
             
-            search_box = None
-            for selector in search_selectors:
-                try:
-                    search_box = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                    break
-                except TimeoutException:
-                    continue
+            # One wait for whichever selector appears first
+            selector, search_box = wait_for_any(self.driver, search_selectors, 10)
             
             if not search_box:
                 # Try alternative approach - direct search URL
                 search_url = f"https://www.webmd.com/drugs/2/search?type=drugs&query={clean_name}"
                 self.driver.get(search_url)
-                time.sleep(3)
+                wait_for_ready(self.driver, 10)
                 return self.handle_search_results(clean_name)
             
             # Clear and enter search term
+            search_page_url = self.driver.current_url
             search_box.clear()
             search_box.send_keys(clean_name)
             search_box.send_keys(Keys.RETURN)
             
-            time.sleep(3)
+            wait_for_navigation(self.driver, search_page_url, 10)
             
             # Look for direct drug page or search results
             return self.handle_search_results(clean_name)
@@ -215,19 +235,14 @@ class WebMDDosageScraper:
     
     def clean_medication_name(self, name):
         """Clean medication name for search"""
-        # Remove common suffixes and prefixes
-        clean_name = re.sub(r'\s+(tablet|capsule|injection|cream|ointment|gel|liquid|suspension|er|xr|xl)s?$', '', name.lower())
-        clean_name = re.sub(r'\s+\d+\s*(mg|mcg|g|ml|iu).*$', '', clean_name)
-        clean_name = re.sub(r'\s+oral.*$', '', clean_name)
-        clean_name = clean_name.strip()
-        return clean_name
+        return search_name(name)
     
     def handle_search_results(self, medication_name):
         """Handle search results and find the most relevant drug page"""
         try:
             # Check if we're already on a drug information page
             if "drug" in self.driver.current_url.lower() and "drug-" in self.driver.current_url.lower():
-                return self.extract_dosage_info_from_page()
+                return self.extract_dosage_info_from_page(medication_name)
             
             # Look for search results links
             result_selectors = [
@@ -244,9 +259,10 @@ class WebMDDosageScraper:
                     results = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if results:
                         # Click on the first relevant result
+                        results_url = self.driver.current_url
                         results[0].click()
-                        time.sleep(3)
-                        return self.extract_dosage_info_from_page()
+                        wait_for_navigation(self.driver, results_url, 10)
+                        return self.extract_dosage_info_from_page(medication_name)
                 except:
                     continue
             
@@ -284,16 +300,35 @@ class WebMDDosageScraper:
             self.print_error(f"Error in generic search: {e}")
             return None
     
-    def extract_dosage_info_from_page(self):
+    def extract_dosage_info_from_page(self, medication_name=None):
         """Extract dosage information from the current page"""
         try:
-            # Get page source for parsing
+            self.used_browser = True
             page_source = self.driver.page_source
+            
+            # Keep the raw page so reruns skip the browser entirely
+            if medication_name:
+                self.page_cache.put_page(f"webmd:{medication_name}", self.driver.current_url, page_source)
+            
+            return self.extract_dosage_info_from_html(page_source)
+            
+        except Exception as e:
+            self.print_error(f"Error reading page: {e}")
+            return None
+    
+    @timed('parse.webmd')
+    def extract_dosage_info_from_html(self, page_source):
+        """Extract dosage information from page HTML"""
+        try:
             soup = BeautifulSoup(page_source, 'html.parser')
             
             # Extract text content
             text_content = soup.get_text()
             
+            # Batch mode only collects the text; the LLM runs later for several medications at once
+            if self.defer_llm:
+                return prune_page_text(text_content, DOSAGE_KEYWORDS)
+            
             # Use LLM to extract dosage information
             return self.extract_dosage_with_llm(text_content)
             
@@ -301,6 +336,7 @@ class WebMDDosageScraper:
             self.print_error(f"Error extracting dosage info: {e}")
             return None
     
+    @timed('llm.dosage')
     def extract_dosage_with_llm(self, page_content):
         """Use LLM to extract and summarize dosage information from page content"""
         try:
@@ -322,11 +358,12 @@ class WebMDDosageScraper:
             {page_content[:8000]}  # Limit content to avoid token limits
             """
             
-            response = self.model.generate_content(prompt)
+            # Cached, rate limited and retried by the shared dispatcher
+            response_text = get_llm_dispatcher().generate(self.model, prompt)
             
-            if response and response.text:
+            if response_text:
                 # Clean up the response and ensure it's brief
-                result = response.text.strip()
+                result = response_text.strip()
                 # If response is too long, truncate it
                 if len(result) > 200:
                     result = result[:197] + "..."
@@ -338,13 +375,102 @@ class WebMDDosageScraper:
             self.print_error(f"Error using LLM to extract dosage: {e}")
             return "Error extracting dosage information."
     
+    @timed('llm.dosage_batch')
+    def extract_dosage_batch_with_llm(self, pages):
+        """Extract dosage for several medications ({name: page_text}) with one LLM request"""
+        instructions = """Extract ONLY the most essential dosage information for each medication.
+
+Provide a BRIEF summary (maximum 2-3 lines) with only the key dosage information:
+- Standard adult dose (mg, frequency)
+- Maximum daily dose if mentioned
+- Key administration notes (with/without food, timing)
+
+Format example: "Adults: 500-1000mg every 4-6 hours. Maximum: 4000mg/day. Take with food."
+
+If no clear dosage information is found for an item, answer "No dosage information found."
+
+Keep each answer under 150 characters and focus only on practical dosing information."""
+        
+        answers = run_batch_prompt(self.model, instructions, pages)
+        if answers is None:
+            self.print_warning(f"Batch answer for {len(pages)} medications could not be parsed, falling back to one request per medication")
+            return {name: self.extract_dosage_with_llm(content) for name, content in pages.items()}
+        
+        # Keep batched answers as brief as single-item ones
+        return {name: (answer[:197] + "..." if len(answer) > 200 else answer) for name, answer in answers.items()}
+    
+    def fetch_page_text(self, medication_name):
+        """Find a medication's page and return its pruned text without calling the LLM"""
+        self.defer_llm = True
+        self.used_browser = False
+        try:
+            return self.search_medication(medication_name)
+        finally:
+            self.defer_llm = False
+    
+    @timed('item.dosage')
+    def queue_medication_for_batch(self, medication_name, idx, medications_df, pending, pending_rows):
+        """Fetch a medication's page and queue it for the next batched LLM request"""
+        # Check cache first
+        cached_key = self.drug_index.stored_key(self.cache, medication_name)
+        if cached_key is not None:
+            self.print_info(f"Found {medication_name} in cache")
+            medications_df.at[idx, 'Dosage'] = self.cache[cached_key]
+            return
+        cache_key = drug_key(medication_name)
+        
+        # Same medication listed twice in the sheet (possibly spelled differently)
+        queued_key = self.drug_index.key_of(medication_name)
+        queued_name = next((name for name in pending if self.drug_index.key_of(name) == queued_key), None)
+        if queued_name is not None:
+            pending_rows[queued_name].append(idx)
+            return
+        
+        self.print_section(f"Fetching: {medication_name}")
+        page_text = self.fetch_page_text(medication_name)
+        
+        if page_text:
+            pending[medication_name] = page_text
+            pending_rows[medication_name] = [idx]
+        else:
+            self.print_warning(f"No dosage found for {medication_name}")
+            dosage_info = "No dosage information found."
+            self.cache[cache_key] = dosage_info
+            self.save_cache()
+            medications_df.at[idx, 'Dosage'] = dosage_info
+        
+        # Random delay to avoid rate limiting (cached pages never touch the site)
+        if self.used_browser:
+            time.sleep(random.uniform(2, 5))
+    
+    def flush_llm_batch(self, pending, pending_rows, medications_df):
+        """Run one LLM request for the queued medications and store the answers"""
+        if not pending:
+            return
+        
+        self.print_info(f"Extracting dosage for {len(pending)} medications in one LLM request...")
+        results = self.extract_dosage_batch_with_llm(pending)
+        
+        for medication_name, dosage_info in results.items():
+            self.print_success(f"Successfully extracted dosage for {medication_name}")
+            self.cache[drug_key(medication_name)] = dosage_info
+            for idx in pending_rows[medication_name]:
+                medications_df.at[idx, 'Dosage'] = dosage_info
+        
+        self.save_cache()
+        pending.clear()
+        pending_rows.clear()
+    
+    @timed('item.dosage')
     def process_medication(self, medication_name):
         """Process a single medication and get its dosage information"""
         try:
             # Check cache first
-            if medication_name in self.cache:
+            cached_key = self.drug_index.stored_key(self.cache, medication_name)
+            if cached_key is not None:
                 self.print_info(f"Found {medication_name} in cache")
-                return self.cache[medication_name]
+                return self.cache[cached_key]
+            cache_key = drug_key(medication_name)
             
             self.print_section(f"Processing: {medication_name}")
             
@@ -354,12 +480,12 @@ class WebMDDosageScraper:
             if dosage_info:
                 self.print_success(f"Successfully extracted dosage for {medication_name}")
                 # Cache the result
-                self.cache[medication_name] = dosage_info
+                self.cache[cache_key] = dosage_info
                 self.save_cache()
             else:
                 self.print_warning(f"No dosage information found for {medication_name}")
                 dosage_info = "No dosage information found."
-                self.cache[medication_name] = dosage_info
+                self.cache[cache_key] = dosage_info
                 self.save_cache()
             
             # Random delay to avoid rate limiting
@@ -376,54 +502,19 @@ class WebMDDosageScraper:
         try:
             self.print_section("Loading medication data from Excel")
             
-            # Read the Excel file using openpyxl to preserve structure
-            import openpyxl
-            wb = openpyxl.load_workbook(excel_file_path)
-            ws = wb.active
-            
-            # Find the medication data header row
-            header_row = None
-            for row in range(1, 20):
-                cell_value = ws.cell(row=row, column=1).value
-                if cell_value == "Medication Name":
-                    header_row = row
-                    break
+            # Read the active sheet once and find the medication data header row
+            raw = sheet_loader.read_sheet(excel_file_path)
+            medications_df = sheet_loader.table_below_header(raw, "Medication Name", max_rows=19)
             
-            if header_row is None:
+            if medications_df is None:
                 raise ValueError("Could not find 'Medication Name' header in Excel file")
             
-            # Extract headers
-            headers = []
-            for col in range(1, ws.max_column + 1):
-                header_value = ws.cell(row=header_row, column=col).value
-                if header_value:
-                    headers.append(header_value)
-                else:
-                    headers.append(f"Unnamed: {col-1}")
-            
-            # Extract medication data
-            medications_data = []
-            for row in range(header_row + 1, ws.max_row + 1):
-                row_data = {}
-                medication_name = ws.cell(row=row, column=1).value
-                
-                if not medication_name or pd.isna(medication_name):
-                    continue
-                    
-                medication_name = str(medication_name).strip()
-                
-                # Skip summary/header rows
-                if medication_name.startswith('📊') or medication_name.startswith('📋') or medication_name.startswith('📈'):
-                    continue
-                
-                # Collect all column data for this row
-                for col in range(1, len(headers) + 1):
-                    cell_value = ws.cell(row=row, column=col).value
-                    row_data[headers[col-1]] = cell_value
-                
-                medications_data.append(row_data)
-            
-            medications_df = pd.DataFrame(medications_data)
+            # Skip empty and summary/header rows (📊 / 📋 / 📈)
+            names = sheet_loader.text_values(medications_df['Medication Name'])
+            medications_df = medications_df[
+                medications_df['Medication Name'].notna() & (names != '') &
+                ~names.str.startswith(sheet_loader.SECTION_MARKERS)
+            ].reset_index(drop=True)
             
             self.print_success(f"Loaded {len(medications_df)} medications from Excel file")
             return medications_df
@@ -444,9 +535,16 @@ class WebMDDosageScraper:
             if 'Dosage' not in medications_df.columns:
                 medications_df['Dosage'] = ''
             
+            # Resume rows processed by an interrupted run
+            self.restore_progress(medications_df)
+            
             total_medications = len(medications_df)
             self.print_info(f"Processing {total_medications} medications...")
             
+            # Medications whose page text is waiting for the next batched LLM request
+            pending = {}
+            pending_rows = {}
+            
             # Process each medication
             for idx, row in tqdm(medications_df.iterrows(), total=total_medications, desc="Processing medications"):
                 medication_name = str(row['Medication Name']).strip()
@@ -459,44 +557,107 @@ class WebMDDosageScraper:
                     self.print_info(f"Skipping {medication_name} - already has dosage data")
                     continue
                 
+                self.unsaved_rows.add(idx)
                 try:
-                    dosage_info = self.process_medication(medication_name)
-                    medications_df.at[idx, 'Dosage'] = dosage_info
+                    if self.llm_batch_size > 1:
+                        self.queue_medication_for_batch(medication_name, idx, medications_df, pending, pending_rows)
+                        if len(pending) >= self.llm_batch_size:
+                            self.flush_llm_batch(pending, pending_rows, medications_df)
+                    else:
+                        dosage_info = self.process_medication(medication_name)
+                        medications_df.at[idx, 'Dosage'] = dosage_info
                     
-                    # Save progress every 10 medications
-                    if idx % 10 == 0:
-                        self.save_progress(medications_df, excel_file_path, output_file_path)
+                    # Append the rows processed since the last checkpoint
+                    self.save_progress(medications_df, excel_file_path, output_file_path)
                         
                 except Exception as e:
                     self.print_error(f"Error processing {medication_name}: {e}")
                     medications_df.at[idx, 'Dosage'] = "Error retrieving dosage information."
             
+            # Remaining partial batch
+            try:
+                self.flush_llm_batch(pending, pending_rows, medications_df)
+            except Exception as e:
+                self.print_error(f"Error processing final batch: {e}")
+            self.save_progress(medications_df, excel_file_path, output_file_path, force=True)
+            
             # Final save
             self.save_final_results(medications_df, excel_file_path, output_file_path)
             
             self.print_success("All medications processed successfully!")
+            self.print_info(get_llm_cache().summary())
+            self.print_info(get_llm_dispatcher().summary())
             return medications_df
             
         except Exception as e:
             self.print_error(f"Error in process_all_medications: {e}")
             raise e
     
-    def save_progress(self, medications_df, original_file_path, output_file_path):
-        """Save progress to avoid losing work"""
+    def is_error_value(self, value):
+        """Placeholder written for a failed medication ("Error retrieving/extracting ...")"""
+        return str(value).startswith('Error ')
+    
+    def checkpoint_rows(self, medications_df, row_indexes):
+        """{row index: {medication, value}} for the given rows that have dosage data (errors left out so they are retried)"""
+        rows = {}
+        for idx in row_indexes:
+            value = medications_df.at[idx, 'Dosage']
+            if pd.notna(value) and str(value).strip() and not self.is_error_value(value):
+                rows[str(idx)] = {'medication': str(medications_df.at[idx, 'Medication Name']).strip(), 'value': value}
+        return rows
+    
+    def save_progress(self, medications_df, original_file_path, output_file_path, force=False):
+        """Append the rows filled since the last checkpoint, in groups unless forced"""
+        if not force and len(self.unsaved_rows) < self.checkpoint_every and time.time() - self.last_checkpoint < self.checkpoint_interval:
+            return
         try:
-            # Create backup with proper structure
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = f"medication_dosage_progress_{timestamp}.xlsx"
-            
-            # Save with new dosage column (just the medications data for progress)
-            medications_df.to_excel(backup_file, index=False)
-            self.print_info(f"Progress saved to {backup_file}")
-            
+            # Rows still waiting for their batched LLM answer stay unsaved
+            finished = {
+                idx for idx in self.unsaved_rows
+                if pd.notna(medications_df.at[idx, 'Dosage']) and str(medications_df.at[idx, 'Dosage']).strip()
+            }
+            self.checkpoint.save(self.checkpoint_rows(medications_df, finished))
+            self.unsaved_rows -= finished
+            self.last_checkpoint = time.time()
         except Exception as e:
             self.print_warning(f"Could not save progress: {e}")
     
+    def restore_progress(self, medications_df):
+        """Fill in rows recorded in the checkpoint by an interrupted run"""
+        try:
+            restored = 0
+            for key, entry in self.checkpoint.load().items():
+                idx = int(key)
+                # Only reuse a row if it still holds the same medication
+                if idx not in medications_df.index or str(medications_df.at[idx, 'Medication Name']).strip() != entry['medication']:
+                    continue
+                # Failures recorded by older checkpoints are processed again
+                if self.is_error_value(entry['value']):
+                    continue
+                current = medications_df.at[idx, 'Dosage']
+                if pd.isna(current) or not str(current).strip():
+                    medications_df.at[idx, 'Dosage'] = entry['value']
+                    restored += 1
+            if restored:
+                self.print_success(f"Resumed {restored} medications from {self.checkpoint.path}")
+        except Exception as e:
+            self.print_warning(f"Could not restore progress: {e}")
+    
     def save_final_results(self, medications_df, original_file_path, output_file_path):
         """Save final results to Excel file by properly updating the original file structure and preserving formatting"""
+        # Record the LLM answers in the result store before building the Excel export
+        try:
+            outputs = {}
+            for _, row in medications_df.iterrows():
+                medication_name = str(row['Medication Name']).strip()
+                value = row.get('Dosage', '')
+                if medication_name and medication_name != 'nan' and pd.notna(value) and str(value).strip():
+                    outputs[medication_name] = str(value)
+            get_result_store().put_llm_outputs('dosage', outputs, model="gemini-1.5-flash")
+            self.print_success(f"Stored {len(outputs)} dosage entries in result store")
+        except Exception as e:
+            self.print_warning(f"Could not store results: {e}")
+        
         try:
             if output_file_path is None:
                 # Create output filename based on original in the Analysis folder
@@ -633,7 +794,8 @@ class WebMDDosageScraper:
                 self.print_warning(f"Could not adjust column width: {e}")
             
             # Save the updated workbook
-            wb.save(output_file_path)
+            with span('excel.save'):
+                wb.save(output_file_path)
             
             self.print_success(f"Final results saved to: {output_file_path}")
             self.print_info(f"📊 Total medications processed: {medications_processed}")
@@ -643,60 +805,17 @@ class WebMDDosageScraper:
             self.print_info(f"✅ Dosage added in new column {next_column}")
             self.print_info(f"🎨 Original formatting preserved")
             
-            # Clean up temporary files after successful completion
-            self.cleanup_temporary_files()
+            # Everything in the checkpoint is in the output file now
+            self.checkpoint.delete()
             
             return output_file_path
             
         except Exception as e:
             self.print_error(f"Error saving final results: {e}")
-            # Fallback - save just the medications data
-            fallback_file = f"medication_dosage_fallback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            medications_df.to_excel(fallback_file, index=False)
-            self.print_warning(f"Saved fallback file: {fallback_file}")
+            # The checkpoint keeps every processed row for the next run
+            self.save_progress(medications_df, original_file_path, output_file_path, force=True)
+            self.print_warning(f"Processed rows kept in {self.checkpoint.path}")
     
-    def cleanup_temporary_files(self):
-        """Clean up temporary files after successful completion"""
-        try:
-            files_deleted = 0
-            
-            # Delete progress files
-            progress_files = glob.glob("medication_dosage_progress_*.xlsx")
-            for file in progress_files:
-                try:
-                    os.remove(file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted progress file: {file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete {file}: {e}")
-            
-            # Delete fallback files
-            fallback_files = glob.glob("medication_dosage_fallback_*.xlsx")
-            for file in fallback_files:
-                try:
-                    os.remove(file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted fallback file: {file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete {file}: {e}")
-            
-            # Delete cache file
-            if os.path.exists(self.cache_file):
-                try:
-                    os.remove(self.cache_file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted cache file: {self.cache_file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete cache file: {e}")
-            
-            if files_deleted > 0:
-                self.print_success(f"🧹 Cleanup completed: {files_deleted} temporary files deleted")
-            else:
-                self.print_info("🧹 No temporary files to clean up")
-                
-        except Exception as e:
-            self.print_warning(f"Error during cleanup: {e}")
-
     def cleanup(self):
         """Clean up resources"""
         try:
@@ -708,6 +827,7 @@ class WebMDDosageScraper:
 def main():
     """Main function to run the scraper"""
     print(f"{Fore.GREEN}{Style.BRIGHT}💊 WebMD Dosage Information Scraper{Style.RESET_ALL}")
+    start_run('dosage_scraper')
     print(f"{Fore.CYAN}Starting dosage information extraction process...{Style.RESET_ALL}")
     
     # Configuration - automatically find the latest side effects output file
@@ -738,7 +858,7 @@ def main():
         print(f"\n{Fore.GREEN}{Style.BRIGHT}✅ Successfully completed dosage extraction!")
         print(f"{Fore.CYAN}📊 Processed {len(results_df)} medications")
         print(f"{Fore.CYAN}💾 Results saved to Excel file")
-        print(f"{Fore.CYAN}🧹 Temporary files cleaned up{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}🧹 Progress checkpoint cleared{Style.RESET_ALL}")
         
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}⚠️ Process interrupted by user{Style.RESET_ALL}")
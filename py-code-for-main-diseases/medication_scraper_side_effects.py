@@ -13,16 +13,12 @@ import os
 import time
 import random
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
-import re
+from selenium.common.exceptions import WebDriverException, NoSuchElementException
 from bs4 import BeautifulSoup
-import json
 import sys
 from tqdm import tqdm
 import colorama
@@ -31,6 +27,17 @@ from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 import google.generativeai as genai
 from dotenv import load_dotenv
+from page_cache import get_page_cache
+from llm_cache import get_llm_cache
+from llm_dispatcher import get_llm_dispatcher
+from llm_batch import prune_page_text, run_batch_prompt
+from result_store import get_result_store
+from cache_journal import CacheJournal
+from drug_names import drug_key, get_drug_index, search_name
+import sheet_loader
+from instrumentation import span, timed, start_run
+from page_waits import wait_for_ready, wait_for_any, wait_for_navigation
+from driver_factory import create_chrome_driver
 
 # Initialize colorama
 colorama.init(autoreset=True)
@@ -38,8 +45,11 @@ colorama.init(autoreset=True)
 # Load environment variables
 load_dotenv('/Users/juanlu/Documents/Wye/scrapper/.env')
 
+# Lines worth keeping when page text is pruned for batched prompts
+SIDE_EFFECTS_KEYWORDS = ['side effect', 'adverse', 'reaction', 'allergic', 'call your doctor', 'emergency', 'serious', 'common', 'rare', 'symptom']
+
 class MedlinePlusSideEffectsScraper:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, llm_batch_size=5):
         self.headless = headless
         self.driver = None
         self.wait = None
@@ -55,12 +65,32 @@ class MedlinePlusSideEffectsScraper:
         self.model = genai.GenerativeModel("gemini-1.5-flash")
         
         # Cache for processed medications
-        self.cache_file = "side_effects_cache.json"
+        self.cache_file = "side_effects_cache.jsonl"
+        self.cache_journal = CacheJournal(self.cache_file)
+        
+        # Cache entries are keyed by drug key, so "Aspirin" and "aspirin 81 mg" share one entry
+        self.drug_index = get_drug_index()
+        
+        # Rolling checkpoint: one line per newly processed row, replayed on startup.
+        # Rows are written in groups (every checkpoint_every rows or checkpoint_interval seconds)
+        self.unsaved_rows = set()
+        self.checkpoint_every = 10
+        self.checkpoint_interval = 30
+        self.last_checkpoint = time.time()
+        self.checkpoint = CacheJournal("medication_side_effects_checkpoint.jsonl")
         self.cache = self.load_cache()
         
+        # Raw pages shared with the other scrapers
+        self.page_cache = get_page_cache()
+        
         # Results storage
         self.results = {}
         
+        # Medications per LLM request (1 = one request per medication)
+        self.llm_batch_size = max(1, int(llm_batch_size))
+        self.defer_llm = False
+        self.used_browser = False
+        
         self.init_driver()
         
     def print_header(self, title, subtitle=""):
@@ -93,20 +123,24 @@ class MedlinePlusSideEffectsScraper:
         print(f"{Fore.CYAN}ℹ️ {message}{Style.RESET_ALL}")
     
     def load_cache(self):
-        """Load existing cache if available"""
+        """Load existing cache if available (replays the journal), keyed by drug key"""
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            entries = self.cache_journal.load()
+            cache = {}
+            for name, value in entries.items():
+                cache.setdefault(drug_key(name), value)
+            # Entries keyed by name are rewritten under their drug key once, so saves do not add them again
+            if cache.keys() != entries.keys():
+                self.cache_journal.replace(cache)
+            return cache
         except Exception as e:
             self.print_warning(f"Could not load cache: {e}")
         return {}
     
     def save_cache(self):
-        """Save cache to file"""
+        """Append new or changed cache entries to the journal"""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, indent=2, ensure_ascii=False)
+            self.cache_journal.save(self.cache)
         except Exception as e:
             self.print_error(f"Could not save cache: {e}")
     
@@ -123,23 +157,8 @@ class MedlinePlusSideEffectsScraper:
     
     def setup_driver(self, headless=False):
         """Set up Chrome driver with options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Add user agent to avoid detection
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
         try:
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            return driver
+            return create_chrome_driver('medlineplus', headless, ["--disable-web-security"])
         except Exception as e:
             self.print_error(f"Error setting up Chrome driver: {e}")
             raise e
@@ -149,7 +168,7 @@ class MedlinePlusSideEffectsScraper:
         try:
             self.print_info(f"Navigating to {self.base_url}")
             self.driver.get(self.base_url)
-            time.sleep(3)
+            wait_for_ready(self.driver, 10)
             
             # Wait for page to load
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
@@ -160,6 +179,7 @@ class MedlinePlusSideEffectsScraper:
             self.print_error(f"Failed to navigate to MedlinePlus: {e}")
             return False
     
+    @timed('fetch.medlineplus')
     def search_medication(self, medication_name):
         """Search for a medication on MedlinePlus"""
         try:
@@ -167,6 +187,12 @@ class MedlinePlusSideEffectsScraper:
             clean_name = self.clean_medication_name(medication_name)
             self.print_info(f"Searching for: {clean_name}")
             
+            # Check page cache first
+            cached_url, cached_page = self.page_cache.get_by_alias(f"medlineplus:{clean_name}")
+            if cached_page:
+                self.print_info(f"Using cached page: {cached_url}")
+                return self.extract_drug_info_from_html(cached_page)
+            
             # Navigate to search page first
             if not self.navigate_to_medlineplus():
                 return None
@@ -181,27 +207,23 @@ class MedlinePlusSideEffectsScraper:
                 'input[aria-label*="search"]'
             ]
             
-            search_box = None
-            for selector in search_selectors:
-                try:
-                    search_box = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                    break
-                except TimeoutException:
-                    continue
+            # One wait for whichever selector appears first
+            selector, search_box = wait_for_any(self.driver, search_selectors, 10)
             
             if not search_box:
                 # Try alternative approach - direct URL construction
                 search_url = f"https://medlineplus.gov/druginfo/medmaster/search.html?query={clean_name}"
                 self.driver.get(search_url)
-                time.sleep(3)
-                return self.extract_drug_info_from_page()
+                wait_for_ready(self.driver, 10)
+                return self.extract_drug_info_from_page(clean_name)
             
             # Clear and enter search term
+            search_page_url = self.driver.current_url
             search_box.clear()
             search_box.send_keys(clean_name)
             search_box.send_keys(Keys.RETURN)
             
-            time.sleep(3)
+            wait_for_navigation(self.driver, search_page_url, 10)
             
             # Look for direct drug page or search results
             return self.handle_search_results(clean_name)
@@ -212,19 +234,14 @@ class MedlinePlusSideEffectsScraper:
     
     def clean_medication_name(self, name):
         """Clean medication name for search"""
-        # Remove common suffixes and prefixes
-        clean_name = re.sub(r'\s+(tablet|capsule|injection|cream|ointment|gel|liquid|suspension|er|xr|xl)s?$', '', name.lower())
-        clean_name = re.sub(r'\s+\d+\s*(mg|mcg|g|ml|iu).*$', '', clean_name)
-        clean_name = re.sub(r'\s+oral.*$', '', clean_name)
-        clean_name = clean_name.strip()
-        return clean_name
+        return search_name(name)
     
     def handle_search_results(self, medication_name):
         """Handle search results and find the most relevant drug page"""
         try:
             # Check if we're already on a drug information page
             if "druginfo" in self.driver.current_url.lower():
-                return self.extract_drug_info_from_page()
+                return self.extract_drug_info_from_page(medication_name)
             
             # Look for search results links
             result_selectors = [
@@ -240,9 +257,10 @@ class MedlinePlusSideEffectsScraper:
                     results = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if results:
                         # Click on the first relevant result
+                        results_url = self.driver.current_url
                         results[0].click()
-                        time.sleep(3)
-                        return self.extract_drug_info_from_page()
+                        wait_for_navigation(self.driver, results_url, 10)
+                        return self.extract_drug_info_from_page(medication_name)
                 except:
                     continue
             
@@ -280,16 +298,35 @@ class MedlinePlusSideEffectsScraper:
             self.print_error(f"Error in generic search: {e}")
             return None
     
-    def extract_drug_info_from_page(self):
+    def extract_drug_info_from_page(self, medication_name=None):
         """Extract drug information including side effects from the current page"""
         try:
-            # Get page source for parsing
+            self.used_browser = True
             page_source = self.driver.page_source
+            
+            # Keep the raw page so reruns skip the browser entirely
+            if medication_name:
+                self.page_cache.put_page(f"medlineplus:{medication_name}", self.driver.current_url, page_source)
+            
+            return self.extract_drug_info_from_html(page_source)
+            
+        except Exception as e:
+            self.print_error(f"Error reading page: {e}")
+            return None
+    
+    @timed('parse.medlineplus')
+    def extract_drug_info_from_html(self, page_source):
+        """Extract drug information including side effects from page HTML"""
+        try:
             soup = BeautifulSoup(page_source, 'html.parser')
             
             # Extract text content
             text_content = soup.get_text()
             
+            # Batch mode only collects the text; the LLM runs later for several medications at once
+            if self.defer_llm:
+                return prune_page_text(text_content, SIDE_EFFECTS_KEYWORDS)
+            
             # Use LLM to extract side effects information
             return self.extract_side_effects_with_llm(text_content)
             
@@ -297,6 +334,7 @@ class MedlinePlusSideEffectsScraper:
             self.print_error(f"Error extracting drug info: {e}")
             return None
     
+    @timed('llm.side_effects')
     def extract_side_effects_with_llm(self, page_content):
         """Use LLM to extract and summarize side effects from page content"""
         try:
@@ -317,10 +355,11 @@ class MedlinePlusSideEffectsScraper:
             {page_content[:8000]}  # Limit content to avoid token limits
             """
             
-            response = self.model.generate_content(prompt)
+            # Cached, rate limited and retried by the shared dispatcher
+            response_text = get_llm_dispatcher().generate(self.model, prompt)
             
-            if response and response.text:
-                return response.text.strip()
+            if response_text:
+                return response_text.strip()
             else:
                 return "No side effects information could be extracted."
                 
@@ -328,13 +367,100 @@ class MedlinePlusSideEffectsScraper:
             self.print_error(f"Error using LLM to extract side effects: {e}")
             return "Error extracting side effects information."
     
+    @timed('llm.side_effects_batch')
+    def extract_side_effects_batch_with_llm(self, pages):
+        """Extract side effects for several medications ({name: page_text}) with one LLM request"""
+        instructions = """Extract side effects information for each medication.
+
+Provide a comprehensive but concise summary of side effects in the following format:
+
+COMMON SIDE EFFECTS: [list the most common side effects]
+SERIOUS SIDE EFFECTS: [list serious/severe side effects if mentioned]
+RARE SIDE EFFECTS: [list rare side effects if mentioned]
+
+If no side effects are clearly mentioned for an item, answer "No side effects information found on this page."
+
+Keep each answer under 500 words and focus only on side effects information."""
+        
+        answers = run_batch_prompt(self.model, instructions, pages)
+        if answers is None:
+            self.print_warning(f"Batch answer for {len(pages)} medications could not be parsed, falling back to one request per medication")
+            return {name: self.extract_side_effects_with_llm(content) for name, content in pages.items()}
+        
+        return answers
+    
+    def fetch_page_text(self, medication_name):
+        """Find a medication's page and return its pruned text without calling the LLM"""
+        self.defer_llm = True
+        self.used_browser = False
+        try:
+            return self.search_medication(medication_name)
+        finally:
+            self.defer_llm = False
+    
+    @timed('item.side_effects')
+    def queue_medication_for_batch(self, medication_name, idx, medications_df, pending, pending_rows):
+        """Fetch a medication's page and queue it for the next batched LLM request"""
+        # Check cache first
+        cached_key = self.drug_index.stored_key(self.cache, medication_name)
+        if cached_key is not None:
+            self.print_info(f"Found {medication_name} in cache")
+            medications_df.at[idx, 'Side Effects'] = self.cache[cached_key]
+            return
+        cache_key = drug_key(medication_name)
+        
+        # Same medication listed twice in the sheet (possibly spelled differently)
+        queued_key = self.drug_index.key_of(medication_name)
+        queued_name = next((name for name in pending if self.drug_index.key_of(name) == queued_key), None)
+        if queued_name is not None:
+            pending_rows[queued_name].append(idx)
+            return
+        
+        self.print_section(f"Fetching: {medication_name}")
+        page_text = self.fetch_page_text(medication_name)
+        
+        if page_text:
+            pending[medication_name] = page_text
+            pending_rows[medication_name] = [idx]
+        else:
+            self.print_warning(f"No side effects found for {medication_name}")
+            side_effects = "No side effects information found."
+            self.cache[cache_key] = side_effects
+            self.save_cache()
+            medications_df.at[idx, 'Side Effects'] = side_effects
+        
+        # Random delay to avoid rate limiting (cached pages never touch the site)
+        if self.used_browser:
+            time.sleep(random.uniform(2, 5))
+    
+    def flush_llm_batch(self, pending, pending_rows, medications_df):
+        """Run one LLM request for the queued medications and store the answers"""
+        if not pending:
+            return
+        
+        self.print_info(f"Extracting side effects for {len(pending)} medications in one LLM request...")
+        results = self.extract_side_effects_batch_with_llm(pending)
+        
+        for medication_name, side_effects in results.items():
+            self.print_success(f"Successfully extracted side effects for {medication_name}")
+            self.cache[drug_key(medication_name)] = side_effects
+            for idx in pending_rows[medication_name]:
+                medications_df.at[idx, 'Side Effects'] = side_effects
+        
+        self.save_cache()
+        pending.clear()
+        pending_rows.clear()
+    
+    @timed('item.side_effects')
     def process_medication(self, medication_name):
         """Process a single medication and get its side effects"""
         try:
             # Check cache first
-            if medication_name in self.cache:
+            cached_key = self.drug_index.stored_key(self.cache, medication_name)
+            if cached_key is not None:
                 self.print_info(f"Found {medication_name} in cache")
-                return self.cache[medication_name]
+                return self.cache[cached_key]
+            cache_key = drug_key(medication_name)
             
             self.print_section(f"Processing: {medication_name}")
             
@@ -344,12 +470,12 @@ class MedlinePlusSideEffectsScraper:
             if side_effects:
                 self.print_success(f"Successfully extracted side effects for {medication_name}")
                 # Cache the result
-                self.cache[medication_name] = side_effects
+                self.cache[cache_key] = side_effects
                 self.save_cache()
             else:
                 self.print_warning(f"No side effects found for {medication_name}")
                 side_effects = "No side effects information found."
-                self.cache[medication_name] = side_effects
+                self.cache[cache_key] = side_effects
                 self.save_cache()
             
             # Random delay to avoid rate limiting
@@ -366,23 +492,13 @@ class MedlinePlusSideEffectsScraper:
         try:
             self.print_section("Loading medication data from Excel")
             
-            # Read the Excel file
-            df = pd.read_excel(excel_file_path)
+            # Read the sheet once; the medication data section starts after the statistics section
+            raw = sheet_loader.read_sheet(excel_file_path)
+            medications_df = sheet_loader.table_below_header(raw, "Medication Name")
             
-            # Find the medication data section (starts after the statistics section)
-            medication_start_idx = None
-            for idx, row in df.iterrows():
-                if str(row.iloc[0]).strip() == "Medication Name":
-                    medication_start_idx = idx
-                    break
-            
-            if medication_start_idx is None:
+            if medications_df is None:
                 raise ValueError("Could not find 'Medication Name' header in Excel file")
-            
-            # Extract medication data
-            medications_df = df.iloc[medication_start_idx:].copy()
-            medications_df.columns = medications_df.iloc[0]  # Set first row as headers
-            medications_df = medications_df.iloc[1:].reset_index(drop=True)  # Remove header row
+            medications_df = medications_df.reset_index(drop=True)
             
             # Remove rows with NaN medication names
             medications_df = medications_df.dropna(subset=['Medication Name'])
@@ -406,9 +522,16 @@ class MedlinePlusSideEffectsScraper:
             if 'Side Effects' not in medications_df.columns:
                 medications_df['Side Effects'] = ''
             
+            # Resume rows processed by an interrupted run
+            self.restore_progress(medications_df)
+            
             total_medications = len(medications_df)
             self.print_info(f"Processing {total_medications} medications...")
             
+            # Medications whose page text is waiting for the next batched LLM request
+            pending = {}
+            pending_rows = {}
+            
             # Process each medication
             for idx, row in tqdm(medications_df.iterrows(), total=total_medications, desc="Processing medications"):
                 medication_name = str(row['Medication Name']).strip()
@@ -421,44 +544,107 @@ class MedlinePlusSideEffectsScraper:
                     self.print_info(f"Skipping {medication_name} - already has side effects data")
                     continue
                 
+                self.unsaved_rows.add(idx)
                 try:
-                    side_effects = self.process_medication(medication_name)
-                    medications_df.at[idx, 'Side Effects'] = side_effects
+                    if self.llm_batch_size > 1:
+                        self.queue_medication_for_batch(medication_name, idx, medications_df, pending, pending_rows)
+                        if len(pending) >= self.llm_batch_size:
+                            self.flush_llm_batch(pending, pending_rows, medications_df)
+                    else:
+                        side_effects = self.process_medication(medication_name)
+                        medications_df.at[idx, 'Side Effects'] = side_effects
                     
-                    # Save progress every 10 medications
-                    if idx % 10 == 0:
-                        self.save_progress(medications_df, excel_file_path, output_file_path)
+                    # Append the rows processed since the last checkpoint
+                    self.save_progress(medications_df, excel_file_path, output_file_path)
                         
                 except Exception as e:
                     self.print_error(f"Error processing {medication_name}: {e}")
                     medications_df.at[idx, 'Side Effects'] = "Error retrieving side effects information."
             
+            # Remaining partial batch
+            try:
+                self.flush_llm_batch(pending, pending_rows, medications_df)
+            except Exception as e:
+                self.print_error(f"Error processing final batch: {e}")
+            self.save_progress(medications_df, excel_file_path, output_file_path, force=True)
+            
             # Final save
             self.save_final_results(medications_df, excel_file_path, output_file_path)
             
             self.print_success("All medications processed successfully!")
+            self.print_info(get_llm_cache().summary())
+            self.print_info(get_llm_dispatcher().summary())
             return medications_df
             
         except Exception as e:
             self.print_error(f"Error in process_all_medications: {e}")
             raise e
     
-    def save_progress(self, medications_df, original_file_path, output_file_path):
-        """Save progress to avoid losing work"""
+    def is_error_value(self, value):
+        """Placeholder written for a failed medication ("Error retrieving/extracting ...")"""
+        return str(value).startswith('Error ')
+    
+    def checkpoint_rows(self, medications_df, row_indexes):
+        """{row index: {medication, value}} for the given rows that have side effects data (errors left out so they are retried)"""
+        rows = {}
+        for idx in row_indexes:
+            value = medications_df.at[idx, 'Side Effects']
+            if pd.notna(value) and str(value).strip() and not self.is_error_value(value):
+                rows[str(idx)] = {'medication': str(medications_df.at[idx, 'Medication Name']).strip(), 'value': value}
+        return rows
+    
+    def save_progress(self, medications_df, original_file_path, output_file_path, force=False):
+        """Append the rows filled since the last checkpoint, in groups unless forced"""
+        if not force and len(self.unsaved_rows) < self.checkpoint_every and time.time() - self.last_checkpoint < self.checkpoint_interval:
+            return
         try:
-            # Create backup with proper structure
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = f"medication_side_effects_progress_{timestamp}.xlsx"
-            
-            # Save with new side effects column (just the medications data for progress)
-            medications_df.to_excel(backup_file, index=False)
-            self.print_info(f"Progress saved to {backup_file}")
-            
+            # Rows still waiting for their batched LLM answer stay unsaved
+            finished = {
+                idx for idx in self.unsaved_rows
+                if pd.notna(medications_df.at[idx, 'Side Effects']) and str(medications_df.at[idx, 'Side Effects']).strip()
+            }
+            self.checkpoint.save(self.checkpoint_rows(medications_df, finished))
+            self.unsaved_rows -= finished
+            self.last_checkpoint = time.time()
         except Exception as e:
             self.print_warning(f"Could not save progress: {e}")
     
+    def restore_progress(self, medications_df):
+        """Fill in rows recorded in the checkpoint by an interrupted run"""
+        try:
+            restored = 0
+            for key, entry in self.checkpoint.load().items():
+                idx = int(key)
+                # Only reuse a row if it still holds the same medication
+                if idx not in medications_df.index or str(medications_df.at[idx, 'Medication Name']).strip() != entry['medication']:
+                    continue
+                # Failures recorded by older checkpoints are processed again
+                if self.is_error_value(entry['value']):
+                    continue
+                current = medications_df.at[idx, 'Side Effects']
+                if pd.isna(current) or not str(current).strip():
+                    medications_df.at[idx, 'Side Effects'] = entry['value']
+                    restored += 1
+            if restored:
+                self.print_success(f"Resumed {restored} medications from {self.checkpoint.path}")
+        except Exception as e:
+            self.print_warning(f"Could not restore progress: {e}")
+    
     def save_final_results(self, medications_df, original_file_path, output_file_path):
         """Save final results to Excel file by properly updating the original file structure and preserving formatting"""
+        # Record the LLM answers in the result store before building the Excel export
+        try:
+            outputs = {}
+            for _, row in medications_df.iterrows():
+                medication_name = str(row['Medication Name']).strip()
+                value = row.get('Side Effects', '')
+                if medication_name and medication_name != 'nan' and pd.notna(value) and str(value).strip():
+                    outputs[medication_name] = str(value)
+            get_result_store().put_llm_outputs('side_effects', outputs, model="gemini-1.5-flash")
+            self.print_success(f"Stored {len(outputs)} side effects entries in result store")
+        except Exception as e:
+            self.print_warning(f"Could not store results: {e}")
+        
         try:
             if output_file_path is None:
                 # Create output filename based on original in the Analysis folder
@@ -585,17 +771,17 @@ class MedlinePlusSideEffectsScraper:
                 if side_effects != "No side effects information found.":
                     side_effects_added += 1
             
-            # Save the updated workbook
-            wb.save(output_file_path)
-            
             # Auto-adjust column width for the new Side Effects column
             try:
                 # Set a reasonable width for the Side Effects column (column G/7)
                 ws.column_dimensions['G'].width = 50  # Adjust width as needed
-                wb.save(output_file_path)  # Save again with column width
             except Exception as e:
                 self.print_warning(f"Could not adjust column width: {e}")
             
+            # Save the updated workbook (once, with the column width)
+            with span('excel.save'):
+                wb.save(output_file_path)
+            
             self.print_success(f"Final results saved to: {output_file_path}")
             self.print_info(f"📊 Total medications processed: {medications_processed}")
             self.print_info(f"💊 Side effects added: {side_effects_added}")
@@ -604,61 +790,17 @@ class MedlinePlusSideEffectsScraper:
             self.print_info(f"✅ Side Effects added in new column 7")
             self.print_info(f"🎨 Original formatting preserved")
             
-            # Clean up temporary files after successful completion
-            self.cleanup_temporary_files()
+            # Everything in the checkpoint is in the output file now
+            self.checkpoint.delete()
             
             return output_file_path
             
         except Exception as e:
             self.print_error(f"Error saving final results: {e}")
-            # Fallback - save just the medications data
-            fallback_file = f"medication_side_effects_fallback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            medications_df.to_excel(fallback_file, index=False)
-            self.print_warning(f"Saved fallback file: {fallback_file}")
+            # The checkpoint keeps every processed row for the next run
+            self.save_progress(medications_df, original_file_path, output_file_path, force=True)
+            self.print_warning(f"Processed rows kept in {self.checkpoint.path}")
     
-    def cleanup_temporary_files(self):
-        """Clean up temporary files after successful completion"""
-        try:
-            files_deleted = 0
-            
-            # Delete progress files
-            import glob
-            progress_files = glob.glob("medication_side_effects_progress_*.xlsx")
-            for file in progress_files:
-                try:
-                    os.remove(file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted progress file: {file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete {file}: {e}")
-            
-            # Delete fallback files
-            fallback_files = glob.glob("medication_side_effects_fallback_*.xlsx")
-            for file in fallback_files:
-                try:
-                    os.remove(file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted fallback file: {file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete {file}: {e}")
-            
-            # Delete cache file
-            if os.path.exists(self.cache_file):
-                try:
-                    os.remove(self.cache_file)
-                    files_deleted += 1
-                    self.print_info(f"🗑️ Deleted cache file: {self.cache_file}")
-                except Exception as e:
-                    self.print_warning(f"Could not delete cache file: {e}")
-            
-            if files_deleted > 0:
-                self.print_success(f"🧹 Cleanup completed: {files_deleted} temporary files deleted")
-            else:
-                self.print_info("🧹 No temporary files to clean up")
-                
-        except Exception as e:
-            self.print_warning(f"Error during cleanup: {e}")
-
     def cleanup(self):
         """Clean up resources"""
         try:
@@ -670,6 +812,7 @@ class MedlinePlusSideEffectsScraper:
 def main():
     """Main function to run the scraper"""
     print(f"{Fore.GREEN}{Style.BRIGHT}🔍 MedlinePlus Side Effects Scraper{Style.RESET_ALL}")
+    start_run('side_effects_scraper')
     print(f"{Fore.CYAN}Starting side effects extraction process...{Style.RESET_ALL}")
     
     # Configuration
@@ -688,7 +831,7 @@ def main():
         print(f"\n{Fore.GREEN}{Style.BRIGHT}✅ Successfully completed side effects extraction!")
         print(f"{Fore.CYAN}📊 Processed {len(results_df)} medications")
         print(f"{Fore.CYAN}💾 Results saved to Excel file")
-        print(f"{Fore.CYAN}🧹 Temporary files cleaned up{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}🧹 Progress checkpoint cleared{Style.RESET_ALL}")
         
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}⚠️ Process interrupted by user{Style.RESET_ALL}")
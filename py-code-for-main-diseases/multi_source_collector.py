@@ -0,0 +1,312 @@
+"""
+Multi-source collector
+
+The drugs.com monograph used to be fetched by MedicationScraper (brand,
+dosage, how/when to take) and again by DrugsScraper (what-is, side
+effects), and the WebMD and MedlinePlus scrapers each loaded the same
+workbook and walked the same list. The collector takes the medication list
+once, schedules each (drug, source, page type) fetch exactly once and hands
+the page to every extractor registered for it.
+
+Sources run side by side, each on its own pool: drugs.com over pooled HTTP
+with several workers, the browser-backed sources with one worker because a
+scraper owns a single driver. When no drugs.com slug guess matches, the
+drugs.com workers fall back to DrugsScraper's browser search one at a time.
+
+Usage:
+    python multi_source_collector.py [--limit N] [--workers N] [--headless]
+"""
+
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from drug_names import drug_key, get_drug_index
+from instrumentation import span, start_run
+
+
+class MultiSourceCollector:
+    def __init__(self, drug_index=None):
+        self.drug_index = drug_index or get_drug_index()
+        self.sources = {}       # (source, page type) -> fetch(medication) -> (url, page)
+        self.source_workers = {}  # source -> pool size
+        self.extractors = {}    # (source, page type) -> [(name, extract)]
+        self.pages = {}         # (drug key, source, page type) -> (url, page)
+        self.fetch_count = 0
+        self._page_locks = {}
+        self._lock = threading.Lock()
+
+    def register_source(self, source, page_type, fetch, workers=1):
+        """fetch(medication) returns (url, page) or (None, None); workers is the source's pool size"""
+        self.sources[(source, page_type)] = fetch
+        self.source_workers[source] = max(workers, self.source_workers.get(source, 1))
+
+    def register_extractor(self, source, page_type, name, extract):
+        """extract(medication, url, page) runs on every page of (source, page type)"""
+        self.extractors.setdefault((source, page_type), []).append((name, extract))
+
+    def fetch_once(self, medication, source, page_type):
+        """(url, page) for a medication, fetched at most once per run whatever the spelling"""
+        task = (self.drug_index.key_of(medication), source, page_type)
+        with self._lock:
+            if task in self.pages:
+                return self.pages[task]
+            page_lock = self._page_locks.setdefault(task, threading.Lock())
+
+        # Concurrent callers for the same page wait for the first fetch
+        with page_lock:
+            with self._lock:
+                if task in self.pages:
+                    return self.pages[task]
+            try:
+                with span(f'collect.{source}.{page_type}'):
+                    result = self.sources[(source, page_type)](medication) or (None, None)
+            except Exception as e:
+                print(f"⚠️ {source} {page_type} fetch failed for {medication}: {e}")
+                result = (None, None)
+            with self._lock:
+                self.pages[task] = result
+                self.fetch_count += 1
+        return result
+
+    def fetch_and_extract(self, medication, source, page_type, results):
+        """Fetch one page and fan it out to its extractors"""
+        url, page = self.fetch_once(medication, source, page_type)
+        if not page:
+            return
+        for name, extract in self.extractors.get((source, page_type), []):
+            try:
+                value = extract(medication, url, page)
+            except Exception as e:
+                print(f"⚠️ Extractor {name} failed for {medication}: {e}")
+                continue
+            if value is not None:
+                with self._lock:
+                    results[medication][name] = value
+
+    def collect(self, medications):
+        """{medication: {extractor name: value}} with every needed page fetched once"""
+        medications = self.drug_index.dedupe(medications)
+        results = {medication: {} for medication in medications}
+        tasks = [task for task in self.sources if self.extractors.get(task)]
+
+        pools = {
+            source: ThreadPoolExecutor(max_workers=self.source_workers[source], thread_name_prefix=source)
+            for source in {source for source, _ in tasks}
+        }
+        try:
+            futures = [
+                pools[source].submit(self.fetch_and_extract, medication, source, page_type, results)
+                for medication in medications
+                for source, page_type in tasks
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return results
+
+
+ANALYSIS_FILE = '/Users/juanlu/Documents/Wye/scrapper/Analysis/main_diseases_analysis_final.xlsx'
+
+
+def load_medication_list(excel_path=ANALYSIS_FILE):
+    """Medications of the 'All Unique Medications' sheet (column A from row 9)"""
+    import sheet_loader
+    raw = sheet_loader.read_sheet(excel_path, "All Unique Medications")
+    names = raw.iloc[8:, 0]
+    return sheet_loader.text_values(names[sheet_loader.medication_rows_mask(names)]).tolist()
+
+
+def browser_fallback(drugs_scraper, drug_index):
+    """Wraps drugs.com fetchers so a miss of the slug guesses falls back to the browser search"""
+    browser_lock = threading.Lock()
+    searched = set()
+
+    def wrap(fetch):
+        def fetch_with_fallback(medication):
+            url, html = fetch(medication)
+            if html:
+                return url, html
+
+            # One driver, so one search at a time; the search stores both pages under the drug's aliases
+            with browser_lock:
+                url, html = fetch(medication)
+                if html:
+                    return url, html
+                key = drug_index.key_of(medication)
+                if key in searched:
+                    return None, None
+                searched.add(key)
+                print(f"  ↪️  No direct drugs.com page for {medication}, searching in the browser")
+                if drugs_scraper.search_drug_pages(medication):
+                    return fetch(medication)
+            return None, None
+
+        return fetch_with_fallback
+
+    return wrap
+
+
+def build_collector(medication_scraper, drugs_scraper, dosage_scraper, side_effects_scraper, http_workers=4):
+    """Collector wired to the existing scrapers' fetchers and extractors"""
+    collector = MultiSourceCollector()
+    direct_fetcher = medication_scraper.direct_fetcher
+
+    # Main and side effects pages share one search per drug
+    with_fallback = browser_fallback(drugs_scraper, collector.drug_index)
+
+    # drugs.com monograph: brand/dosage/how/when and the "What is" text from one fetch
+    collector.register_source('drugs.com', 'main', with_fallback(direct_fetcher.fetch_drug_page), workers=http_workers)
+    collector.register_extractor('drugs.com', 'main', 'medication_info',
+                                 lambda name, url, html: medication_scraper.extract_medication_info(html, name))
+    collector.register_extractor('drugs.com', 'main', 'what_is',
+                                 lambda name, url, html: drugs_scraper.extract_what_is_from_html(html, name))
+
+    collector.register_source('drugs.com', 'sfx', with_fallback(direct_fetcher.fetch_side_effects_page), workers=http_workers)
+    collector.register_extractor('drugs.com', 'sfx', 'side_effects_content',
+                                 lambda name, url, html: drugs_scraper.extract_side_effects_from_html(html, name))
+
+    # Browser-backed sources hand back pruned page text for the batched LLM step;
+    # drugs those scrapers already answered are not fetched again
+    collector.register_source('webmd', 'dosage',
+                              lambda name: (None, None) if cached_answer(dosage_scraper, name) is not None
+                              else (None, dosage_scraper.fetch_page_text(name)))
+    collector.register_extractor('webmd', 'dosage', 'dosage_page', lambda name, url, text: text)
+
+    collector.register_source('medlineplus', 'drug',
+                              lambda name: (None, None) if cached_answer(side_effects_scraper, name) is not None
+                              else (None, side_effects_scraper.fetch_page_text(name)))
+    collector.register_extractor('medlineplus', 'drug', 'side_effects_page', lambda name, url, text: text)
+    return collector
+
+
+def cached_answer(scraper, name):
+    """A scraper's cached LLM answer for a medication, or None"""
+    key = scraper.drug_index.stored_key(scraper.cache, name)
+    return scraper.cache[key] if key is not None else None
+
+
+def cached_answers(scraper, results, page_name):
+    """{medication: cached answer} for the collected medications whose page was skipped"""
+    answers = {}
+    for name, found in results.items():
+        if page_name not in found:
+            answer = cached_answer(scraper, name)
+            if answer is not None:
+                answers[name] = answer
+    return answers
+
+
+def run_llm_batches(scraper, pages, extract_batch):
+    """Batched LLM answers for {medication: page text}, stored in the scraper's cache"""
+    names = list(pages)
+    answers = {}
+    for start in range(0, len(names), scraper.llm_batch_size):
+        batch = {name: pages[name] for name in names[start:start + scraper.llm_batch_size]}
+        answers.update(extract_batch(batch))
+    for name, answer in answers.items():
+        scraper.cache[drug_key(name)] = answer
+    scraper.save_cache()
+    return answers
+
+
+def store_results(results, drugs_scraper, dosage_scraper, side_effects_scraper):
+    """Turn collected pages into medication rows and LLM answers in the result store and caches"""
+    from result_store import get_result_store
+    store = get_result_store()
+
+    medication_info = {name: found['medication_info'] for name, found in results.items() if 'medication_info' in found}
+    if medication_info:
+        store.upsert_medications(medication_info, source='drugs.com')
+        print(f"✅ Stored drugs.com data for {len(medication_info)} medications")
+
+    # Queue every LLM request first so the dispatcher runs them concurrently
+    structured = {}
+    for name, found in results.items():
+        if 'side_effects_content' in found:
+            what_is = found.get('what_is') or f"Description not available for {name}"
+            structured[name] = drugs_scraper.process_content_with_llm(name, found['side_effects_content'], what_is, wait=False)
+    structured = {
+        name: answer.result() if isinstance(answer, Future) else answer
+        for name, answer in structured.items()
+    }
+    if structured:
+        store.put_llm_outputs('side_effects_structured', structured, model="gemini-1.5-flash")
+        print(f"✅ Stored structured side effects for {len(structured)} medications")
+
+    dosage_pages = {name: found['dosage_page'] for name, found in results.items() if 'dosage_page' in found}
+    answers = cached_answers(dosage_scraper, results, 'dosage_page')
+    if dosage_pages:
+        answers.update(run_llm_batches(dosage_scraper, dosage_pages, dosage_scraper.extract_dosage_batch_with_llm))
+    if answers:
+        store.put_llm_outputs('dosage', answers, model="gemini-1.5-flash")
+        print(f"✅ Stored WebMD dosage for {len(answers)} medications")
+
+    side_effects_pages = {name: found['side_effects_page'] for name, found in results.items() if 'side_effects_page' in found}
+    answers = cached_answers(side_effects_scraper, results, 'side_effects_page')
+    if side_effects_pages:
+        answers.update(run_llm_batches(side_effects_scraper, side_effects_pages, side_effects_scraper.extract_side_effects_batch_with_llm))
+    if answers:
+        store.put_llm_outputs('side_effects', answers, model="gemini-1.5-flash")
+        print(f"✅ Stored MedlinePlus side effects for {len(answers)} medications")
+
+
+def get_option(args, name, default):
+    """Read --name N (or --name=N) from the command line"""
+    for i, arg in enumerate(args):
+        try:
+            if arg.startswith(f'--{name}='):
+                return int(arg.split('=', 1)[1])
+            if arg == f'--{name}' and i + 1 < len(args):
+                return int(args[i + 1])
+        except ValueError:
+            print(f"Invalid value in '{arg}', using {default}")
+            return default
+    return default
+
+
+def main():
+    from medication_scraper import MedicationScraper
+    from production_scraper_LLM import DrugsScraper
+    from medication_scraper_dosage import WebMDDosageScraper
+    from medication_scraper_side_effects import MedlinePlusSideEffectsScraper
+
+    start_run('multi_source_collector')
+    args = sys.argv[1:]
+    limit = get_option(args, 'limit', None)
+    http_workers = max(1, get_option(args, 'workers', 4))
+    headless = '--headless' in args
+
+    if not os.path.exists(ANALYSIS_FILE):
+        print(f"❌ Excel file not found: {ANALYSIS_FILE}")
+        return
+
+    medications = load_medication_list(ANALYSIS_FILE)
+    if limit:
+        medications = medications[:limit]
+    print(f"📊 Collecting {len(medications)} medications from drugs.com, WebMD and MedlinePlus")
+
+    medication_scraper = MedicationScraper()
+    drugs_scraper = DrugsScraper(headless=headless)
+    dosage_scraper = WebMDDosageScraper(headless=headless)
+    side_effects_scraper = MedlinePlusSideEffectsScraper(headless=headless)
+
+    try:
+        collector = build_collector(medication_scraper, drugs_scraper, dosage_scraper, side_effects_scraper, http_workers)
+        start_time = time.time()
+        results = collector.collect(medications)
+        print(f"🌐 {collector.fetch_count} page fetches for {len(results)} medications in {time.time() - start_time:.1f}s")
+        store_results(results, drugs_scraper, dosage_scraper, side_effects_scraper)
+    except KeyboardInterrupt:
+        print("\n⚠️ Process interrupted by user")
+    finally:
+        drugs_scraper.close()
+        dosage_scraper.cleanup()
+        side_effects_scraper.cleanup()
+
+
+if __name__ == "__main__":
+    main()
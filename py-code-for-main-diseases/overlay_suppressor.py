@@ -0,0 +1,87 @@
+"""
+Overlay suppressor for Chrome sessions
+
+Instead of pressing Escape and probing close buttons after every page
+load, a small script is registered with CDP Page.addScriptToEvaluateOnNewDocument.
+It runs before any page script on every document the browser opens. A
+MutationObserver removes modal, overlay and consent nodes as soon as they
+are inserted, and restores page scrolling if a modal locked it.
+
+A persistent Chrome profile (browser_profiles/<name>) keeps the consent
+cookies between runs, so most consent banners never appear at all.
+"""
+
+import os
+import json
+
+PROFILE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'browser_profiles')
+
+# Nodes removed wherever they appear; kept specific so page content is never hit
+OVERLAY_SELECTORS = [
+    '#onetrust-consent-sdk',
+    '#onetrust-banner-sdk',
+    '.onetrust-pc-dark-filter',
+    '#truste-consent-track',
+    '.truste_overlay',
+    '.fc-consent-root',
+    '#CybotCookiebotDialog',
+    '.modal-backdrop',
+    '.ddc-modal',
+    '.ddc-modal-overlay',
+    '.popup-overlay',
+    '.newsletter-modal',
+    'div[role="dialog"][aria-modal="true"]',
+]
+
+SUPPRESSOR_JS = """
+(function () {
+    if (window.__overlaySuppressor) { return; }
+    var selectors = %s;
+    var query = selectors.join(',');
+    function sweep() {
+        var removed = 0;
+        document.querySelectorAll(query).forEach(function (node) { node.remove(); removed++; });
+        if (removed) {
+            [document.documentElement, document.body].forEach(function (el) {
+                if (el) {
+                    el.style.removeProperty('overflow');
+                    el.classList.remove('modal-open', 'no-scroll', 'ddc-modal-open');
+                }
+            });
+        }
+        return removed;
+    }
+    window.__overlaySuppressor = {sweep: sweep};
+    function start() {
+        sweep();
+        new MutationObserver(function (mutations) {
+            for (var i = 0; i < mutations.length; i++) {
+                if (mutations[i].addedNodes.length) { sweep(); return; }
+            }
+        }).observe(document.documentElement, {childList: true, subtree: true});
+    }
+    if (document.documentElement) { start(); }
+    else { document.addEventListener('readystatechange', start, {once: true}); }
+})();
+""" % json.dumps(OVERLAY_SELECTORS)
+
+
+def profile_dir(name):
+    """Persistent Chrome profile folder for one scraper (created on first use)"""
+    path = os.path.join(PROFILE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def install_overlay_suppressor(driver):
+    """Register the suppressor for every new document and run it on the current one; False if CDP is unavailable"""
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': SUPPRESSOR_JS})
+    except Exception as e:
+        print(f"⚠️ Overlay suppressor not installed ({e}); falling back to closing popups")
+        return False
+    try:
+        driver.execute_script(SUPPRESSOR_JS)
+    except Exception:
+        pass
+    return True
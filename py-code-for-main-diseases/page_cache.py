@@ -0,0 +1,225 @@
+"""
+Shared on-disk page cache
+
+Every scraper stores the raw HTML it downloads here, so re-running extraction
+or LLM categorization reads pages from disk instead of the network.
+
+Layout (one entry per URL, keyed by the SHA-256 of the URL):
+    page_cache/<2 hex chars>/<sha256>.json      metadata (url, status, fetched_at)
+    page_cache/<2 hex chars>/<sha256>.html.gz   gzip-compressed body
+
+Eviction walks every metadata file, so it runs from the CLI
+(python page_cache.py) or at most once a day at process start; the time of
+the last pass is kept in page_cache/eviction.json.
+
+Aliases map a lookup key such as "webmd:metformin" to the URL the browser
+ended up on, so Selenium flows can find their cached page without searching.
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+from instrumentation import count
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_cache')
+
+# Pages are refreshed after 30 days; the cache is trimmed to the newest entries
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+EVICT_INTERVAL_SECONDS = 24 * 3600
+EVICTION_FILE = 'eviction.json'
+
+# Only definitive misses are cached; rate limits and server errors are retried next time
+NEGATIVE_STATUSES = (404, 410)
+
+
+class PageCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, url):
+        """Content address for a URL"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def paths_for(self, url):
+        """Metadata and body paths for a URL"""
+        key = self.key_for(url)
+        folder = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(folder, key + '.json'), os.path.join(folder, key + '.html.gz')
+
+    def is_fresh(self, meta, max_age=None):
+        """Check an entry against the TTL"""
+        max_age = self.ttl_seconds if max_age is None else max_age
+        if max_age is None:
+            return True
+        return time.time() - meta.get('fetched_at', 0) <= max_age
+
+    def lookup(self, url, max_age=None):
+        """Return (status, body) for a cached URL, or None if missing or expired"""
+        meta_path, body_path = self.paths_for(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            status = meta.get('status', 200)
+            if meta.get('url') != url or not self.is_fresh(meta, max_age) or (status != 200 and status not in NEGATIVE_STATUSES):
+                self.misses += 1
+                count('page_cache.miss')
+                return None
+            body = ''
+            if os.path.exists(body_path):
+                with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+                    body = f.read()
+            self.hits += 1
+            count('page_cache.hit')
+            return status, body
+        except (OSError, ValueError):
+            self.misses += 1
+            count('page_cache.miss')
+            return None
+
+    def get(self, url, max_age=None):
+        """Return the cached body of a successful fetch, or None"""
+        entry = self.lookup(url, max_age)
+        if entry and entry[0] == 200:
+            return entry[1]
+        return None
+
+    def put(self, url, body, status=200):
+        """Store a page body (empty for failed fetches) with the current timestamp"""
+        meta_path, body_path = self.paths_for(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        meta = {'url': url, 'status': status, 'fetched_at': time.time()}
+
+        # Write to temp files first so readers never see a half-written entry
+        suffix = f'.tmp{os.getpid()}.{threading.get_ident()}'
+        try:
+            if body:
+                with gzip.open(body_path + suffix, 'wt', encoding='utf-8') as f:
+                    f.write(body)
+                os.replace(body_path + suffix, body_path)
+            elif os.path.exists(body_path):
+                os.remove(body_path)
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as e:
+            print(f"⚠️ Could not write page cache entry for {url}: {e}")
+
+    def put_miss(self, url, status):
+        """Cache a failed fetch if it is a definitive miss (404/410); returns True when stored"""
+        if status not in NEGATIVE_STATUSES:
+            count('page_cache.transient_failure')
+            return False
+        self.put(url, '', status=status)
+        return True
+
+    def alias_url(self, alias):
+        """Pseudo-URL under which an alias is stored"""
+        return 'alias:' + alias.strip().lower()
+
+    def put_alias(self, alias, url):
+        """Remember which URL a lookup key resolved to"""
+        self.put(self.alias_url(alias), url)
+
+    def get_by_alias(self, alias, max_age=None):
+        """Return (url, body) for an alias, or (None, None)"""
+        url = self.get(self.alias_url(alias), max_age)
+        if not url:
+            return None, None
+        body = self.get(url, max_age)
+        if body is None:
+            return None, None
+        return url, body
+
+    def put_page(self, alias, url, body):
+        """Store a page and point an alias at it"""
+        self.put(url, body)
+        self.put_alias(alias, url)
+
+    def eviction_path(self):
+        return os.path.join(self.cache_dir, EVICTION_FILE)
+
+    def eviction_due(self, interval=EVICT_INTERVAL_SECONDS):
+        """True when the last eviction pass (by any process) is older than interval"""
+        try:
+            with open(self.eviction_path(), 'r', encoding='utf-8') as f:
+                last_evicted = json.load(f).get('evicted_at', 0)
+        except (OSError, ValueError):
+            last_evicted = 0
+        return time.time() - last_evicted >= interval
+
+    def evict(self):
+        """Delete expired entries, then the oldest ones beyond max_entries"""
+        with self._lock:
+            entries = []
+            removed = 0
+            for folder, _, files in os.walk(self.cache_dir):
+                if folder == self.cache_dir:
+                    # Only the eviction record lives at the top level
+                    continue
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    meta_path = os.path.join(folder, name)
+                    body_path = meta_path[:-len('.json')] + '.html.gz'
+                    try:
+                        with open(meta_path, 'r', encoding='utf-8') as f:
+                            fetched_at = json.load(f).get('fetched_at', 0)
+                    except (OSError, ValueError):
+                        fetched_at = 0
+                    entries.append((fetched_at, meta_path, body_path))
+
+            entries.sort(reverse=True)
+            cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else None
+            for i, (fetched_at, meta_path, body_path) in enumerate(entries):
+                expired = cutoff is not None and fetched_at < cutoff
+                if expired or (self.max_entries and i >= self.max_entries):
+                    for path in (meta_path, body_path):
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    removed += 1
+
+            try:
+                with open(self.eviction_path(), 'w', encoding='utf-8') as f:
+                    json.dump({'evicted_at': time.time(), 'entries': len(entries) - removed, 'removed': removed}, f)
+            except OSError as e:
+                print(f"⚠️ Could not record page cache eviction: {e}")
+            return removed
+
+    def stats(self):
+        """Hit/miss counters for reporting"""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': rate}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Process-wide cache instance shared by all scrapers"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PageCache()
+            if _shared_cache.eviction_due():
+                _shared_cache.evict()
+    return _shared_cache
+
+
+if __name__ == "__main__":
+    cache = PageCache()
+    removed = cache.evict()
+    print(f"🧹 Evicted {removed} page cache entries from {cache.cache_dir}")
@@ -0,0 +1,111 @@
+"""
+Condition-based waits for the Selenium scrapers
+
+The scrapers used to sleep a fixed 0.5-3 s after every navigation, search
+and click. These helpers block on concrete conditions instead (URL
+changed, element present, document.readyState, network quiet) and return
+as soon as the condition holds. Timeouts are short and never raise:
+callers get None/False and carry on the same way they did after a sleep.
+
+Each wait is recorded as a wait.<name> span in the run report, so time per
+drug reflects how long pages actually took. Waits that give up also count
+wait.<name>.timeout.
+
+Network idle uses the page's Resource Timing entries rather than CDP
+Network events. Plain WebDriver sessions cannot subscribe to CDP events,
+and the entry count stops growing once the page's requests have finished.
+"""
+
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from instrumentation import span, count
+from driver_factory import record_page_network
+from driver_health import health_of
+
+POLL_SECONDS = 0.1
+
+READY_STATE_JS = "return document.readyState"
+RESOURCE_COUNT_JS = "return window.performance ? performance.getEntriesByType('resource').length : 0"
+
+
+def wait_until(driver, condition, timeout=5, name='condition'):
+    """Poll condition(driver) until it returns something truthy; None on timeout"""
+    with span(f'wait.{name}'):
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS,
+                                 ignored_exceptions=(WebDriverException,)).until(condition)
+        except TimeoutException:
+            count(f'wait.{name}.timeout')
+            return None
+
+
+def page_ready(driver):
+    try:
+        return driver.execute_script(READY_STATE_JS) == 'complete'
+    except WebDriverException:
+        return False
+
+
+def wait_for_ready(driver, timeout=10):
+    """Wait for document.readyState == 'complete', then count the page's network traffic"""
+    ready = bool(wait_until(driver, page_ready, timeout, 'ready'))
+    record_page_network(driver)
+    return ready
+
+
+def wait_for_element(driver, locator, timeout=5):
+    """Wait for an element to be present; returns it, or None"""
+    return wait_until(driver, EC.presence_of_element_located(locator), timeout, 'element')
+
+
+def wait_for_any(driver, selectors, timeout=5):
+    """Wait for the first of several CSS selectors to match; returns (selector, element) or (None, None)"""
+    def first_present(driver):
+        for selector in selectors:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                return selector, elements[0]
+        return False
+
+    return wait_until(driver, first_present, timeout, 'element') or (None, None)
+
+
+def wait_for_url_change(driver, old_url, timeout=10):
+    """Wait until the browser leaves old_url; returns the new URL, or None"""
+    return wait_until(driver, lambda d: d.current_url != old_url and d.current_url, timeout, 'url_change')
+
+
+def wait_for_navigation(driver, old_url, timeout=10):
+    """After a click or submit: wait for the URL to change, then for the new page to finish loading"""
+    start = time.perf_counter()
+    new_url = wait_for_url_change(driver, old_url, timeout)
+    ready = wait_for_ready(driver, timeout)
+
+    # Load times feed the driver's health (latency trend), failures its error rate
+    health = health_of(driver)
+    if health is not None:
+        if new_url and ready:
+            health.record_page(time.perf_counter() - start)
+        else:
+            health.record_error()
+    return new_url
+
+
+def wait_for_network_idle(driver, idle_seconds=0.5, timeout=10):
+    """Wait until the page has loaded and made no new requests for idle_seconds"""
+    state = {'count': -1, 'since': time.monotonic()}
+
+    def idle(driver):
+        if not page_ready(driver):
+            return False
+        current = driver.execute_script(RESOURCE_COUNT_JS)
+        now = time.monotonic()
+        if current != state['count']:
+            state['count'], state['since'] = current, now
+            return False
+        return now - state['since'] >= idle_seconds
+
+    return bool(wait_until(driver, idle, timeout, 'network_idle'))
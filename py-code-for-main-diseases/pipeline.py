@@ -0,0 +1,325 @@
+"""
+Pipeline runner
+
+Declares the hand-run chain as stages with inputs and outputs:
+
+    mayo_scrape (mayo-clinic/*.js, manual) -> CSV/final_diseases_complete.csv
+    disease_analysis      -> Analysis/main_diseases_analysis_final.xlsx
+    medication_data       -> Analysis/medication_data_*.xlsx
+    side_effects_llm      -> columns B-E of "All Unique Medications"
+    side_effects          -> *_WITH_SIDE_EFFECTS_*.xlsx
+    dosage                -> *_WITH_DOSAGE_*.xlsx
+    tests_treatments      -> Analysis/tests_treatments_enhanced_analysis.xlsx
+    tests_treatments_completed -> ..._COMPLETED.xlsx
+
+Each stage's inputs (script files, data files, and row-keyed inputs such as
+the CSV by disease or the workbook's medication list) are hashed. A stage
+runs only when that hash differs from the one recorded after its last
+successful run, or an output is missing. For row-keyed inputs the stage
+also receives the keys that changed, so a one-disease CSV edit re-enhances
+that disease only and the medication stages only work on new medications
+(per-medication results already live in the result store and caches).
+
+Usage:
+    python pipeline.py [status|run] [stage ...] [--force]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+from cache_journal import CacheJournal
+from instrumentation import span, start_run
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAYO_DIR = os.path.join(SCRIPT_DIR, '..', 'mayo-clinic')
+CSV_PATH = '../CSV/final_diseases_complete.csv'
+MAIN_ANALYSIS_PATH = '../Analysis/main_diseases_analysis_final.xlsx'
+MEDICATION_DATA_PATTERN = '../Analysis/medication_data_[0-9]*[0-9].xlsx'
+SIDE_EFFECTS_PATTERN = '../Analysis/*_WITH_SIDE_EFFECTS_*[0-9].xlsx'
+DOSAGE_PATTERN = '../Analysis/*_WITH_DOSAGE_*.xlsx'
+# Each stage's output name extends its input's, so a pattern also matches
+# the files of later stages; these name parts rule those out
+PATTERN_EXCLUDES = {
+    MEDICATION_DATA_PATTERN: ['_WITH_'],
+    SIDE_EFFECTS_PATTERN: ['_WITH_DOSAGE_'],
+}
+TESTS_TREATMENTS_PATH = '../Analysis/tests_treatments_enhanced_analysis.xlsx'
+TESTS_TREATMENTS_COMPLETED_PATH = '../Analysis/tests_treatments_enhanced_analysis_COMPLETED.xlsx'
+STATE_FILE = 'pipeline_state.jsonl'
+
+
+def pattern_matches(pattern):
+    """Files matching a glob pattern, minus the later-stage outputs it would also catch"""
+    excludes = PATTERN_EXCLUDES.get(pattern, [])
+    return [
+        path for path in glob.glob(pattern)
+        if not any(part in os.path.basename(path) for part in excludes)
+    ]
+
+
+def latest_match(pattern):
+    """Newest file matching a glob pattern, or None"""
+    matches = pattern_matches(pattern)
+    return max(matches, key=os.path.getmtime) if matches else None
+
+
+def file_hash(path):
+    """sha256 of a file's contents ('' when missing); glob patterns hash their newest match"""
+    if any(ch in path for ch in '*?['):
+        path = latest_match(path)
+    if not path or not os.path.exists(path):
+        return ''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_hash(value):
+    """sha256 of a JSON-serializable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def disease_rows(path=CSV_PATH):
+    """{disease name: row hash} for the diseases CSV"""
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return {
+        row['Disease_Name_English']: value_hash(row)
+        for row in df.to_dict('records')
+    }
+
+
+def medication_rows(path=MAIN_ANALYSIS_PATH):
+    """{drug key: medication name} from the workbook's medication list (the names, not columns B-E)"""
+    from multi_source_collector import load_medication_list
+    from drug_names import drug_key
+    return {drug_key(name): name for name in load_medication_list(path)}
+
+
+class Stage:
+    def __init__(self, name, run, code=(), inputs=(), row_inputs=None, outputs=(), depends=(), manual=False):
+        self.name = name
+        self.run = run                   # run(changed_rows) with row inputs ({input: set of keys or None}), else run()
+        self.code = list(code)           # scripts whose edits invalidate the stage
+        self.inputs = list(inputs)       # data files (glob patterns hash their newest match)
+        self.row_inputs = row_inputs or {}  # {input name: rows() -> {key: row hash}}
+        self.outputs = list(outputs)     # files (or glob patterns) the stage produces
+        self.depends = list(depends)     # stages whose every run invalidates this one
+        self.manual = manual             # only runs when named on the command line
+
+    def outputs_exist(self):
+        return all(pattern_matches(output) for output in self.outputs)
+
+
+class PipelineRunner:
+    def __init__(self, stages, state_path=STATE_FILE):
+        self.stages = stages
+        self.state = CacheJournal(state_path)
+        self.recorded = self.state.load()
+
+    def fingerprint(self, stage):
+        """Whole-stage input hash plus the per-row hashes of its row-keyed inputs"""
+        rows = {}
+        for input_name, read_rows in stage.row_inputs.items():
+            try:
+                rows[input_name] = {key: value_hash(value) for key, value in read_rows().items()}
+            except Exception as e:
+                print(f"⚠️ Could not read rows of {input_name}: {e}")
+                rows[input_name] = {}
+        files = {path: file_hash(path) for path in stage.code + stage.inputs}
+        upstream = {name: self.recorded.get(name, {}).get('finished_at') for name in stage.depends}
+        return value_hash({'files': files, 'rows': rows, 'upstream': upstream}), rows
+
+    def changed_rows(self, stage, rows):
+        """{input name: keys added, removed or edited since the last run (None = unknown, do all)}"""
+        previous = self.recorded.get(stage.name, {}).get('rows')
+        changed = {}
+        for input_name, current in rows.items():
+            if previous is None or input_name not in previous:
+                changed[input_name] = None
+                continue
+            old = previous[input_name]
+            changed[input_name] = {key for key in set(current) | set(old) if current.get(key) != old.get(key)}
+        return changed
+
+    def needs_run(self, stage, input_hash):
+        recorded = self.recorded.get(stage.name)
+        if not recorded or recorded.get('input_hash') != input_hash:
+            return 'inputs changed' if recorded else 'never run'
+        if not stage.outputs_exist():
+            return 'outputs missing'
+        return None
+
+    def status(self):
+        """Print whether each stage is up to date"""
+        for stage in self.stages:
+            input_hash, rows = self.fingerprint(stage)
+            reason = self.needs_run(stage, input_hash)
+            changed = self.changed_rows(stage, rows)
+            detail = ', '.join(
+                f"{input_name}: {'all' if keys is None else len(keys)} rows changed"
+                for input_name, keys in changed.items()
+            )
+            label = f"⏳ {reason}" if reason else "✅ up to date"
+            print(f"  {stage.name:<28} {label}{' (manual)' if stage.manual else ''}{f' - {detail}' if reason and detail else ''}")
+
+    def run(self, names=None, force=False):
+        """Run stages in order, skipping the ones whose inputs did not change"""
+        for stage in self.stages:
+            if names and stage.name not in names:
+                continue
+            if stage.manual and not (names and stage.name in names):
+                continue
+
+            # Hashed right before running so upstream outputs from this run are included
+            input_hash, rows = self.fingerprint(stage)
+            reason = 'forced' if force else self.needs_run(stage, input_hash)
+            if not reason:
+                print(f"⏭️  {stage.name}: up to date")
+                continue
+
+            changed = {input_name: None for input_name in rows} if force else self.changed_rows(stage, rows)
+            counts = ', '.join(f"{len(keys)} {input_name}" for input_name, keys in changed.items() if keys is not None)
+            print(f"\n▶️  {stage.name}: {reason}{f' ({counts} changed)' if counts else ''}")
+
+            start_time = time.time()
+            try:
+                with span(f'stage.{stage.name}'):
+                    if stage.row_inputs:
+                        stage.run(changed)
+                    else:
+                        stage.run()
+            except Exception as e:
+                print(f"❌ {stage.name} failed after {time.time() - start_time:.1f}s: {e}")
+                return False
+
+            # Outputs can feed this stage's own inputs (side_effects_llm writes the workbook it reads)
+            input_hash, rows = self.fingerprint(stage)
+            self.recorded[stage.name] = {'input_hash': input_hash, 'rows': rows, 'finished_at': time.time()}
+            self.state.put(stage.name, self.recorded[stage.name])
+            print(f"✅ {stage.name} finished in {time.time() - start_time:.1f}s")
+        self.state.sync()
+        return True
+
+
+def run_mayo_scrape():
+    import subprocess
+    for script in ('mc-letters-scrapper.js', 'mc-url-converter.js', 'mc-scrapper.js'):
+        subprocess.run(['node', script], cwd=MAYO_DIR, check=True)
+
+
+def run_disease_analysis(changed):
+    import main_diseases_analyzer_final
+    main_diseases_analyzer_final.create_main_diseases_analysis_v3(changed_diseases=changed.get('diseases'))
+
+
+def run_medication_data(changed):
+    from medication_scraper import MedicationScraper
+    # Scrapes only medications missing from the result store / latest report
+    MedicationScraper().run()
+
+
+def run_side_effects_llm(changed):
+    from production_scraper_LLM import update_excel_with_side_effects
+    update_excel_with_side_effects(excel_path=MAIN_ANALYSIS_PATH, reuse_stored=True)
+
+
+def run_side_effects():
+    from medication_scraper_side_effects import MedlinePlusSideEffectsScraper
+    scraper = MedlinePlusSideEffectsScraper(headless=True)
+    try:
+        # Cached per drug key, so only new medications are fetched
+        scraper.process_all_medications(latest_match(MEDICATION_DATA_PATTERN))
+    finally:
+        scraper.cleanup()
+
+
+def run_dosage():
+    from medication_scraper_dosage import WebMDDosageScraper
+    scraper = WebMDDosageScraper(headless=True)
+    try:
+        scraper.process_all_medications(latest_match(SIDE_EFFECTS_PATTERN))
+    finally:
+        scraper.cleanup()
+
+
+def run_tests_treatments():
+    # Rebuilds the whole workbook from the disease analysis (pages come from the page cache)
+    import tests_treatments_analyzer
+    tests_treatments_analyzer.main()
+
+
+def run_tests_treatments_completed():
+    import tests_treatments_enhanced
+    tests_treatments_enhanced.main()
+
+
+def build_stages():
+    medications = {'medications': medication_rows}
+    return [
+        Stage('mayo_scrape', run_mayo_scrape,
+              code=[os.path.join(MAYO_DIR, name) for name in ('mc-letters-scrapper.js', 'mc-url-converter.js', 'mc-scrapper.js')],
+              outputs=[CSV_PATH], manual=True),
+        Stage('disease_analysis', run_disease_analysis,
+              code=['main_diseases_analyzer_final.py'],
+              row_inputs={'diseases': disease_rows},
+              outputs=[MAIN_ANALYSIS_PATH]),
+        Stage('medication_data', run_medication_data,
+              code=['medication_scraper.py'],
+              row_inputs=medications,
+              outputs=[MEDICATION_DATA_PATTERN]),
+        # The analyzer rebuild clears columns B-E, so refill them after every rebuild
+        Stage('side_effects_llm', run_side_effects_llm,
+              code=['production_scraper_LLM.py'],
+              row_inputs=medications,
+              outputs=[MAIN_ANALYSIS_PATH],
+              depends=['disease_analysis']),
+        Stage('side_effects', run_side_effects,
+              code=['medication_scraper_side_effects.py'],
+              inputs=[MEDICATION_DATA_PATTERN],
+              outputs=[SIDE_EFFECTS_PATTERN]),
+        Stage('dosage', run_dosage,
+              code=['medication_scraper_dosage.py'],
+              inputs=[SIDE_EFFECTS_PATTERN],
+              outputs=[DOSAGE_PATTERN]),
+        Stage('tests_treatments', run_tests_treatments,
+              code=['tests_treatments_analyzer.py'],
+              outputs=[TESTS_TREATMENTS_PATH],
+              depends=['disease_analysis']),
+        Stage('tests_treatments_completed', run_tests_treatments_completed,
+              code=['tests_treatments_enhanced.py'],
+              inputs=[TESTS_TREATMENTS_PATH],
+              outputs=[TESTS_TREATMENTS_COMPLETED_PATH]),
+    ]
+
+
+def main():
+    # Every stage uses paths relative to this folder
+    os.chdir(SCRIPT_DIR)
+    start_run('pipeline')
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    force = '--force' in sys.argv[1:]
+    command = args[0] if args and args[0] in ('status', 'run') else 'run'
+    names = args[1:] if args and args[0] in ('status', 'run') else args
+
+    stages = build_stages()
+    unknown = [name for name in names if name not in {stage.name for stage in stages}]
+    if unknown:
+        print(f"❌ Unknown stages: {', '.join(unknown)}")
+        print(f"Stages: {', '.join(stage.name for stage in stages)}")
+        return
+
+    runner = PipelineRunner(stages)
+    if command == 'status':
+        runner.status()
+    else:
+        runner.run(names, force=force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -9,19 +7,41 @@ import random
 import re
 from openpyxl import load_workbook
 import os
-import shutil
+import sys
 import google.generativeai as genai
 from dotenv import load_dotenv
+from bs4 import BeautifulSoup
+from drugs_com_direct import DrugsComDirectFetcher
+from llm_cache import get_llm_cache
+from llm_dispatcher import get_llm_dispatcher
+from result_store import get_result_store
+from cache_journal import CacheJournal
+from excel_export import export_workbook
+from concurrent.futures import Future
+from instrumentation import count, timed, start_run
+from dom_snapshot import snapshot_anchors, anchor_element
+from page_waits import wait_for_ready, wait_for_navigation, wait_for_network_idle
+from overlay_suppressor import install_overlay_suppressor, profile_dir
+from driver_factory import create_chrome_driver
+from driver_health import StandbyDriver, health_of, recycle_if_unhealthy, retire_driver
 
 # Load environment variables from .env file
 load_dotenv('/Users/juanlu/Documents/Wye/scrapper/.env')
 
 class DrugsScraper:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, profile='drugs_com'):
         self.headless = headless
         self.driver = None
         self.wait = None
         
+        # Reused Chrome profile keeps consent cookies; the injected suppressor handles the rest
+        self.profile = profile
+        self.profile_slot = 0
+        self.overlays_suppressed = False
+        
+        # Replacement browser launched in the background when the current one degrades
+        self.standby = StandbyDriver(lambda: self.setup_driver(self.headless))
+        
         # Configure Google Generative AI
         api_key = os.getenv('GOOGLE_GEMINI_API_KEY')
         if not api_key:
@@ -30,42 +50,62 @@ class DrugsScraper:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel("gemini-1.5-flash")
         
-        self.init_driver()
+        # LLM calls run in the background so the browser can move on to the next drug
+        self.dispatcher = get_llm_dispatcher()
+        
+        # Predictable drugs.com URLs are fetched over HTTP; the browser starts lazily on a miss
+        self.use_direct_fetch = True
+        self.direct_fetcher = DrugsComDirectFetcher()
+        self.used_browser = False
         
     def init_driver(self):
-        """Initialize or reinitialize the driver"""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+        """Initialize or replace the driver (from the standby browser when one is ready)"""
+        old_driver, self.driver = self.driver, None
+        retire_driver(old_driver)
         
-        self.driver = self.setup_driver(self.headless)
+        self.driver = self.standby.take()
         self.wait = WebDriverWait(self.driver, 10)
+    
+    def recycle_driver_if_unhealthy(self):
+        """Replace the browser only when its health (latency, errors, memory) calls for it"""
+        if not self.driver:
+            return
+        try:
+            driver = recycle_if_unhealthy(self.driver, self.standby)
+            if driver is not self.driver:
+                self.driver = driver
+                self.wait = WebDriverWait(self.driver, 10)
+        except Exception as e:
+            print(f"  ⚠️ Error recycling browser: {e}")
+    
+    def next_profile_dir(self):
+        """Profile folder for the next browser, alternating between two slots"""
+        # The standby starts while the live browser still holds its profile lock
+        slot, self.profile_slot = self.profile_slot, 1 - self.profile_slot
+        return profile_dir(f"{self.profile}_{slot}")
         
     def setup_driver(self, headless=False):
         """Set up Chrome driver with options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Add user agent to avoid detection
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        extra_arguments = ["--disable-web-security", "--disable-features=VizDisplayCompositor"]
         
         try:
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver = None
+            if self.profile:
+                user_data_dir = self.next_profile_dir()
+                try:
+                    driver = create_chrome_driver('drugs.com', headless, extra_arguments, user_data_dir=user_data_dir)
+                except Exception as e:
+                    # Usually a browser from an earlier run still holds the profile lock
+                    print(f"⚠️ Could not open Chrome profile '{user_data_dir}' ({e}); using a temporary profile")
+            if driver is None:
+                driver = create_chrome_driver('drugs.com', headless, extra_arguments)
+            
+            # Remove modals and consent overlays on every page before they render
+            self.overlays_suppressed = install_overlay_suppressor(driver)
             
             # Ensure we start with a valid page
             driver.get("https://www.drugs.com")
-            time.sleep(2)
+            wait_for_ready(driver, 10)
             
             return driver
         except Exception as e:
@@ -81,7 +121,7 @@ class DrugsScraper:
             if current_url.startswith("data:") or "drugs.com" not in current_url or current_url == "about:blank":
                 print(f"  🔄 Invalid page detected ({current_url}), navigating to drugs.com...")
                 self.driver.get("https://www.drugs.com")
-                time.sleep(3)
+                wait_for_ready(self.driver, 10)
                 
                 # Verify the navigation worked
                 new_url = self.driver.current_url
@@ -112,6 +152,10 @@ class DrugsScraper:
     
     def close_modal_popups(self):
         """Close any modal popups that might be blocking the page with timeout protection"""
+        # The injected suppressor already removes overlays as they appear
+        if self.overlays_suppressed:
+            return
+        
         try:
             # Quick and aggressive approach: send multiple escape keys
             from selenium.webdriver.common.keys import Keys
@@ -163,9 +207,6 @@ class DrugsScraper:
         try:
             print(f"    📋 Extracting 'What Is' information for {medication}...")
             
-            # Close any popups first
-            self.close_modal_popups()
-            
             what_is_content = ""
             
             # Strategy 1: Look for "What is [drug_name]?" section specifically
@@ -333,90 +374,166 @@ class DrugsScraper:
             print(f"    ❌ Error extracting 'What Is' info for {medication}: {e}")
             return f"Error extracting description for {medication}"
     
-    def search_and_get_side_effects(self, medication):
-        """Search for medication and get side effects content with LLM processing"""
+    @timed('parse.drugs_com_what_is')
+    def extract_what_is_from_html(self, html, medication):
+        """Extract 'What Is' information from a fetched main medication page"""
         try:
-            print(f"🔍 Processing: {medication}")
+            soup = BeautifulSoup(html, 'html.parser')
+            for tag in soup(['script', 'style', 'noscript']):
+                tag.decompose()
             
-            # Ensure we start with a valid page
-            self.ensure_valid_page()
+            what_is_content = ""
             
-            # Close any modals that might be open
-            self.close_modal_popups()
+            # Strategy 1: paragraphs following the "What is ...?" heading
+            for heading in soup.find_all(['h1', 'h2', 'h3']):
+                heading_text = heading.get_text(" ", strip=True).lower()
+                if heading_text.startswith('what is'):
+                    for elem in heading.find_next_siblings('p', limit=3):
+                        text = elem.get_text(" ", strip=True)
+                        if len(text) > 30:
+                            what_is_content += text + " "
+                    if what_is_content:
+                        break
             
-            # Step 1: Go to drugs.com
-            self.driver.get("https://www.drugs.com")
-            time.sleep(2)
-            self.close_modal_popups()
+            # Strategy 2: first meaningful paragraphs on the page
+            if not what_is_content:
+                first_word = medication.lower().split()[0] if medication else ''
+                for paragraph in soup.find_all('p')[:10]:
+                    text = paragraph.get_text(" ", strip=True)
+                    text_lower = text.lower()
+                    if (len(text) > 40 and
+                        not any(skip_word in text_lower for skip_word in [
+                            'cookie', 'privacy', 'navigation', 'menu', 'search',
+                            'copyright', 'terms', 'conditions', 'policy'
+                        ]) and
+                        any(drug_keyword in text_lower for drug_keyword in [
+                            'medication', 'drug', 'medicine', 'treatment', 'prescribed',
+                            'used to', 'treats', 'helps', first_word
+                        ])):
+                        what_is_content += text + " "
+                        if len(what_is_content) > 200:
+                            break
             
-            # Step 2: Search for medication
-            search_box = self.wait.until(EC.presence_of_element_located((By.NAME, "searchterm")))
-            search_box.clear()
-            search_box.send_keys(medication)
-            search_box.send_keys(Keys.RETURN)
-            print(f"  ✅ Search submitted for: {medication}")
+            if not what_is_content:
+                return None
+            
+            what_is_content = re.sub(r'\s+', ' ', what_is_content).strip()
+            if len(what_is_content) > 500:
+                sentences = what_is_content.split('. ')
+                truncated = ""
+                for sentence in sentences:
+                    if len(truncated + sentence + '. ') <= 500:
+                        truncated += sentence + '. '
+                    else:
+                        break
+                what_is_content = truncated.strip() if truncated else what_is_content[:500] + "..."
             
-            # Step 3: Find main medication result
-            self.close_modal_popups()  # Close popups before searching
-            main_result = self.find_main_medication_result(medication)
-            if not main_result:
-                return f"❌ Could not find main result for {medication}"
+            return what_is_content
+        except Exception as e:
+            print(f"    ⚠️ Error extracting 'What Is' from page: {e}")
+            return None
+    
+    @timed('parse.drugs_com_side_effects')
+    def extract_side_effects_from_html(self, html, medication):
+        """Extract side effects content from a fetched side effects page"""
+        try:
+            soup = BeautifulSoup(html, 'html.parser')
+            for tag in soup(['script', 'style', 'noscript']):
+                tag.decompose()
+            
+            side_effects_keywords = [
+                'side effect', 'adverse', 'reaction', 'warning', 'precaution',
+                'common side effects', 'serious side effects', 'rare side effects',
+                'call your doctor', 'emergency', 'seek immediate help',
+                'stop taking', 'discontinue', 'allergic', 'overdose',
+                'nausea', 'vomiting', 'diarrhea', 'headache', 'dizziness',
+                'rash', 'fever', 'breathing', 'chest pain', 'swelling',
+                'mood changes', 'depression', 'anxiety', 'suicidal',
+                'liver problems', 'kidney problems', 'heart problems',
+                'bleeding', 'bruising', 'infection', 'seizure'
+            ]
             
-            # Step 4: Click on main result
-            try:
-                self.close_modal_popups()
-                main_result.click()
-                print(f"  ✅ Clicked main result for {medication}")
-                time.sleep(1)
-                self.close_modal_popups()
-            except Exception as e:
-                try:
-                    self.driver.execute_script("arguments[0].click();", main_result)
-                    print(f"  ✅ Clicked main result (JS) for {medication}")
-                    time.sleep(1)
-                    self.close_modal_popups()
-                except Exception as e2:
-                    return f"❌ Failed to click main result for {medication}: {str(e2)}"
+            all_content = []
+            
+            # Same filtering as the browser extraction, on the page text
+            body = soup.body or soup
+            for paragraph in body.get_text("\n").split('\n')[:500]:
+                paragraph = paragraph.strip()
+                if len(paragraph) > 20 and any(keyword in paragraph.lower() for keyword in side_effects_keywords):
+                    all_content.append(paragraph)
+            
+            # Content after the #side-effects anchor
+            section = soup.find(id='side-effects')
+            if section:
+                for i, sibling in enumerate(section.find_next_siblings(limit=5)):
+                    sibling_text = sibling.get_text("\n", strip=True)
+                    if len(sibling_text) > 20:
+                        all_content.append(f"=== SIDE EFFECTS CONTENT {i+1} ===")
+                        all_content.append(sibling_text)
+            
+            if not all_content:
+                return None
+            
+            return '\n\n'.join(all_content)
+        except Exception as e:
+            print(f"    ⚠️ Error extracting side effects from page: {e}")
+            return None
+    
+    def get_side_effects_direct(self, medication, wait=True):
+        """Try the predictable drugs.com URLs over HTTP; returns None on a miss"""
+        main_url, main_html = self.direct_fetcher.fetch_drug_page(medication)
+        if not main_html:
+            return None
+        
+        sfx_url, sfx_html = self.direct_fetcher.fetch_side_effects_page(medication)
+        if not sfx_html:
+            return None
+        
+        comprehensive_content = self.extract_side_effects_from_html(sfx_html, medication)
+        if not comprehensive_content or len(comprehensive_content) < 50:
+            return None
+        
+        print(f"  ⚡ Direct pages found: {main_url} | {sfx_url}")
+        what_is_info = self.extract_what_is_from_html(main_html, medication) or f"Description not available for {medication}"
+        
+        print(f"  🤖 Processing content with LLM...")
+        categorized_data = self.process_content_with_llm(medication, comprehensive_content, what_is_info, wait=wait)
+        
+        print(f"  ✅ Successfully processed {medication}")
+        return categorized_data
+    
+    @timed('item.side_effects_structured')
+    def search_and_get_side_effects(self, medication, wait=True):
+        """Search for medication and get side effects content with LLM processing
+        
+        With wait=False the LLM answer is returned as a Future so the caller can keep scraping.
+        """
+        try:
+            print(f"🔍 Processing: {medication}")
+            self.used_browser = False
+            
+            # Try the predictable drugs.com URLs before driving the browser
+            if self.use_direct_fetch:
+                categorized_data = self.get_side_effects_direct(medication, wait=wait)
+                if categorized_data:
+                    return categorized_data
+                print(f"  ↪️  No direct pages for {medication}, falling back to browser search")
+            
+            # Steps 1-4: search drugs.com and open the main result
+            error = self.open_main_page(medication)
+            if error:
+                return error
             
             # Step 4.5: Extract "What Is" information from main page before going to side effects
             what_is_info = self.extract_what_is_info(medication)
             
-            # Step 5: Find and click side effects link
-            self.close_modal_popups()  # Close popups before searching for side effects link
-            side_effects_link = self.find_side_effects_link()
-            if not side_effects_link:
-                return f"❌ Could not find side effects link for {medication}"
-            
-            # Step 6: Click side effects link
-            try:
-                self.close_modal_popups()  # Close popups before clicking
-                side_effects_link.click()
-                print(f"  ✅ Clicked side effects link for {medication}")
-                time.sleep(1)
-                self.close_modal_popups()  # Close popups immediately after click
-                time.sleep(1)
-                self.close_modal_popups()  # Close popups again to be extra sure
-            except Exception as e:
-                try:
-                    self.driver.execute_script("arguments[0].click();", side_effects_link)
-                    print(f"  ✅ Clicked side effects link (JS) for {medication}")
-                    time.sleep(1)
-                    self.close_modal_popups()  # Close popups immediately after JS click
-                    time.sleep(1)
-                    self.close_modal_popups()  # Close popups again to be extra sure
-                except Exception as e2:
-                    return f"❌ Failed to click side effects link for {medication}: {str(e2)}"
+            # Steps 5-6: follow the side effects link
+            error = self.open_side_effects_page(medication)
+            if error:
+                return error
             
             # Step 7: Extract comprehensive side effects content with timeout protection
             print(f"  📝 Extracting comprehensive side effects content...")
-            
-            # Aggressive popup closing after page load
-            self.close_modal_popups()  # First close
-            time.sleep(0.5)
-            self.close_modal_popups()  # Second close
-            time.sleep(0.5)  
-            self.close_modal_popups()  # Third close to be extra sure
-            
             comprehensive_content = self.extract_comprehensive_side_effects(medication)
             
             # Quick sanity check
@@ -426,7 +543,7 @@ class DrugsScraper:
             
             # Step 8: Process with LLM to categorize information
             print(f"  🤖 Processing content with LLM...")
-            categorized_data = self.process_content_with_llm(medication, comprehensive_content, what_is_info)
+            categorized_data = self.process_content_with_llm(medication, comprehensive_content, what_is_info, wait=wait)
             
             print(f"  ✅ Successfully processed {medication}")
             return categorized_data
@@ -434,77 +551,162 @@ class DrugsScraper:
         except Exception as e:
             error_msg = f"❌ Unexpected error processing {medication}: {str(e)}"
             print(error_msg)
+            
+            # Errors count towards the browser's health; only a dead browser is replaced right away
+            health = health_of(self.driver)
+            if health:
+                health.record_error()
             try:
-                print("  🔄 Attempting to recover from error...")
-                self.init_driver()
-                time.sleep(3)
+                if self.driver and not self.check_connection():
+                    print("  🔄 Browser not responding, swapping in a new one...")
+                    self.init_driver()
             except:
                 pass
             return error_msg
     
+    def open_main_page(self, medication):
+        """Search drugs.com and open the medication's main page; returns an error message or None"""
+        if not self.driver:
+            self.init_driver()
+        self.used_browser = True
+        
+        # Ensure we start with a valid page
+        self.ensure_valid_page()
+        
+        # Step 1: Go to drugs.com
+        self.driver.get("https://www.drugs.com")
+        self.close_modal_popups()
+        
+        # Step 2: Search for medication
+        search_box = self.wait.until(EC.presence_of_element_located((By.NAME, "searchterm")))
+        search_page_url = self.driver.current_url
+        search_box.clear()
+        search_box.send_keys(medication)
+        search_box.send_keys(Keys.RETURN)
+        print(f"  ✅ Search submitted for: {medication}")
+        wait_for_navigation(self.driver, search_page_url, 10)
+        
+        # Step 3: Find main medication result
+        self.close_modal_popups()
+        main_result = self.find_main_medication_result(medication)
+        if not main_result:
+            return f"❌ Could not find main result for {medication}"
+        
+        # Step 4: Click on main result
+        results_url = self.driver.current_url
+        try:
+            main_result.click()
+            print(f"  ✅ Clicked main result for {medication}")
+            wait_for_navigation(self.driver, results_url, 10)
+            self.close_modal_popups()
+        except Exception as e:
+            try:
+                self.driver.execute_script("arguments[0].click();", main_result)
+                print(f"  ✅ Clicked main result (JS) for {medication}")
+                wait_for_navigation(self.driver, results_url, 10)
+                self.close_modal_popups()
+            except Exception as e2:
+                return f"❌ Failed to click main result for {medication}: {str(e2)}"
+        
+        # Keep the main page so reruns (and the collector) read it from the page cache
+        self.direct_fetcher.remember_page('main', medication, self.driver.current_url, self.driver.page_source)
+        return None
+    
+    def open_side_effects_page(self, medication):
+        """From the main page, open the side effects page; returns an error message or None"""
+        # Step 5: Find and click side effects link
+        side_effects_link = self.find_side_effects_link()
+        if not side_effects_link:
+            return f"❌ Could not find side effects link for {medication}"
+        
+        # Step 6: Click side effects link
+        main_url = self.driver.current_url
+        try:
+            side_effects_link.click()
+            print(f"  ✅ Clicked side effects link for {medication}")
+            wait_for_navigation(self.driver, main_url, 10)
+        except Exception as e:
+            try:
+                self.driver.execute_script("arguments[0].click();", side_effects_link)
+                print(f"  ✅ Clicked side effects link (JS) for {medication}")
+                wait_for_navigation(self.driver, main_url, 10)
+            except Exception as e2:
+                return f"❌ Failed to click side effects link for {medication}: {str(e2)}"
+        
+        # Popups arrive with the late requests; close them once the page has gone quiet
+        wait_for_network_idle(self.driver, 0.5, 5)
+        self.close_modal_popups()
+        
+        # Keep the side effects page so reruns read it from the page cache
+        self.direct_fetcher.remember_page('sfx', medication, self.driver.current_url, self.driver.page_source)
+        return None
+    
+    def search_drug_pages(self, medication):
+        """Find the main and side effects pages through the browser search and store them in the page cache"""
+        self.recycle_driver_if_unhealthy()
+        error = self.open_main_page(medication) or self.open_side_effects_page(medication)
+        if error:
+            print(f"  {error}")
+            return False
+        return True
+    
     def find_main_medication_result(self, medication):
         """Find the main medication result"""
         print(f"  🔍 Looking for main result for: {medication}")
-        time.sleep(3)
-        
-        # Close popups before searching
-        self.close_modal_popups()
+        wait_for_ready(self.driver, 5)
         
         if not self.check_connection():
             print("  🔄 Reconnecting before searching for results...")
             self.init_driver()
-            time.sleep(3)
             return None
         
+        # One snapshot of every link replaces the per-selector and per-link round trips
+        try:
+            anchors = snapshot_anchors(self.driver)
+        except Exception as e:
+            print(f"    ⚠️ Could not read page links: {e}")
+            anchors = []
+        
         # Try direct href matches first
-        direct_selectors = [
-            f"a[href*='{medication.lower().replace(' ', '-')}.html']",
-            f"a[href*='{medication.lower()}.html']",
-            f"a[href*='{medication.replace(' ', '-').lower()}.html']",
+        direct_slugs = [
+            f"{medication.lower().replace(' ', '-')}.html",
+            f"{medication.lower()}.html",
         ]
         
-        for selector in direct_selectors:
-            try:
-                self.close_modal_popups()  # Close popups before each search attempt
-                results = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if results:
-                    print(f"      ✅ Found direct match: {results[0].text[:50]}...")
-                    return results[0]
-            except:
-                continue
+        for slug in direct_slugs:
+            for anchor in anchors:
+                if slug in anchor['attr']:
+                    result = anchor_element(self.driver, anchor)
+                    if result:
+                        print(f"      ✅ Found direct match: {anchor['text'][:50]}...")
+                        return result
         
         # Try text-based search
-        try:
-            self.close_modal_popups()  # Close popups before text search
-            all_links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='.html']")
-            medication_words = medication.lower().split()
+        medication_words = medication.lower().split()
+        
+        for anchor in anchors:
+            text = anchor['text'].lower()
+            href = anchor['href']
             
-            for link in all_links:
-                try:
-                    text = link.text.strip().lower()
-                    href = link.get_attribute('href')
-                    
-                    if not text or not href:
-                        continue
-                    
-                    # Skip unwanted links
-                    if any(skip in href.lower() for skip in ['/pro/', '/search', '/compare', '/interaction']):
-                        continue
-                    
-                    # Check if medication words are in the text
-                    if len(medication_words) == 1:
-                        if medication_words[0] in text and '.html' in href:
-                            print(f"      ✅ Found text match: {link.text[:50]}...")
-                            return link
-                    else:
-                        word_matches = sum(1 for word in medication_words if word in text)
-                        if word_matches >= len(medication_words) * 0.7 and '.html' in href:
-                            print(f"      ✅ Found text match: {link.text[:50]}...")
-                            return link
-                except:
-                    continue
-        except:
-            pass
+            if '.html' not in anchor['attr'] or not text or not href:
+                continue
+            
+            # Skip unwanted links
+            if any(skip in href.lower() for skip in ['/pro/', '/search', '/compare', '/interaction']):
+                continue
+            
+            # Check if medication words are in the text
+            if len(medication_words) == 1:
+                matched = medication_words[0] in text and '.html' in href
+            else:
+                word_matches = sum(1 for word in medication_words if word in text)
+                matched = word_matches >= len(medication_words) * 0.7 and '.html' in href
+            
+            if matched:
+                result = anchor_element(self.driver, anchor)
+                if result:
+                    print(f"      ✅ Found text match: {anchor['text'][:50]}...")
+                    return result
         
         print(f"    ❌ No main result found for {medication}")
         return None
@@ -512,50 +714,29 @@ class DrugsScraper:
     def find_side_effects_link(self):
         """Find the side effects navigation link"""
         print(f"  🔍 Looking for side effects link...")
-        time.sleep(2)
-        
-        # Close popups before searching
-        self.close_modal_popups()
+        wait_for_ready(self.driver, 5)
         
         if not self.check_connection():
             print("  🔄 Reconnecting before searching for side effects link...")
             self.init_driver()
-            time.sleep(3)
             return None
         
-        # Try XPath text search first
-        xpath_selectors = [
-            "//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'side effects')]",
-            "//a[contains(text(), 'Side effects')]",
-            "//a[contains(text(), 'side effects')]",
-        ]
-        
-        for selector in xpath_selectors:
-            try:
-                self.close_modal_popups()  # Close popups before each search attempt
-                links = self.driver.find_elements(By.XPATH, selector)
-                if links:
-                    print(f"      ✅ Found side effects link: {links[0].text}")
-                    return links[0]
-            except:
-                continue
+        try:
+            anchors = snapshot_anchors(self.driver)
+        except Exception as e:
+            print(f"    ⚠️ Could not read page links: {e}")
+            anchors = []
         
-        # Try href-based search
-        href_selectors = [
-            "a[href*='side-effects']",
-            "a[href*='#side-effects']",
-            "a[href*='sideeffects']",
-        ]
+        # Link text first (hidden links too, as the old XPath search did), then the URL
+        matches = [anchor for anchor in anchors if 'side effects' in anchor['label'].lower()]
+        matches += [anchor for anchor in anchors
+                    if any(part in anchor['attr'] for part in ['side-effects', 'sideeffects'])]
         
-        for selector in href_selectors:
-            try:
-                self.close_modal_popups()  # Close popups before each search attempt
-                links = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if links:
-                    print(f"      ✅ Found side effects link: {links[0].text}")
-                    return links[0]
-            except:
-                continue
+        for anchor in matches:
+            link = anchor_element(self.driver, anchor)
+            if link:
+                print(f"      ✅ Found side effects link: {anchor['text']}")
+                return link
         
         print(f"    ❌ No side effects link found")
         return None
@@ -569,16 +750,13 @@ class DrugsScraper:
             if not self.check_connection():
                 return f"❌ Connection lost during content extraction for {medication}"
             
-            # Close popups at start of extraction
-            self.close_modal_popups()
-            time.sleep(2)  # Reduced wait time
+            wait_for_ready(self.driver, 5)
             
             all_content = []
             
             # Strategy 1: Get ALL text from the entire page and filter (with timeout protection)
             try:
                 print(f"      📄 Strategy 1: Full page text extraction...")
-                self.close_modal_popups()  # Close popups before extraction
                 
                 body_element = self.driver.find_element(By.TAG_NAME, "body")
                 full_page_text = body_element.text
@@ -587,7 +765,7 @@ class DrugsScraper:
                 if len(full_page_text) < 100:
                     print(f"      ⚠️ Page text too short ({len(full_page_text)} chars), might be loading issue")
                     self.close_modal_popups()  # Close popups before retry
-                    time.sleep(3)
+                    wait_for_network_idle(self.driver, 0.5, 5)
                     body_element = self.driver.find_element(By.TAG_NAME, "body")
                     full_page_text = body_element.text
                 
@@ -608,8 +786,7 @@ class DrugsScraper:
                 
                 # Process paragraphs with limit to prevent hanging
                 for i, paragraph in enumerate(paragraphs[:500]):  # Limit processing
-                    if i % 50 == 0:  # Close popups every 50 paragraphs and check connection
-                        self.close_modal_popups()
+                    if i % 50 == 0:  # Check the connection every 50 paragraphs
                         if not self.check_connection():
                             print(f"      ⚠️ Connection lost during paragraph processing")
                             break
@@ -628,7 +805,6 @@ class DrugsScraper:
             
             # Strategy 2: Look for specific sections and their content (with timeout protection)
             print(f"      🎯 Strategy 2: Section-based extraction...")
-            self.close_modal_popups()  # Close popups before section extraction
             
             section_selectors = [
                 "#side-effects",
@@ -643,10 +819,6 @@ class DrugsScraper:
             
             for i, selector in enumerate(section_selectors):
                 try:
-                    # Close popups before each section search
-                    if i % 2 == 0:  # Every 2 selectors
-                        self.close_modal_popups()
-                        
                     # Quick connection check
                     if not self.check_connection():
                         print(f"      ⚠️ Connection lost during section processing")
@@ -725,7 +897,17 @@ class DrugsScraper:
         except Exception as e:
             return f"Quick extraction error for {medication}: {str(e)}"
 
-    def process_content_with_llm(self, medication, comprehensive_content, what_is_info):
+    def llm_error_result(self, medication, what_is_info, e):
+        """Structured placeholder used when the LLM call fails"""
+        print(f"    ❌ Error processing with LLM: {e}")
+        return {
+            'what_is': what_is_info if what_is_info else f"Error getting description for {medication}: {str(e)}",
+            'side_effects': f"Error processing side effects for {medication}: {str(e)}",
+            'call_doctor': f"Error processing doctor guidance for {medication}: {str(e)}",
+            'go_to_er': f"Error processing emergency guidance for {medication}: {str(e)}"
+        }
+    
+    def process_content_with_llm(self, medication, comprehensive_content, what_is_info, wait=True):
         """Use LLM to categorize comprehensive content into structured columns including What Is information"""
         try:
             print(f"    🤖 Processing content with LLM for {medication}...")
@@ -779,25 +961,24 @@ Important:
 - If no information is available for a category, write "No specific information provided"
 """
 
-            # Generate response from LLM
-            response = self.model.generate_content(prompt)
-            llm_response = response.text
-            
-            print(f"    ✅ LLM processing completed ({len(llm_response)} characters)")
-            
-            # Parse the LLM response into structured data
-            parsed_data = self.parse_llm_response(llm_response)
-            
+            # Queue the request (cached, rate limited and retried by the dispatcher)
+            future = self.dispatcher.submit(
+                self.model,
+                prompt,
+                parse=self.parse_llm_response,
+                fallback=lambda e: self.llm_error_result(medication, what_is_info, e)
+            )
+            
+            if not wait:
+                print(f"    📨 LLM request queued for {medication}")
+                return future
+            
+            parsed_data = future.result()
+            print(f"    ✅ LLM processing completed for {medication}")
             return parsed_data
             
         except Exception as e:
-            print(f"    ❌ Error processing with LLM: {e}")
-            return {
-                'what_is': what_is_info if what_is_info else f"Error getting description for {medication}: {str(e)}",
-                'side_effects': f"Error processing side effects for {medication}: {str(e)}",
-                'call_doctor': f"Error processing doctor guidance for {medication}: {str(e)}",
-                'go_to_er': f"Error processing emergency guidance for {medication}: {str(e)}"
-            }
+            return self.llm_error_result(medication, what_is_info, e)
     
     def parse_llm_response(self, llm_response):
         """Parse the LLM response into structured categories including What Is"""
@@ -934,7 +1115,9 @@ Important:
             }
     
     def add_delay(self):
-        """Add random delay between requests"""
+        """Add random delay between requests (only after the browser loaded drugs.com pages)"""
+        if not self.used_browser:
+            return
         delay = random.uniform(1.5, 2.5)
         print(f"  ⏰ Waiting {delay:.1f} seconds before next request...")
         time.sleep(delay)
@@ -943,6 +1126,9 @@ Important:
         """Close the browser"""
         if self.driver:
             self.driver.quit()
+        self.standby.close()
+
+EXCEL_PATH = '/Users/juanlu/Documents/Wye/scrapper/Analysis/main_diseases_analysis_final.xlsx'
 
 def sanitize_text_for_excel(text):
     """Sanitize text to prevent Excel corruption"""
@@ -968,34 +1154,138 @@ def sanitize_text_for_excel(text):
     except Exception as e:
         return f"Error processing content: {str(e)[:50]}"
 
-def update_excel_with_side_effects(max_medications=None, start_from=0):
-    """Update Excel file with side effects for all medications using LLM categorization"""
+def write_side_effects_row(progress, row_num, medication, categorized_data, errors):
+    """Record one medication's structured data for Excel columns B-E in the progress journal"""
+    try:
+        if isinstance(categorized_data, dict):
+            # LLM processing succeeded - save structured data
+            what_is = sanitize_text_for_excel(categorized_data.get('what_is', ''))
+            side_effects = sanitize_text_for_excel(categorized_data.get('side_effects', ''))
+            call_doctor = sanitize_text_for_excel(categorized_data.get('call_doctor', ''))
+            go_to_er = sanitize_text_for_excel(categorized_data.get('go_to_er', ''))
+            
+            progress.put(str(row_num), {'medication': medication, 'values': [what_is, side_effects, call_doctor, go_to_er]})
+            
+            get_result_store().put_llm_output('side_effects_structured', medication, categorized_data)
+            
+            print(f"  ✅ Saved structured data for {medication}")
+            print(f"    - What Is: {len(what_is)} chars")
+            print(f"    - Side Effects: {len(side_effects)} chars")
+            print(f"    - Call Doctor: {len(call_doctor)} chars")
+            print(f"    - Go to ER: {len(go_to_er)} chars")
+            
+        else:
+            # LLM processing failed - save error message
+            error_msg = sanitize_text_for_excel(str(categorized_data) if categorized_data else f"❌ Failed to process {medication}")
+            
+            progress.put(str(row_num), {'medication': medication, 'values': [error_msg, "Processing failed", "Processing failed", "Processing failed"]})
+            
+            print(f"  ❌ Saved error data for {medication}")
+            
+    except Exception as write_error:
+        print(f"  ⚠️  Error recording progress: {write_error}")
+        try:
+            error_msg = f"Error processing {medication}"
+            progress.put(str(row_num), {'medication': medication, 'values': [error_msg] * 4})
+        except Exception as fallback_error:
+            print(f"  ❌ Fatal progress write error: {fallback_error}")
+    
+    # Track errors
+    if isinstance(categorized_data, str) and categorized_data.startswith("❌"):
+        errors.append(medication)
+
+def write_finished_rows(progress, pending, errors, wait=False):
+    """Record rows whose LLM answer has arrived, in row order; returns how many were written"""
+    written = 0
+    
+    # Stop at the first unfinished row so the sheet never has gaps (resume relies on it)
+    for row_num in sorted(pending):
+        medication, categorized_data = pending[row_num]
+        
+        if isinstance(categorized_data, Future):
+            if not wait and not categorized_data.done():
+                break
+            try:
+                categorized_data = categorized_data.result()
+            except Exception as e:
+                categorized_data = f"❌ LLM processing failed for {medication}: {str(e)}"
+        
+        write_side_effects_row(progress, row_num, medication, categorized_data, errors)
+        del pending[row_num]
+        written += 1
+    
+    return written
+
+def side_effects_progress_journal(excel_path):
+    """Progress journal kept next to the workbook: {row number: {medication, values B-E}}"""
+    base_name = os.path.splitext(os.path.basename(excel_path))[0]
+    return CacheJournal(os.path.join(os.path.dirname(excel_path), f"{base_name}_side_effects_progress.jsonl"))
+
+def export_side_effects_progress(excel_path, progress=None):
+    """Write recorded side effects into the workbook in one streaming export"""
+    progress = progress or side_effects_progress_journal(excel_path)
+    rows = progress.load()
+    
+    # Headers for the new structure plus every recorded row
+    cell_values = {(8, 2): 'WHAT IS', (8, 3): 'SIDE EFFECTS', (8, 4): 'CALL A DOCTOR IF', (8, 5): 'GO TO ER IF'}
+    for row_num, entry in rows.items():
+        for offset, value in enumerate(entry['values']):
+            cell_values[(int(row_num), 2 + offset)] = value
+    
+    try:
+        start_time = time.time()
+        export_workbook(excel_path, cell_values={"All Unique Medications": cell_values})
+        print(f"💾 Exported {len(rows)} medications to {excel_path} in {time.time() - start_time:.1f}s")
+    except Exception as save_error:
+        print(f"❌ Error exporting workbook (progress kept in {progress.path}): {save_error}")
+        return False
     
-    excel_path = '/Users/juanlu/Documents/Wye/scrapper/Analysis/main_diseases_analysis_final.xlsx'
+    # Everything recorded is in the workbook now
+    progress.delete()
+    return True
+
+def update_excel_with_side_effects(max_medications=None, start_from=0, excel_path=None, reuse_stored=False):
+    """Update Excel file with side effects for all medications using LLM categorization
+    
+    With reuse_stored, medications that already have structured data in the result store
+    are written from it instead of being scraped again (the analyzer rebuild clears B-E).
+    """
+    
+    excel_path = excel_path or EXCEL_PATH
     
     if not os.path.exists(excel_path):
         print(f"❌ Excel file not found: {excel_path}")
         return
     
-    # Load workbook
-    wb = load_workbook(excel_path)
+    # Read-only pass: the workbook is only written once, by the final export
+    wb = load_workbook(excel_path, read_only=True)
     
     if "All Unique Medications" not in wb.sheetnames:
         print("❌ 'All Unique Medications' sheet not found")
+        wb.close()
         return
     
     medications_ws = wb["All Unique Medications"]
     
-    # Get medications
+    # Get medications and whether column B already has data
     medications = []
-    for row in medications_ws.iter_rows(min_row=9, max_col=1, values_only=True):
-        if row[0] and row[0].strip():
-            medications.append(row[0].strip())
+    has_data = []
+    for row in medications_ws.iter_rows(min_row=9, max_col=2, values_only=True):
+        if row and row[0] and str(row[0]).strip():
+            medications.append(str(row[0]).strip())
+            has_data.append(len(row) > 1 and bool(row[1]))
+    wb.close()
+    
+    # Rows recorded by an interrupted run that were not exported yet
+    progress = side_effects_progress_journal(excel_path)
+    recorded_rows = progress.load()
+    if recorded_rows:
+        print(f"📒 Found {len(recorded_rows)} recorded medications not yet in the workbook")
     
     # Check what's already been processed (check column B for existing data)
     processed_count = 0
-    for i in range(9, 9 + len(medications)):
-        if medications_ws[f'B{i}'].value:
+    for i in range(len(medications)):
+        if has_data[i] or str(9 + i) in recorded_rows:
             processed_count += 1
         else:
             break
@@ -1009,6 +1299,8 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
     
     if not remaining_medications:
         print("🎉 All medications have already been processed!")
+        if recorded_rows:
+            export_side_effects_progress(excel_path, progress)
         return
     
     # Use all remaining medications if max_medications is None
@@ -1017,52 +1309,45 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
     
     print(f"📊 Processing {len(remaining_medications)} remaining medications (starting from #{start_index + 1})...")
     
-    # Update column headers for the new structure
-    medications_ws['B8'] = 'WHAT IS'
-    medications_ws['C8'] = 'SIDE EFFECTS'
-    medications_ws['D8'] = 'CALL A DOCTOR IF'
-    medications_ws['E8'] = 'GO TO ER IF'
-    
     # Initialize scraper
     scraper = DrugsScraper(headless=False)
     
     try:
         current_processed = processed_count
+        last_reported = processed_count
         errors = []
+        pending = {}
         
         for i, medication in enumerate(remaining_medications):
             medication_index = start_index + i
             print(f"\n[{medication_index + 1}/{len(medications)}] Processing: {medication}")
             
-            # Close popups at start of each medication processing
-            try:
-                scraper.close_modal_popups()
-            except:
-                pass
+            if reuse_stored:
+                stored_data = get_result_store().get_llm_output('side_effects_structured', medication)
+                if stored_data:
+                    print(f"  ♻️  Using stored structured data for {medication}")
+                    pending[9 + medication_index] = (medication, stored_data)
+                    current_processed += write_finished_rows(progress, pending, errors)
+                    continue
             
-            # Check if scraper connection is still alive
-            if not scraper.check_connection():
+            # Check if scraper connection is still alive (the browser only exists after a direct-fetch miss)
+            if scraper.driver and not scraper.check_connection():
                 print("  🔄 Reconnecting scraper...")
                 scraper.init_driver()
-                time.sleep(5)
             
             # Get structured side effects data with LLM processing
             max_retries = 3
             categorized_data = None
             
             for attempt in range(max_retries):
+                if attempt:
+                    count('item.side_effects_structured.retry')
                 try:
                     print(f"  🔄 Attempt {attempt + 1} of {max_retries}")
                     
-                    # Close popups before each attempt
-                    try:
-                        scraper.close_modal_popups()
-                    except:
-                        pass
-                    
                     start_time = time.time()
                     
-                    categorized_data = scraper.search_and_get_side_effects(medication)
+                    categorized_data = scraper.search_and_get_side_effects(medication, wait=False)
                     
                     elapsed = time.time() - start_time
                     if elapsed > 300:
@@ -1074,10 +1359,6 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
                     print(f"  ⚠️  Attempt {attempt + 1} failed: {e}")
                     if attempt < max_retries - 1:
                         print("  🔄 Reinitializing scraper and retrying...")
-                        try:
-                            scraper.close_modal_popups()
-                        except:
-                            pass
                         scraper.init_driver()
                         time.sleep(10)
                     else:
@@ -1087,78 +1368,32 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
                             'go_to_er': f"❌ Failed to process {medication} after {max_retries} attempts"
                         }
             
-            # Add structured data to Excel columns B, C, D
-            row_num = 9 + medication_index
-            
-            try:
-                if isinstance(categorized_data, dict):
-                    # LLM processing succeeded - save structured data
-                    what_is = sanitize_text_for_excel(categorized_data.get('what_is', ''))
-                    side_effects = sanitize_text_for_excel(categorized_data.get('side_effects', ''))
-                    call_doctor = sanitize_text_for_excel(categorized_data.get('call_doctor', ''))
-                    go_to_er = sanitize_text_for_excel(categorized_data.get('go_to_er', ''))
-                    
-                    medications_ws[f'B{row_num}'] = what_is
-                    medications_ws[f'C{row_num}'] = side_effects
-                    medications_ws[f'D{row_num}'] = call_doctor
-                    medications_ws[f'E{row_num}'] = go_to_er
-                    
-                    print(f"  ✅ Saved structured data for {medication}")
-                    print(f"    - What Is: {len(what_is)} chars")
-                    print(f"    - Side Effects: {len(side_effects)} chars")
-                    print(f"    - Call Doctor: {len(call_doctor)} chars")
-                    print(f"    - Go to ER: {len(go_to_er)} chars")
-                    
-                else:
-                    # LLM processing failed - save error message
-                    error_msg = sanitize_text_for_excel(str(categorized_data) if categorized_data else f"❌ Failed to process {medication}")
-                    
-                    medications_ws[f'B{row_num}'] = error_msg
-                    medications_ws[f'C{row_num}'] = "Processing failed"
-                    medications_ws[f'D{row_num}'] = "Processing failed"
-                    medications_ws[f'E{row_num}'] = "Processing failed"
-                    
-                    print(f"  ❌ Saved error data for {medication}")
-                    
-            except Exception as write_error:
-                print(f"  ⚠️  Error writing to Excel: {write_error}")
-                try:
-                    error_msg = f"Error processing {medication}"
-                    medications_ws[f'B{row_num}'] = error_msg
-                    medications_ws[f'C{row_num}'] = error_msg
-                    medications_ws[f'D{row_num}'] = error_msg
-                    medications_ws[f'E{row_num}'] = error_msg
-                except Exception as fallback_error:
-                    print(f"  ❌ Fatal Excel write error: {fallback_error}")
-                    continue
-            
-            current_processed += 1
+            # The LLM answer may still be in flight; rows are written as answers arrive
+            pending[9 + medication_index] = (medication, categorized_data)
+            current_processed += write_finished_rows(progress, pending, errors)
             
-            # Track errors
-            if isinstance(categorized_data, str) and categorized_data.startswith("❌"):
-                errors.append(medication)
+            # Rows are journaled as they finish; report every 5 medications
+            if current_processed - last_reported >= 5:
+                last_reported = current_processed
+                print(f"💾 Progress recorded: {current_processed}/{len(medications)} medications processed")
+                print(f"   Errors so far: {len(errors)}")
             
-            # Save progress every 5 medications
-            if current_processed % 5 == 0:
-                try:
-                    wb.save(excel_path)
-                    print(f"💾 Progress saved: {current_processed}/{len(medications)} medications processed")
-                    print(f"   Errors so far: {len(errors)}")
-                except Exception as save_error:
-                    print(f"  ⚠️  Error saving progress: {save_error}")
+            # Replace the browser only when its health calls for it
+            scraper.recycle_driver_if_unhealthy()
             
             # Add delay between requests
             scraper.add_delay()
+        
+        # Wait for the LLM answers still in flight
+        if pending:
+            print(f"⏳ Waiting for {len(pending)} LLM answers...")
+            current_processed += write_finished_rows(progress, pending, errors, wait=True)
     
     finally:
         scraper.close()
-    
-    # Final save
-    try:
-        wb.save(excel_path)
-        print(f"💾 Final save completed")
-    except Exception as save_error:
-        print(f"❌ Error in final save: {save_error}")
+        # Single full-workbook write, also after an interruption
+        progress.sync()
+        export_side_effects_progress(excel_path, progress)
     
     # Summary
     success_count = current_processed - len(errors)
@@ -1168,6 +1403,8 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
     print(f"✅ Successful: {success_count}")
     print(f"❌ Errors: {len(errors)}")
     print(f"📄 Updated Excel file: {excel_path}")
+    print(f"🤖 {get_llm_cache().summary()}")
+    print(f"🤖 {get_llm_dispatcher().summary()}")
     
     if errors:
         print(f"\n❌ Medications with errors:")
@@ -1177,6 +1414,12 @@ def update_excel_with_side_effects(max_medications=None, start_from=0):
             print(f"   ... and {len(errors) - 10} more")
 
 if __name__ == "__main__":
+    # Export recorded progress into the workbook without scraping
+    if '--export' in sys.argv[1:]:
+        export_side_effects_progress(EXCEL_PATH)
+        sys.exit(0)
+    
+    start_run('side_effects_llm')
     print("🚀 Starting Enhanced LLM-Powered Medication Data Scraper")
     print("="*60)
     print("🔧 Enhanced features:")
@@ -0,0 +1,202 @@
+"""
+Replay corpus recorder
+
+Every scraper already keeps the raw HTML it downloads in page_cache/ and
+every LLM answer in llm_cache/. `record` copies the pages (and answers) of
+recent runs into a self-contained fixture corpus so benchmark_replay.py can
+replay real pages through the extractors with no network:
+
+    replay_corpus/index.json          [{file, url, kind, medication}] and LLM answer files
+    replay_corpus/pages/<sha>.html.gz page bodies
+    replay_corpus/llm/<sha>.json      recorded LLM answers
+
+Kinds: drugs.com:main, drugs.com:sfx, webmd, medlineplus, mayo, other.
+
+Usage:
+    python replay_corpus.py record [--hours N] [--limit N]
+    python replay_corpus.py stats
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import shutil
+from page_cache import get_page_cache
+from llm_cache import get_llm_cache
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replay_corpus')
+
+
+def kind_of_url(url):
+    """Page kind and medication (from the slug when there is one) for a URL"""
+    lower = url.lower()
+    if 'drugs.com/sfx/' in lower:
+        slug = lower.rsplit('/', 1)[-1].replace('-side-effects.html', '')
+        return 'drugs.com:sfx', slug.replace('-', ' ')
+    if 'drugs.com/' in lower and lower.endswith('.html'):
+        return 'drugs.com:main', lower.rsplit('/', 1)[-1][:-len('.html')].replace('-', ' ')
+    if 'webmd.com' in lower:
+        return 'webmd', None
+    if 'medlineplus.gov' in lower:
+        return 'medlineplus', None
+    if 'mayoclinic.org' in lower:
+        return 'mayo', None
+    return 'other', None
+
+
+def kind_of_alias(alias):
+    """(kind, medication) for an alias such as drugs.com:main:metformin or webmd:metformin"""
+    parts = alias.split(':')
+    if parts[0] == 'drugs.com' and len(parts) >= 3:
+        return f'drugs.com:{parts[1]}', ':'.join(parts[2:])
+    if parts[0] in ('webmd', 'medlineplus') and len(parts) >= 2:
+        return parts[0], ':'.join(parts[1:])
+    return None, None
+
+
+def cache_entries(cache_dir):
+    """(meta, meta path, body path) for every entry in the page cache"""
+    for folder, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(folder, name)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            yield meta, meta_path, meta_path[:-len('.json')] + '.html.gz'
+
+
+def read_body(body_path):
+    try:
+        with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return ''
+
+
+def record(corpus_dir=CORPUS_DIR, hours=None, limit=None):
+    """Copy cached pages (newest first) and LLM answers into the corpus; returns the page count"""
+    page_cache = get_page_cache()
+    cutoff = time.time() - hours * 3600 if hours else None
+
+    # Aliases tell which medication and scraper a page belongs to
+    pages = []
+    aliases = {}
+    for meta, meta_path, body_path in cache_entries(page_cache.cache_dir):
+        url = meta.get('url', '')
+        if url.startswith('alias:'):
+            kind, medication = kind_of_alias(url[len('alias:'):])
+            target = read_body(body_path)
+            if kind and target:
+                aliases[target] = (kind, medication)
+        elif meta.get('status', 200) == 200 and os.path.exists(body_path):
+            if cutoff is None or meta.get('fetched_at', 0) >= cutoff:
+                pages.append((meta.get('fetched_at', 0), url, body_path))
+
+    pages.sort(reverse=True)
+    if limit:
+        pages = pages[:limit]
+
+    # A recording replaces the previous corpus
+    for folder in ('pages', 'llm'):
+        shutil.rmtree(os.path.join(corpus_dir, folder), ignore_errors=True)
+    os.makedirs(os.path.join(corpus_dir, 'pages'), exist_ok=True)
+    index = []
+    for fetched_at, url, body_path in pages:
+        kind, medication = aliases.get(url) or kind_of_url(url)
+        file_name = os.path.join('pages', os.path.basename(body_path))
+        shutil.copyfile(body_path, os.path.join(corpus_dir, file_name))
+        index.append({'file': file_name, 'url': url, 'kind': kind, 'medication': medication, 'fetched_at': fetched_at})
+
+    # LLM answers (the cache keeps the response text, keyed by prompt hash)
+    llm_files = []
+    llm_cache_dir = get_llm_cache().cache_dir
+    os.makedirs(os.path.join(corpus_dir, 'llm'), exist_ok=True)
+    for folder, _, files in os.walk(llm_cache_dir):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(folder, name)
+            if cutoff is not None and os.path.getmtime(path) < cutoff:
+                continue
+            shutil.copyfile(path, os.path.join(corpus_dir, 'llm', name))
+            llm_files.append(os.path.join('llm', name))
+
+    with open(os.path.join(corpus_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'recorded_at': time.time(), 'pages': index, 'llm': sorted(llm_files)}, f, indent=1, ensure_ascii=False)
+    return len(index)
+
+
+class ReplayCorpus:
+    def __init__(self, corpus_dir=CORPUS_DIR):
+        self.corpus_dir = corpus_dir
+        self.index = {'pages': [], 'llm': []}
+        index_path = os.path.join(corpus_dir, 'index.json')
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def pages(self, kind):
+        """[(medication, url, html)] for one page kind"""
+        result = []
+        for entry in self.index['pages']:
+            if entry['kind'] == kind:
+                html = read_body(os.path.join(self.corpus_dir, entry['file']))
+                if html:
+                    result.append((entry.get('medication') or '', entry['url'], html))
+        return result
+
+    def llm_responses(self):
+        """Recorded LLM answer texts"""
+        responses = []
+        for file_name in self.index.get('llm', []):
+            try:
+                with open(os.path.join(self.corpus_dir, file_name), 'r', encoding='utf-8') as f:
+                    responses.append(json.load(f)['response'])
+            except (OSError, ValueError, KeyError):
+                continue
+        return responses
+
+    def counts(self):
+        counts = {}
+        for entry in self.index['pages']:
+            counts[entry['kind']] = counts.get(entry['kind'], 0) + 1
+        counts['llm answers'] = len(self.index.get('llm', []))
+        return counts
+
+
+def get_option(args, name, default):
+    """Read --name N (or --name=N) from the command line"""
+    for i, arg in enumerate(args):
+        try:
+            if arg.startswith(f'--{name}='):
+                return float(arg.split('=', 1)[1])
+            if arg == f'--{name}' and i + 1 < len(args):
+                return float(args[i + 1])
+        except ValueError:
+            print(f"Invalid value in '{arg}', using {default}")
+            return default
+    return default
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args and not args[0].startswith('--') else 'stats'
+
+    if command == 'record':
+        hours = get_option(args, 'hours', None)
+        limit = get_option(args, 'limit', None)
+        recorded = record(hours=hours, limit=int(limit) if limit else None)
+        print(f"📼 Recorded {recorded} pages into {CORPUS_DIR}")
+
+    for kind, number in sorted(ReplayCorpus().counts().items()):
+        print(f"   {kind:<16} {number}")
+
+
+if __name__ == "__main__":
+    main()
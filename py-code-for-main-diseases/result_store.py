@@ -0,0 +1,296 @@
+"""
+SQLite result store
+
+System of record for everything the pipeline produces. The Excel workbooks
+are exports built from it; rows are keyed by the plain drug key
+(drug_names.drug_key, the same key the caches use) and lookups also try the
+generic of a known brand, instead of re-parsing the latest workbook.
+
+Tables:
+    medications          drugs.com brand/dosage/how/when per medication
+    diseases             disease rows (JSON) from the analyzer
+    disease_medications  which medications belong to which disease
+    tests                tests and treatments per disease (JSON)
+    llm_outputs          structured LLM answers per (task, subject)
+    runs                 one row per script run with status and stats
+
+Raw pages stay in the gzip page cache (page_cache.py), keyed by URL.
+The database runs in WAL mode so parallel workers and a reader (e.g. an
+export) do not block each other.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from drug_names import drug_key, get_drug_index
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS medications (
+    drug_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    brand_name TEXT,
+    dosage TEXT,
+    how_to_take TEXT,
+    when_to_take TEXT,
+    source TEXT,
+    run_id INTEGER,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS diseases (
+    name TEXT PRIMARY KEY,
+    data TEXT,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS disease_medications (
+    disease TEXT NOT NULL,
+    drug_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (disease, drug_key)
+);
+CREATE INDEX IF NOT EXISTS idx_disease_medications_drug ON disease_medications (drug_key);
+
+CREATE TABLE IF NOT EXISTS tests (
+    disease TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT,
+    updated_at REAL,
+    PRIMARY KEY (disease, kind, name)
+);
+
+CREATE TABLE IF NOT EXISTS llm_outputs (
+    task TEXT NOT NULL,
+    subject_key TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    model TEXT,
+    output TEXT,
+    created_at REAL,
+    PRIMARY KEY (task, subject_key)
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    status TEXT,
+    stats TEXT
+);
+"""
+
+MEDICATION_FIELDS = ['brand_name', 'dosage', 'how_to_take', 'when_to_take']
+
+
+def normalize_drug_name(name):
+    """Storage key for a medication name (shared drug_names.drug_key, the same in every process)"""
+    return drug_key(name)
+
+
+def lookup_keys(name):
+    """Keys to try when looking a medication up: its own, then its generic's if it is a known brand"""
+    keys = [drug_key(name)]
+    resolved = get_drug_index().key_of(name)
+    if resolved not in keys:
+        keys.append(resolved)
+    return keys
+
+
+def to_json(value):
+    """Store dicts/lists as JSON and everything else as text"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return None if value is None else str(value)
+
+
+def from_json(text):
+    """Inverse of to_json"""
+    if text and text[0] in '{[':
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
+class ResultStore:
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # sqlite3 connections must stay on the thread that opened them
+        self._local = threading.local()
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """SQLite connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # Runs ---------------------------------------------------------------
+
+    def start_run(self, script):
+        """Record the start of a script run and return its id"""
+        with self.connection as conn:
+            cursor = conn.execute(
+                'INSERT INTO runs (script, started_at, status) VALUES (?, ?, ?)',
+                (script, time.time(), 'running')
+            )
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, status='completed', stats=None):
+        """Mark a run as finished"""
+        with self.connection as conn:
+            conn.execute(
+                'UPDATE runs SET finished_at = ?, status = ?, stats = ? WHERE id = ?',
+                (time.time(), status, to_json(stats or {}), run_id)
+            )
+
+    # Medications --------------------------------------------------------
+
+    def upsert_medications(self, data, source=None, run_id=None):
+        """Insert or update {name: {brand_name, dosage, how_to_take, when_to_take}}"""
+        now = time.time()
+        rows = [
+            (normalize_drug_name(name), str(name).strip(), *[info.get(field, 'Not found') for field in MEDICATION_FIELDS], source, run_id, now)
+            for name, info in data.items()
+            if normalize_drug_name(name)
+        ]
+        with self.connection as conn:
+            conn.executemany(
+                '''INSERT INTO medications (drug_key, name, brand_name, dosage, how_to_take, when_to_take, source, run_id, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(drug_key) DO UPDATE SET
+                       name = excluded.name, brand_name = excluded.brand_name, dosage = excluded.dosage,
+                       how_to_take = excluded.how_to_take, when_to_take = excluded.when_to_take,
+                       source = excluded.source, run_id = excluded.run_id, updated_at = excluded.updated_at''',
+                rows
+            )
+        return len(rows)
+
+    def get_medications(self):
+        """All stored medications as {name: {brand_name, dosage, how_to_take, when_to_take}}"""
+        cursor = self.connection.execute(
+            'SELECT name, brand_name, dosage, how_to_take, when_to_take FROM medications ORDER BY name'
+        )
+        return {row[0]: dict(zip(MEDICATION_FIELDS, row[1:])) for row in cursor}
+
+    def get_medication(self, name):
+        """One medication by (normalized) name, or None"""
+        for key in lookup_keys(name):
+            row = self.connection.execute(
+                'SELECT brand_name, dosage, how_to_take, when_to_take FROM medications WHERE drug_key = ?',
+                (key,)
+            ).fetchone()
+            if row:
+                return dict(zip(MEDICATION_FIELDS, row))
+        return None
+
+    def medication_count(self):
+        """Number of stored medications"""
+        return self.connection.execute('SELECT COUNT(*) FROM medications').fetchone()[0]
+
+    def missing_medications(self, names):
+        """Names whose normalized key is not stored yet, in input order, without duplicates"""
+        stored = {row[0] for row in self.connection.execute('SELECT drug_key FROM medications')}
+        drug_index = get_drug_index()
+        missing = []
+        for name in names:
+            key = normalize_drug_name(name)
+            if key and drug_index.stored_key(stored, name) is None:
+                stored.add(key)
+                missing.append(name)
+        return missing
+
+    # Diseases and tests -------------------------------------------------
+
+    def put_disease(self, name, data):
+        """Store one disease row"""
+        with self.connection as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO diseases (name, data, updated_at) VALUES (?, ?, ?)',
+                (name, to_json(data), time.time())
+            )
+
+    def put_disease_medications(self, disease, names):
+        """Replace the medication list of a disease"""
+        rows = [(disease, normalize_drug_name(name), name) for name in names if normalize_drug_name(name)]
+        with self.connection as conn:
+            conn.execute('DELETE FROM disease_medications WHERE disease = ?', (disease,))
+            conn.executemany('INSERT OR IGNORE INTO disease_medications (disease, drug_key, name) VALUES (?, ?, ?)', rows)
+
+    def get_disease_medications(self, disease):
+        """Medication names stored for a disease, in the order they were written"""
+        cursor = self.connection.execute('SELECT name FROM disease_medications WHERE disease = ? ORDER BY rowid', (disease,))
+        return [name for (name,) in cursor]
+
+    def get_disease_associations(self):
+        """{medication name: 'Disease A; Disease B'} as written to the Disease Tag column"""
+        associations = {}
+        cursor = self.connection.execute('SELECT name, disease FROM disease_medications ORDER BY rowid')
+        for name, disease in cursor:
+            associations.setdefault(name, []).append(disease)
+        return {name: '; '.join(diseases) for name, diseases in associations.items()}
+
+    def put_tests(self, disease, kind, items):
+        """Store {name: data} tests or treatments for a disease"""
+        now = time.time()
+        rows = [(disease, kind, name, to_json(data), now) for name, data in items.items()]
+        with self.connection as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO tests (disease, kind, name, data, updated_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    # LLM outputs --------------------------------------------------------
+
+    def put_llm_output(self, task, subject, output, model=None):
+        """Store the structured LLM answer for one subject (medication, disease, procedure)"""
+        self.put_llm_outputs(task, {subject: output}, model)
+
+    def put_llm_outputs(self, task, outputs, model=None):
+        """Store {subject: output} answers for a task"""
+        now = time.time()
+        rows = [(task, normalize_drug_name(subject), subject, model, to_json(output), now)
+                for subject, output in outputs.items()]
+        with self.connection as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO llm_outputs (task, subject_key, subject, model, output, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def get_llm_output(self, task, subject):
+        """Stored answer for one subject, or None"""
+        row = self.connection.execute(
+            'SELECT output FROM llm_outputs WHERE task = ? AND subject_key = ?',
+            (task, normalize_drug_name(subject))
+        ).fetchone()
+        return from_json(row[0]) if row else None
+
+    def get_llm_outputs(self, task):
+        """{subject: output} for a task"""
+        cursor = self.connection.execute('SELECT subject, output FROM llm_outputs WHERE task = ?', (task,))
+        return {subject: from_json(output) for subject, output in cursor}
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Process-wide store shared by all scripts"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ResultStore()
+    return _shared_store
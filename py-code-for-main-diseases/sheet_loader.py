@@ -0,0 +1,209 @@
+"""
+Vectorized Excel loaders
+
+Every ingest path used to walk rows with DataFrame.iterrows() or read
+cells one by one with openpyxl, and several re-read the same workbook once
+per sheet. These helpers read a workbook once (all sheets, header=None,
+dtype=object so values keep their cell types; calamine when installed), locate the header row with
+a column comparison, drop title/statistics rows with boolean masks and
+hand back frames or plain dicts. Parsed workbooks are memoized per process
+and invalidated when the file changes on disk.
+"""
+
+import os
+import threading
+import pandas as pd
+from instrumentation import count, span
+
+# calamine (Rust) parses xlsx several times faster than openpyxl; optional
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+# Markers the report writers put in front of section/statistics rows
+SECTION_MARKERS = ('📊', '📋', '📈')
+
+MEDICATION_COLUMNS = {
+    'Brand Names': 'brand_name',
+    'Dosage Forms': 'dosage',
+    'How to Take': 'how_to_take',
+    'When to Take': 'when_to_take',
+}
+
+
+# Parsed workbooks: absolute path -> ((mtime_ns, size), {sheet name: raw frame})
+_parsed_workbooks = {}
+_parsed_workbooks_lock = threading.Lock()
+
+
+def read_workbook(path):
+    """
+    {sheet name: raw frame} for every sheet. Each file is parsed once per
+    process and re-parsed only when its mtime or size changes; callers get
+    the shared frames and must copy before modifying them in place.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _parsed_workbooks_lock:
+        cached = _parsed_workbooks.get(key)
+        if cached and cached[0] == version:
+            count('workbook_cache.hit')
+            return dict(cached[1])
+
+    count('workbook_cache.miss')
+    with span('excel.read'):
+        sheets = pd.read_excel(key, sheet_name=None, header=None, dtype=object, engine=EXCEL_ENGINE)
+    with _parsed_workbooks_lock:
+        _parsed_workbooks[key] = (version, sheets)
+    return dict(sheets)
+
+
+def read_sheet(path, sheet_name=0):
+    """One raw sheet (no header row applied), by name or position, from the parsed workbook"""
+    sheets = read_workbook(path)
+    if isinstance(sheet_name, int):
+        return list(sheets.values())[sheet_name]
+    return sheets[sheet_name]
+
+
+def sheet_names(path):
+    """Sheet names in workbook order"""
+    return list(read_workbook(path))
+
+
+def forget_workbook(path=None):
+    """Drop one parsed workbook (or all of them) from the cache"""
+    with _parsed_workbooks_lock:
+        if path is None:
+            _parsed_workbooks.clear()
+        else:
+            _parsed_workbooks.pop(os.path.abspath(path), None)
+
+
+def text_values(series):
+    """Stripped str() of every value; missing cells become ''"""
+    return series.where(series.notna(), '').astype(str).str.strip()
+
+
+def with_first_row_as_header(raw):
+    """What pd.read_excel(path) returns: first row as column names, 'Unnamed: i' for blanks"""
+    if raw.empty:
+        return raw
+    columns = [
+        value if pd.notna(value) else f'Unnamed: {i}'
+        for i, value in enumerate(raw.iloc[0])
+    ]
+    frame = raw.iloc[1:].reset_index(drop=True)
+    frame.columns = columns
+    return frame
+
+
+def read_table(path, sheet_name=0):
+    """Memoized equivalent of pd.read_excel(path, sheet_name): first row as header, safe to modify"""
+    return with_first_row_as_header(read_sheet(path, sheet_name)).copy()
+
+
+def find_header_row(raw, label, column=0, max_rows=None):
+    """Position of the first row whose cell in column equals label, or None"""
+    values = raw.iloc[:max_rows, column] if max_rows else raw.iloc[:, column]
+    matches = (text_values(values) == label).to_numpy().nonzero()[0]
+    return int(matches[0]) if len(matches) else None
+
+
+def table_below_header(raw, label='Medication Name', column=0, max_rows=None):
+    """
+    Rows under the header row labelled `label`, with that row as column names
+    (blank header cells become 'Unnamed: i'). Returns None when the label is missing.
+    """
+    header_row = find_header_row(raw, label, column, max_rows)
+    if header_row is None:
+        return None
+    headers = [
+        value if pd.notna(value) and str(value).strip() else f'Unnamed: {i}'
+        for i, value in enumerate(raw.iloc[header_row])
+    ]
+    table = raw.iloc[header_row + 1:].copy()
+    table.columns = headers
+    return table
+
+
+def medication_rows_mask(names, extra_excluded=()):
+    """Rows that hold a medication: not blank, not a section marker, not a repeated header"""
+    text = text_values(names)
+    mask = names.notna() & (text != '') & (text != 'nan') & ~text.str.startswith(SECTION_MARKERS)
+    excluded = {'Medication Name', *extra_excluded}
+    return mask & ~text.isin(excluded)
+
+
+def load_medication_table(path, sheet_name=0):
+    """
+    Medication table of a medication_*.xlsx report. Works for the clean layout
+    (header in the first row) and the professional layout (statistics block first).
+    """
+    raw = read_sheet(path, sheet_name)
+    table = table_below_header(raw, 'Medication Name')
+    if table is None:
+        table = with_first_row_as_header(raw)
+    if 'Medication Name' not in table.columns:
+        raise KeyError('Medication Name')
+    table = table[medication_rows_mask(table['Medication Name'])]
+    return table.reset_index(drop=True)
+
+
+def medication_records(table, default='Not found'):
+    """{medication name: {brand_name, dosage, how_to_take, when_to_take}} from a medication table"""
+    names = text_values(table['Medication Name'])
+    columns = {}
+    for header, field in MEDICATION_COLUMNS.items():
+        if header in table.columns:
+            values = table[header]
+            columns[field] = values.astype(str).where(values.notna(), default).tolist()
+        else:
+            columns[field] = [default] * len(table)
+
+    fields = list(columns)
+    return {
+        name: dict(zip(fields, row))
+        for name, row in zip(names.tolist(), zip(*columns.values()))
+    }
+
+
+def column_values(frame, column):
+    """Stripped text of a column without missing cells, in sheet order"""
+    values = text_values(frame[column])
+    return values[frame[column].notna() & (values != 'nan')].tolist()
+
+
+def disease_tags_from_unique_sheet(raw, excluded_labels):
+    """{medication: disease tag} from the 'All Unique Medications' sheet (columns 0 and 5)"""
+    frame = with_first_row_as_header(raw)
+    if frame.shape[1] < 6:
+        return {}
+    medications = text_values(frame.iloc[:, 0])
+    tags = text_values(frame.iloc[:, 5])
+    mask = (
+        frame.iloc[:, 0].notna() & (medications != 'nan') &
+        ~medications.str.upper().isin(excluded_labels) &
+        (medications.str.len() > 2) &
+        frame.iloc[:, 5].notna() & (tags != '') & (tags != 'nan')
+    )
+    return dict(zip(medications[mask], tags[mask]))
+
+
+def medications_from_disease_sheet(raw, excluded_labels):
+    """Medication-like names from the first column of a disease sheet, in order"""
+    frame = with_first_row_as_header(raw)
+    if frame.empty:
+        return []
+    names = text_values(frame.iloc[:, 0])
+    mask = (
+        (names != '') & (names != 'nan') &
+        ~names.str.upper().isin(excluded_labels) &
+        (names.str.len() > 2) &
+        ~names.str.startswith('Total medications')
+    )
+    return names[mask].tolist()
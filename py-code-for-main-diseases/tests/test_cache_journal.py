@@ -0,0 +1,96 @@
+import json
+from cache_journal import CacheJournal
+
+
+def journal_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    path.write_text('{"k": "aspirin", "v": 1}\n{"k": "ibuprofen", "v": 2}\n{"k": "napro', encoding='utf-8')
+
+    journal = CacheJournal(str(path))
+    assert journal.load() == {'aspirin': 1, 'ibuprofen': 2}
+    assert path.read_text(encoding='utf-8').endswith('"v": 2}\n')
+
+    # Appends after recovery start on a clean line
+    journal.put('naproxen', 3)
+    journal.close()
+    assert CacheJournal(str(path)).load() == {'aspirin': 1, 'ibuprofen': 2, 'naproxen': 3}
+
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    path.write_text('{"k": "aspirin", "v": 1}\nnot json\n{"v": 2}\n', encoding='utf-8')
+    assert CacheJournal(str(path)).load() == {'aspirin': 1}
+
+
+def test_last_line_for_a_key_wins(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    journal = CacheJournal(path)
+    journal.load()
+    journal.put('aspirin', 'old')
+    journal.put('aspirin', 'new')
+    journal.close()
+    assert CacheJournal(path).load() == {'aspirin': 'new'}
+
+
+def test_save_appends_only_changes(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    journal = CacheJournal(path)
+    journal.load()
+    journal.save({'aspirin': 1, 'ibuprofen': 2})
+    journal.save({'aspirin': 1, 'ibuprofen': 3})
+    journal.close()
+    assert journal_lines(path) == [
+        {'k': 'aspirin', 'v': 1},
+        {'k': 'ibuprofen', 'v': 2},
+        {'k': 'ibuprofen', 'v': 3},
+    ]
+
+
+def test_compacts_once_superseded_lines_dominate(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    journal = CacheJournal(path, min_compact_lines=10)
+    journal.load()
+    for i in range(11):
+        journal.put('aspirin', i)
+    journal.put('ibuprofen', 'x')
+    journal.close()
+
+    lines = journal_lines(path)
+    assert len(lines) < 12
+    assert CacheJournal(path).load() == {'aspirin': 10, 'ibuprofen': 'x'}
+
+
+def test_compact_keeps_one_line_per_key(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    journal = CacheJournal(path)
+    journal.load()
+    for i in range(5):
+        journal.put('aspirin', i)
+    journal.compact()
+    journal.close()
+    assert journal_lines(path) == [{'k': 'aspirin', 'v': 4}]
+    assert not list(tmp_path.glob('*.tmp*'))
+
+
+def test_replace_rewrites_the_whole_journal(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    journal = CacheJournal(path)
+    journal.load()
+    journal.save({'Aspirin 81 mg': 1, 'Ibuprofen': 2})
+    journal.replace({'aspirin': 1})
+    journal.put('ibuprofen', 2)
+    journal.close()
+    assert journal_lines(path) == [{'k': 'aspirin', 'v': 1}, {'k': 'ibuprofen', 'v': 2}]
+    assert CacheJournal(path).load() == {'aspirin': 1, 'ibuprofen': 2}
+
+
+def test_legacy_json_cache_is_imported(tmp_path):
+    (tmp_path / 'cache.json').write_text(json.dumps({'aspirin': 1}), encoding='utf-8')
+    path = str(tmp_path / 'cache.jsonl')
+    assert CacheJournal(path).load() == {'aspirin': 1}
+    assert journal_lines(path) == [{'k': 'aspirin', 'v': 1}]
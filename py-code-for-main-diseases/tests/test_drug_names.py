@@ -0,0 +1,75 @@
+import pytest
+from drug_names import DrugIndex, drug_key, search_name, split_brands
+
+
+@pytest.mark.parametrize('name, key', [
+    ('ASPIRIN 81 mg tablets', 'aspirin'),
+    ('Aspirin', 'aspirin'),
+    ('  aspirin  ', 'aspirin'),
+    ('Aspirin®', 'aspirin'),
+    ('Hydrocortisone 1% cream', 'hydrocortisone'),
+    ('Hydrocortisone 2.5% cream', 'hydrocortisone'),
+    ('Oral metformin 500 mg', 'metformin'),
+    ('Amoxicillin (oral)', 'amoxicillin'),
+    ('Vitamin B12', 'vitamin b12'),
+    ('Gel', 'gel'),
+    (None, ''),
+    (float('nan'), ''),
+])
+def test_drug_key(name, key):
+    assert drug_key(name) == key
+
+
+def test_drug_key_is_idempotent():
+    for name in ['ASPIRIN 81 mg tablets', 'Hydrocortisone 1% cream', 'Vitamin B12', 'Insulin glargine 100 units/ml']:
+        assert drug_key(drug_key(name)) == drug_key(name)
+
+
+def test_search_name():
+    assert search_name('Metformin 500 mg tablets') == 'metformin'
+    assert search_name('Amoxicillin oral suspension') == 'amoxicillin'
+
+
+def test_split_brands():
+    assert split_brands('Tylenol | Not found |  Panadol ') == ['Tylenol', 'Panadol']
+    assert split_brands(None) == []
+
+
+@pytest.fixture
+def index():
+    index = DrugIndex()
+    index.add('Acetaminophen', 'Tylenol | Panadol')
+    index.add('Ibuprofen', 'Advil | Motrin')
+    return index
+
+
+def test_key_of_is_stable_across_spellings(index):
+    assert index.key_of('ACETAMINOPHEN 500 mg') == index.key_of('acetaminophen') == 'acetaminophen'
+    assert index.key_of('Tylenol') == 'acetaminophen'
+    assert index.key_of('Unknown drug') == 'unknown drug'
+
+
+def test_key_of_keeps_ambiguous_brands(index):
+    index.add('Naproxen', 'Combo')
+    index.add('Esomeprazole', 'Combo')
+    assert index.key_of('Combo') == 'combo'
+
+
+def test_brand_added_later_keeps_its_generic_key(index):
+    assert index.add('Panadol') == 'Acetaminophen'
+    assert index.key_of('Panadol') == 'acetaminophen'
+
+
+def test_stored_key(index):
+    stored = {'acetaminophen': 'x', 'advil': 'y'}
+    assert index.stored_key(stored, 'Acetaminophen 500 mg') == 'acetaminophen'
+    assert index.stored_key(stored, 'Tylenol') == 'acetaminophen'
+    assert index.stored_key(stored, 'Advil') == 'advil'
+    assert index.stored_key(stored, 'Naproxen') is None
+
+
+def test_dedupe_and_canonical(index):
+    assert index.dedupe(['Tylenol', 'acetaminophen', 'Advil', 'Ibuprofen 200 mg']) == ['Tylenol', 'Advil']
+    assert index.canonical('tylenol') == 'Acetaminophen'
+    assert index.brands_of('Acetaminophen 500 mg') == ['Panadol', 'Tylenol']
+    assert 'Motrin' in index
@@ -0,0 +1,89 @@
+import pytest
+from llm_cache import LLMCache
+from llm_dispatcher import LLMDispatcher, is_transient
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f'HTTP {code}')
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FlakyModel:
+    """Raises the queued errors in order, then answers"""
+    model_name = 'models/fake'
+
+    def __init__(self, errors, answer='ok'):
+        self.errors = list(errors)
+        self.answer = answer
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeResponse(self.answer)
+
+
+@pytest.mark.parametrize('error', [
+    TimeoutError(),
+    ConnectionError(),
+    StatusError(429),
+    StatusError(503),
+])
+def test_transient_errors(error):
+    assert is_transient(error)
+
+
+@pytest.mark.parametrize('error', [
+    ValueError('bad prompt'),
+    StatusError(400),
+    StatusError(403),
+    StatusError('429'),
+    Exception('blocked by safety filters'),
+])
+def test_permanent_errors(error):
+    assert not is_transient(error)
+
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    dispatcher = LLMDispatcher(requests_per_minute=6000, max_retries=2, base_delay=0, cache=LLMCache(str(tmp_path)))
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def test_transient_errors_are_retried(dispatcher):
+    model = FlakyModel([StatusError(429), TimeoutError()])
+    assert dispatcher.generate(model, 'prompt') == 'ok'
+    assert model.calls == 3
+    assert dispatcher.retries == 2
+    assert dispatcher.failures == 0
+
+
+def test_permanent_errors_fail_at_once(dispatcher):
+    model = FlakyModel([StatusError(400)])
+    with pytest.raises(StatusError):
+        dispatcher.generate(model, 'prompt')
+    assert model.calls == 1
+    assert dispatcher.retries == 0
+    assert dispatcher.failures == 1
+
+
+def test_retries_are_bounded(dispatcher):
+    model = FlakyModel([StatusError(503)] * 5)
+    with pytest.raises(StatusError):
+        dispatcher.generate(model, 'prompt')
+    assert model.calls == 3
+
+
+def test_cached_answers_skip_the_model(dispatcher):
+    model = FlakyModel([])
+    assert dispatcher.generate(model, 'prompt') == 'ok'
+    assert dispatcher.generate(model, 'prompt') == 'ok'
+    assert model.calls == 1
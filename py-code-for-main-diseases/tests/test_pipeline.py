@@ -0,0 +1,98 @@
+import pytest
+from pipeline import PipelineRunner, Stage
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    source = tmp_path / 'input.csv'
+    source.write_text('name\naspirin\n', encoding='utf-8')
+    output = tmp_path / 'output.txt'
+    return source, output, str(tmp_path / 'state.jsonl')
+
+
+def make_stage(source, output, runs):
+    def run():
+        runs.append(source.read_text(encoding='utf-8'))
+        output.write_text('done', encoding='utf-8')
+    return Stage('convert', run, inputs=[str(source)], outputs=[str(output)])
+
+
+def test_unchanged_inputs_skip_the_stage(workspace):
+    source, output, state_path = workspace
+    runs = []
+    stage = make_stage(source, output, runs)
+
+    assert PipelineRunner([stage], state_path).run()
+    assert PipelineRunner([stage], state_path).run()
+    assert len(runs) == 1
+
+
+def test_changed_input_hash_reruns_the_stage(workspace):
+    source, output, state_path = workspace
+    runs = []
+    stage = make_stage(source, output, runs)
+
+    PipelineRunner([stage], state_path).run()
+    source.write_text('name\naspirin\nibuprofen\n', encoding='utf-8')
+    PipelineRunner([stage], state_path).run()
+    PipelineRunner([stage], state_path).run()
+    assert runs == ['name\naspirin\n', 'name\naspirin\nibuprofen\n']
+
+
+def test_missing_output_reruns_the_stage(workspace):
+    source, output, state_path = workspace
+    runs = []
+    stage = make_stage(source, output, runs)
+
+    PipelineRunner([stage], state_path).run()
+    output.unlink()
+    runner = PipelineRunner([stage], state_path)
+    assert runner.needs_run(stage, runner.fingerprint(stage)[0]) == 'outputs missing'
+    runner.run()
+    assert len(runs) == 2
+
+
+def test_force_reruns_an_up_to_date_stage(workspace):
+    source, output, state_path = workspace
+    runs = []
+    stage = make_stage(source, output, runs)
+
+    PipelineRunner([stage], state_path).run()
+    PipelineRunner([stage], state_path).run(force=True)
+    assert len(runs) == 2
+
+
+def test_failed_stage_is_not_recorded(workspace):
+    source, output, state_path = workspace
+
+    def fail():
+        raise RuntimeError('boom')
+
+    assert not PipelineRunner([Stage('convert', fail, inputs=[str(source)])], state_path).run()
+    runner = PipelineRunner([make_stage(source, output, [])], state_path)
+    assert 'convert' not in runner.recorded
+
+
+def test_row_inputs_receive_only_changed_keys(workspace):
+    _, _, state_path = workspace
+    rows = {'aspirin': 'a', 'ibuprofen': 'b'}
+    received = []
+    stage = Stage('per_row', received.append, row_inputs={'drugs': lambda: dict(rows)})
+
+    PipelineRunner([stage], state_path).run()
+    rows['ibuprofen'] = 'changed'
+    rows['naproxen'] = 'new'
+    PipelineRunner([stage], state_path).run()
+    assert received == [{'drugs': None}, {'drugs': {'ibuprofen', 'naproxen'}}]
+
+
+def test_upstream_run_invalidates_dependent_stage(workspace):
+    source, output, state_path = workspace
+    upstream_runs, downstream_runs = [], []
+    upstream = make_stage(source, output, upstream_runs)
+    downstream = Stage('report', lambda: downstream_runs.append(1), depends=['convert'])
+
+    PipelineRunner([upstream, downstream], state_path).run()
+    PipelineRunner([upstream, downstream], state_path).run(names=['convert'], force=True)
+    PipelineRunner([upstream, downstream], state_path).run()
+    assert len(downstream_runs) == 2
@@ -0,0 +1,78 @@
+import os
+import pandas as pd
+import pytest
+import sheet_loader
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """Count the real pd.read_excel parses behind read_workbook"""
+    calls = []
+    real_read_excel = pd.read_excel
+
+    def counting_read_excel(*args, **kwargs):
+        calls.append(args[0])
+        return real_read_excel(*args, **kwargs)
+
+    monkeypatch.setattr(sheet_loader.pd, 'read_excel', counting_read_excel)
+    sheet_loader.forget_workbook()
+    yield calls
+    sheet_loader.forget_workbook()
+
+
+def write_workbook(path, names):
+    pd.DataFrame({'Medication Name': names}).to_excel(path, sheet_name='Meds', index=False)
+
+
+def test_workbook_is_parsed_once(tmp_path, parse_calls):
+    path = str(tmp_path / 'meds.xlsx')
+    write_workbook(path, ['Aspirin'])
+
+    first = sheet_loader.read_sheet(path, 'Meds')
+    second = sheet_loader.read_sheet(path, 0)
+    assert sheet_loader.sheet_names(path) == ['Meds']
+    assert len(parse_calls) == 1
+    assert first is second
+
+
+def test_size_change_invalidates(tmp_path, parse_calls):
+    path = str(tmp_path / 'meds.xlsx')
+    write_workbook(path, ['Aspirin'])
+    sheet_loader.read_workbook(path)
+
+    write_workbook(path, ['Aspirin', 'Ibuprofen', 'Naproxen sodium'])
+    stat = os.stat(path)
+    sheet = sheet_loader.read_sheet(path)
+    assert len(parse_calls) == 2
+    assert list(sheet[0]) == ['Medication Name', 'Aspirin', 'Ibuprofen', 'Naproxen sodium']
+    assert sheet_loader._parsed_workbooks[os.path.abspath(path)][0] == (stat.st_mtime_ns, stat.st_size)
+
+
+def test_mtime_change_invalidates(tmp_path, parse_calls):
+    path = str(tmp_path / 'meds.xlsx')
+    write_workbook(path, ['Aspirin'])
+    sheet_loader.read_workbook(path)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    sheet_loader.read_workbook(path)
+    assert len(parse_calls) == 2
+
+    sheet_loader.read_workbook(path)
+    assert len(parse_calls) == 2
+
+
+def test_forget_workbook_drops_the_entry(tmp_path, parse_calls):
+    path = str(tmp_path / 'meds.xlsx')
+    write_workbook(path, ['Aspirin'])
+    sheet_loader.read_workbook(path)
+    sheet_loader.forget_workbook(path)
+    sheet_loader.read_workbook(path)
+    assert len(parse_calls) == 2
+
+
+def test_callers_get_their_own_sheet_dict(tmp_path, parse_calls):
+    path = str(tmp_path / 'meds.xlsx')
+    write_workbook(path, ['Aspirin'])
+    sheet_loader.read_workbook(path).pop('Meds')
+    assert 'Meds' in sheet_loader.read_workbook(path)
@@ -10,6 +10,11 @@ import time
 from dotenv import load_dotenv
 from google.generativeai import GenerativeModel
 import google.generativeai as genai
+from page_cache import get_page_cache
+from llm_cache import get_llm_cache
+from llm_dispatcher import get_llm_dispatcher
+from result_store import get_result_store
+from instrumentation import count, span, timed, start_run
 
 # Load environment variables
 load_dotenv('../.env')
@@ -156,6 +161,10 @@ def extract_tests_and_treatments_from_main_diseases_excel():
         enhanced_tests = enhance_items_with_mayo_clinic(all_tests, "test")
         enhanced_treatments = enhance_items_with_mayo_clinic(all_treatments, "treatment")
         
+        # Record results in the result store; the workbook below is an export
+        store_items_in_result_store(enhanced_tests, "test")
+        store_items_in_result_store(enhanced_treatments, "treatment")
+        
         # Create Excel workbook
         wb = Workbook()
         
@@ -174,8 +183,10 @@ def extract_tests_and_treatments_from_main_diseases_excel():
         
         # Save the workbook
         output_path = '../Analysis/tests_treatments_enhanced_analysis.xlsx'
-        wb.save(output_path)
+        with span('excel.save'):
+            wb.save(output_path)
         print(f"\n💾 Enhanced analysis saved to: {output_path}")
+        print(f"🤖 {get_llm_cache().summary()}")
         
         return output_path
         
@@ -932,6 +943,24 @@ def create_summary_sheet(ws, processed_diseases, all_tests, all_treatments):
     
     print(f"✅ Created Summary sheet")
 
+def fetch_mayo_page(url, headers, timeout=10):
+    """Fetch a Mayo Clinic page through the shared page cache; returns (status, html)"""
+    page_cache = get_page_cache()
+    
+    # Check cache first
+    cached = page_cache.lookup(url)
+    if cached:
+        return cached
+    
+    with span('fetch.mayo'):
+        response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 200:
+        page_cache.put(url, response.text)
+        return 200, response.text
+    
+    page_cache.put_miss(url, response.status_code)
+    return response.status_code, ''
+
 def search_mayo_clinic_direct(test_name):
     """Search for a test/treatment using common Mayo Clinic URL patterns"""
     
@@ -998,14 +1027,15 @@ def search_mayo_clinic_direct(test_name):
         procedure_url = f"https://www.mayoclinic.org/tests-procedures/{url_name}/about/pac-20384919"
     
     try:
-        response = requests.get(procedure_url, headers=headers, timeout=10)
-        if response.status_code == 200:
+        status, _ = fetch_mayo_page(procedure_url, headers, timeout=10)
+        if status == 200:
             return procedure_url, test_name
         else:
             return None, None
     except:
         return None, None
 
+@timed('parse.mayo')
 def scrape_mayo_clinic_procedure(url, procedure_name):
     """Scrape detailed information from a Mayo Clinic procedure page"""
     
@@ -1017,9 +1047,11 @@ def scrape_mayo_clinic_procedure(url, procedure_name):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Usually a cache hit: search_mayo_clinic_direct already fetched this URL
+        status, html = fetch_mayo_page(url, headers, timeout=15)
+        if status != 200:
+            raise Exception(f"HTTP {status}")
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Extract main content
         main_content = soup.find('div', class_='content') or soup.find('main') or soup.find('article')
@@ -1039,6 +1071,7 @@ def scrape_mayo_clinic_procedure(url, procedure_name):
         
     return None
 
+@timed('llm.procedure')
 def extract_procedure_info_with_llm(content_text, procedure_name):
     """Use LLM to extract Spanish name, description, and background info"""
     if not content_text:
@@ -1074,8 +1107,7 @@ Guidelines:
 - For MAIN_DISEASES: list the primary medical conditions this test/procedure is used for (e.g., "Heart disease; Diabetes; Hypertension")
 """
 
-        result = model.generate_content(prompt)
-        response = result.text  # Use .text instead of .response.text()
+        response = get_llm_dispatcher().generate(model, prompt)
         
         # Parse the LLM response
         extracted_info = {
@@ -1116,6 +1148,7 @@ def enhance_items_with_mayo_clinic(items_dict, item_type="test"):
     
     for i, (item_name, diseases) in enumerate(items_dict.items(), 1):
         print(f"\n[{i}/{len(items_dict)}] Processing: {item_name}")
+        count(f'item.{item_type}')
         
         # Search for the item on Mayo Clinic
         mayo_url, mayo_title = search_mayo_clinic_direct(item_name)
@@ -1170,6 +1203,21 @@ def enhance_items_with_mayo_clinic(items_dict, item_type="test"):
     
     return enhanced_items
 
+def store_items_in_result_store(enhanced_items, item_type="test"):
+    """Save enhanced tests/treatments per disease in the result store"""
+    try:
+        items_by_disease = {}
+        for item_name, info in enhanced_items.items():
+            for disease in info.get('diseases') or ['Unknown']:
+                items_by_disease.setdefault(disease, {})[item_name] = info
+        
+        store = get_result_store()
+        for disease, items in items_by_disease.items():
+            store.put_tests(disease, item_type, items)
+        print(f"🗄️  Stored {len(enhanced_items)} {item_type}s in result store")
+    except Exception as e:
+        print(f"⚠️ Could not store {item_type}s in result store: {e}")
+
 def load_csv_file():
     """Load and return the CSV file as a pandas DataFrame"""
     csv_path = "../CSV/final_diseases_complete.csv"
@@ -1331,6 +1379,7 @@ def extract_tests_and_treatments(df, processed_diseases, column_type):
 def main():
     """Main function to process diseases and generate enhanced Excel analysis."""
     
+    start_run('tests_treatments')
     print("🚀 Starting Enhanced Tests & Treatments Analysis")
     print("📊 Reading data from main_diseases_analysis_final.xlsx")
     